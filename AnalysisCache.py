@@ -0,0 +1,168 @@
+# AnalysisCache.py
+# Cache disque des réponses Gemini pour l'analyse d'images (Generation.py).
+# - clé = empreinte du contenu de l'image (sha256 des octets) + sha256 du prompt
+#   et du modèle : une même photo n'est analysée qu'une fois par prompt / modèle ;
+# - mode perceptuel optionnel (dHash 64 bits) : une copie ré-encodée ou
+#   redimensionnée de la même photo retrouve l'analyse (distance de Hamming <= seuil),
+#   à condition d'avoir le même rapport largeur / hauteur et des couleurs proches
+#   (vignette 4x4) : le dHash seul ignore les couleurs et confond les aplats ;
+# - seules les réponses JSON valides sont stockées (texte brut, re-parsé à la lecture) ;
+# - expiration (TTL) et éviction LRU au-delà d'un nombre maximal d'entrées.
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = r"C:\Users\Ivin\Documents\SmartWear\Prediction\AnalysisCache"
+
+
+def prompt_hash(prompt, model_name):
+    return hashlib.sha256(f"{model_name}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dhash(path, size=8):
+    """Hash perceptuel (différence de luminance entre pixels voisins) sur 64 bits."""
+    return perceptual_signature(path, size)[0]
+
+
+def perceptual_signature(path, size=8):
+    """(dHash 64 bits, rapport largeur / hauteur, vignette RGB 4x4 en octets) en une seule lecture."""
+    from PIL import Image
+    with Image.open(path) as img:
+        aspect = img.width / img.height
+        thumb = img.convert("RGB").resize((4, 4), Image.BOX).tobytes()
+        gray = img.convert("L").resize((size + 1, size), Image.LANCZOS)
+        pixels = list(gray.getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            value = (value << 1) | (left > pixels[row * (size + 1) + col + 1])
+    return value - (1 << 63), aspect, thumb  # dHash en entier signé 64 bits pour SQLite
+
+
+def hamming(a, b):
+    return bin((a ^ b) & (2 ** 64 - 1)).count("1")
+
+
+def color_distance(a, b):
+    """Écart moyen (0-255) entre deux vignettes RGB de même taille."""
+    return sum(abs(x - y) for x, y in zip(a, b)) / len(a)
+
+
+class AnalysisCache:
+    """Index SQLite (image, prompt) -> texte JSON de la réponse. Partageable entre threads."""
+
+    def __init__(self, root=CACHE_DIR, perceptual=False, max_distance=6, max_color_distance=12, max_aspect_delta=0.02,
+                 ttl_s=30 * 86400, max_entries=5000):
+        self.root = root
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        self.max_color_distance = max_color_distance
+        self.max_aspect_delta = max_aspect_delta  # Écart relatif toléré (arrondis de redimensionnement)
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._fingerprints = {}  # (chemin, mtime, taille) -> (sha256, signature perceptuelle) : une lecture par fichier
+        os.makedirs(root, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "analyses.sqlite"), timeout=30, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS analyses (image TEXT, prompt TEXT, phash INTEGER, response TEXT, "
+                          "created REAL, last_used REAL, aspect REAL, thumb BLOB, PRIMARY KEY (image, prompt))")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(analyses)")}
+        for col, kind in (("aspect", "REAL"), ("thumb", "BLOB")):
+            if col not in columns:  # Cache créé avant la vérification des couleurs
+                self.conn.execute(f"ALTER TABLE analyses ADD COLUMN {col} {kind}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt ON analyses (prompt)")
+        self.conn.commit()
+
+    def fingerprint(self, image_path):
+        st = os.stat(image_path)
+        key = (os.path.abspath(image_path), st.st_mtime_ns, st.st_size)
+        if key not in self._fingerprints:
+            self._fingerprints[key] = (file_hash(image_path),
+                                       perceptual_signature(image_path) if self.perceptual else None)
+        return self._fingerprints[key]
+
+    def _similar(self, signature, aspect, thumb):
+        """Vérification complémentaire du dHash : même cadrage et couleurs proches."""
+        if aspect is None or thumb is None:
+            return False  # Entrée sans signature complète : jamais servie en perceptuel
+        return (abs(signature[1] - aspect) <= self.max_aspect_delta * aspect
+                and color_distance(signature[2], thumb) <= self.max_color_distance)
+
+    def get(self, image_path, prompt, model_name):
+        """Texte de la réponse en cache pour cette image et ce prompt, ou None (compte un hit ou un miss)."""
+        image, signature = self.fingerprint(image_path)
+        p_hash = prompt_hash(prompt, model_name)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("DELETE FROM analyses WHERE created < ?", (now - self.ttl_s,))
+            row = self.conn.execute("SELECT image, response FROM analyses WHERE image = ? AND prompt = ?",
+                                    (image, p_hash)).fetchone()
+            if row is None and signature is not None:
+                # Copie ré-encodée / redimensionnée : plus proche voisin perceptuel pour ce prompt
+                near = [(hamming(signature[0], other), img, response)
+                        for img, other, response, aspect, thumb in self.conn.execute(
+                            "SELECT image, phash, response, aspect, thumb FROM analyses "
+                            "WHERE prompt = ? AND phash IS NOT NULL", (p_hash,))
+                        if self._similar(signature, aspect, thumb)]
+                near = [n for n in near if n[0] <= self.max_distance]
+                if near:
+                    row = min(near)[1:]
+            if row is None:
+                self.misses += 1
+                self.conn.commit()
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE analyses SET last_used = ? WHERE image = ? AND prompt = ?", (now, row[0], p_hash))
+            self.conn.commit()
+            return row[1]
+
+    def put(self, image_path, prompt, model_name, response):
+        image, signature = self.fingerprint(image_path)
+        phash, aspect, thumb = signature or (None, None, None)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO analyses (image, prompt, phash, response, created, last_used, "
+                              "aspect, thumb) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                              (image, prompt_hash(prompt, model_name), phash, response, now, now, aspect, thumb))
+            self._evict()
+
+    def evict(self):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_entries."""
+        with self.lock:
+            return self._evict()
+
+    def _evict(self):
+        evicted = self.conn.execute("DELETE FROM analyses WHERE created < ?", (time.time() - self.ttl_s,)).rowcount
+        count = self.conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        if count > self.max_entries:
+            evicted += self.conn.execute(
+                "DELETE FROM analyses WHERE rowid IN (SELECT rowid FROM analyses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)).rowcount
+        self.conn.commit()
+        return evicted
+
+    def print_report(self):
+        session = self.hits + self.misses
+        rate = f"{self.hits / session * 100:.0f} %" if session else "n/d"
+        with self.lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        print(f"🗃️ Cache des analyses : {self.hits}/{session} hits ({rate}) — {count} réponses en cache")
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,133 @@
+# Benchmark_Analysis.py
+# Débit de l'analyse par lots (Generation.py --batch) hors ligne : un modèle local
+# (stub HTTP) remplace Gemini, avec une latence, un débit montant (temps d'upload
+# proportionnel aux octets reçus) et un taux de refus 429 réglables.
+# Le lot est relancé pour chaque taille d'envoi (--max-side, 0 = original) et chaque
+# niveau de concurrence sur un dossier d'images synthétiques ; chaque relance repart
+# d'un JSONL vide, sans cache.
+#
+# Usage : python Benchmark_Analysis.py [--images 64] [--latency 0.5] [--uplink-mbps 10] [--rate-limit 0.05]
+#                                      [--concurrency 1 4 16] [--max-side 0 1024 768]
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+STUB_RESPONSE = {
+    "description": {"Genre": "Homme", "Style de l'accoutrement": "Décontracté"},
+    "styles": {"Décontracté": 0.8, "Streetwear": 0.4, "Sportif": 0.2},
+    "couleurs": {zone: {"Noir": 60, "Blanc": 40} for zone in ("haut", "bas", "chaussures", "accessoires")},
+}
+
+
+class StubModel(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.5      # Secondes par réponse
+    uplink_mbps = 0.0  # Débit montant simulé par connexion (0 = illimité)
+    rate_limit = 0.0   # Probabilité de répondre 429
+    served = 0
+    refused = 0
+
+    def do_POST(self):
+        size = len(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+        upload = size * 8 / (self.uplink_mbps * 1e6) if self.uplink_mbps else 0.0
+        time.sleep(self.latency + upload)
+        if random.random() < self.rate_limit:
+            type(self).refused += 1
+            status, body = 429, b'{"error": "RESOURCE_EXHAUSTED"}'
+        else:
+            type(self).served += 1
+            status, body = 200, json.dumps({"text": json.dumps(STUB_RESPONSE, ensure_ascii=False)}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def make_images(folder, count, size=(768, 1024)):
+    """Photos synthétiques (bruit + aplats) pour donner un volume d'upload réaliste."""
+    rng = random.Random(0)
+    for i in range(count):
+        img = Image.effect_noise(size, 40).convert("RGB")
+        img.paste((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (0, 0, size[0] // 2, size[1] // 3))
+        img.save(os.path.join(folder, f"photo_{i:04d}.png"))
+
+
+def run_batch(folder, out_path, endpoint, concurrency, max_side):
+    cmd = [sys.executable, "Generation.py", "--batch", folder, "--out", out_path, "--endpoint", endpoint,
+           "--concurrency", str(concurrency), "--retries", "8", "--no-cache", "--max-side", str(max_side)]
+    subprocess.run(cmd, check=True, cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+    with open(out_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    ok = [r for r in records if "error" not in r]
+    # Débit mesuré sur les horodatages du lot (hors démarrage du processus)
+    span = max(r["finished"] for r in records) - min(r["started"] for r in records)
+    return {
+        "max_side": max_side,
+        "concurrency": concurrency,
+        "sent_mb": sum(r.get("bytes_sent", 0) for r in records) / 1024 / 1024,
+        "latency_s": sum(r["finished"] - r["sent"] for r in ok) / len(ok) if ok else 0.0,  # Upload + réponse, hors file
+        "images": len(records),
+        "errors": len(records) - len(ok),
+        "retries": sum(r["attempts"] - 1 for r in ok),
+        "seconds": span,
+        "images_per_s": len(records) / span if span else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne de l'analyse par lots (modèle stub)")
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.5, help="Latence simulée du modèle (s)")
+    parser.add_argument("--uplink-mbps", type=float, default=10.0, help="Débit montant simulé (Mbit/s, 0 = illimité)")
+    parser.add_argument("--rate-limit", type=float, default=0.05, help="Probabilité d'une réponse 429")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--max-side", type=int, nargs="+", default=[0, 1024, 768], help="Tailles d'envoi comparées (0 = original)")
+    args = parser.parse_args()
+
+    handler = type("Stub", (StubModel,), {"latency": args.latency, "uplink_mbps": args.uplink_mbps,
+                                          "rate_limit": args.rate_limit})
+    server = StubServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/generate"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "Insert")
+        os.makedirs(folder)
+        make_images(folder, args.images)
+        print(f"⏱️ {args.images} images, modèle stub {args.latency:.2f} s + upload à {args.uplink_mbps:g} Mbit/s, "
+              f"{args.rate_limit:.0%} de 429\n")
+        baseline = {}
+        for max_side in args.max_side:
+            for concurrency in args.concurrency:
+                out_path = os.path.join(tmp, f"batch_{max_side}_{concurrency}.jsonl")
+                r = run_batch(folder, out_path, endpoint, concurrency, max_side)
+                base = baseline.setdefault(concurrency, r)
+                print(f"  {'original' if not max_side else f'{max_side} px':>8}, concurrence {r['concurrency']:>3} : "
+                      f"{r['images_per_s']:6.1f} images/s, {r['latency_s'] * 1000:6.0f} ms/image "
+                      f"({(r['latency_s'] - base['latency_s']) * 1000:+.0f} ms), {r['sent_mb']:7.1f} Mo envoyés "
+                      f"({(1 - r['sent_mb'] / base['sent_mb']) * 100 if base['sent_mb'] else 0:.0f} % économisés), "
+                      f"{r['retries']} retries, {r['errors']} erreurs")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
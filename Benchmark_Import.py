@@ -0,0 +1,72 @@
+# Benchmark_Import.py
+# Temps d'import à froid des modules du projet, chacun dans un processus neuf :
+# durée de l'import, mémoire (RSS max) et dépendances lourdes chargées au passage.
+# Garde-fou : un module qui dépasse son budget ou qui charge une dépendance lourde
+# (TensorFlow, PyTorch, Transformers, matplotlib, Gemini...) fait échouer le script (code 1).
+#
+# Usage : python Benchmark_Import.py [--budget-ms 300] [--repeat 3] [Config Generation ...]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODULES = ["Config", "Generation", "GENERATION_IMAGE_DANS_BDD", "AnalysisCache", "LookCache", "Catalog", "CatalogService"]
+
+# Dépendances qui ne doivent jamais être chargées par un simple import
+HEAVY = ["tensorflow", "torch", "transformers", "sklearn", "h5py", "matplotlib", "wordcloud", "google.genai", "bs4", "PIL"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+except ImportError:  # Windows
+    rss_mb = None
+print(json.dumps({{"ms": elapsed * 1000, "rss_mb": rss_mb, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat=3):
+    """Meilleur temps sur `repeat` imports à froid (un processus par essai)."""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", CHILD.format(module=module, heavy=HEAVY)], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if out.returncode != 0:
+            return {"module": module, "error": (out.stderr.strip().splitlines() or ["?"])[-1]}
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["ms"])
+    return {"module": module, **best}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'import à froid des modules SmartWear")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Temps d'import maximal par module")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"⏱️ Import à froid (meilleur de {args.repeat}), budget {args.budget_ms:.0f} ms\n")
+    for module in args.modules:
+        r = measure(module, args.repeat)
+        if "error" in r:
+            print(f"  ❌ {module:<28} import impossible : {r['error']}")
+            failed = True
+            continue
+        over = r["ms"] > args.budget_ms
+        flag = "❌" if over or r["heavy"] else "✅"
+        rss = f"{r['rss_mb']:6.0f} Mo" if r["rss_mb"] is not None else "     n/d"
+        heavy = f" — dépendances lourdes : {', '.join(r['heavy'])}" if r["heavy"] else ""
+        print(f"  {flag} {module:<28} {r['ms']:8.1f} ms {rss}{heavy}")
+        failed = failed or over or bool(r["heavy"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# Benchmark_Pipeline.py
+# Banc d'essai de la normalisation SmartWear (SCRAP/JSON_DB.py) sur des catalogues
+# synthétiques de 1k / 100k / 1M produits, au schéma et au vocabulaire des fichiers
+# Mango / Nike. Chaque taille tourne dans un processus neuf (pic mémoire propre) et
+# rapporte produits/s, temps par étape, pic RSS et taille des sorties.
+# Les résultats sont ajoutés à un historique JSONL pour suivre les régressions.
+#
+# Usage : python Benchmark_Pipeline.py [--sizes 1000 100000 1000000] [--streaming] [--history fichier.jsonl]
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "SCRAP"))
+from JSON_DB import SmartWearDataPipeline
+
+from Catalog import write_columnar
+
+HISTORY_PATH = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result\Benchmark_Pipeline.jsonl"
+
+# (genre, type, category_auto) observés dans les fichiers des scrapers
+MANGO_CATEGORIES = [
+    ("Femme", "Pulls", "Vêtements"), ("Femme", "Manteaux", "Vêtements"), ("Femme", "Robes", "Vêtements"),
+    ("Femme", "Chaussures", "Vêtements"), ("Homme", "Pulls", "Vêtements"), ("Homme", "Manteaux", "Vêtements"),
+    ("Homme", "Vestes", "Vêtements"), ("Homme", "Pantalons", "Vêtements"), ("Teen", "Jeans", "Vêtements"),
+    ("Teen", "Robes", "Vêtements"), ("Enfants Fille", "Manteaux", "Vêtements"), ("Enfants Garçon", "T-shirts", "Vêtements"),
+]
+NIKE_CATEGORIES = [
+    ("Homme", "Vêtements", "Veste/Manteau"), ("Femme", "Vêtements", "Haut/T-shirt"),
+    ("Homme", "Vêtements", "Pantalon/Short"), ("Homme", "Chaussures", "Chaussures"), ("Femme", "Chaussures", "Chaussures"),
+]
+NOUNS = ["Pull", "Manteau", "Robe", "Jean", "Veste", "T-shirt", "Sweat à capuche", "Pantalon", "Blazer", "Chemise",
+         "Anorak", "Short", "Jupe", "Parka", "Doudoune", "Cardigan", "Legging", "Sneaker", "Bottines", "Sandales"]
+ADJECTIVES = ["maille", "laine", "cachemire", "satin", "lin", "oversize", "matelassé", "brodé", "côtelé", "fluide",
+              "cargo", "vintage", "tailleur", "jacquard", "denim", "technique", "imperméable", "léger", "chaud", "fleurs"]
+NIKE_LINES = ["Nike Sportswear", "Nike Tech Fleece", "Air Jordan 1 Low", "Nike Air Max Plus", "Nike Dri-FIT",
+              "Jordan Spizike Low", "Nike ACG", "Nike Pegasus", "Nike Club", "Nike Windrunner"]
+PHRASES = ["Tissu de laine mélangé.", "Coupe droite.", "Col rond.", "Manches longues.", "Poche sur le devant.",
+           "Idéal pour le running et le training.", "Parfait pour une soirée ou un mariage.", "Style streetwear urbain.",
+           "Tissu léger et fluide pour l'été.", "Doublure chaude contre le froid.", "Finitions côtelées.",
+           "Détails réfléchissants.", "Design minimaliste et épuré.", "Inspiration vintage des années 90.",
+           "Conçu pour le bureau.", "Semelle amortissante.", "Total look", "Disponible Plus"]
+COLORS = ["Noir", "Blanc", "Bleu marine foncé", "Gris chiné moyen", "Écru", "Vert", "Noir/Noir", "Sail/Varsity Red",
+          "Light Photo Blue", "Rouge", "Beige", "Marron"]
+SIZES = [["XS", "S", "M", "L"], ["S", "M", "L", "XL"], ["36", "38", "40", "42"], ["40", "41", "42", "43", "44"], []]
+
+
+def synthetic_product(rng, brand, i):
+    """Un produit brut au format du scraper `brand` ("Mango" ou "Nike")."""
+    if brand == "Mango":
+        genre, p_type, category = rng.choice(MANGO_CATEGORIES)
+        name = f"{rng.choice(NOUNS)} {rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)}"
+        url = f"https://shop.mango.com/fr/fr/p/{genre.lower()}/{p_type.lower()}/{name.lower().replace(' ', '-')}_{i:08d}"
+        image = f"https://shop.mango.com/assets/rcs/pics/static/T8/fotos/outfit/S/{i:08d}_56-99999999_01.jpg"
+    else:
+        genre, p_type, category = rng.choice(NIKE_CATEGORIES)
+        name = rng.choice(NIKE_LINES)
+        url = f"https://www.nike.com/fr/t/{name.lower().replace(' ', '-')}-pour-{i:08x}/IM{i % 10000:04d}-010"
+        image = f"https://static.nike.com/a/images/t_web_pdp_535_v2/f_auto/{i:08x}/{name.upper().replace(' ', '+')}.png"
+
+    product = {
+        "name": name,
+        "price_value": round(rng.uniform(9.99, 249.99), 2),
+        "currency": "EUR",
+        "description": " ".join(rng.sample(PHRASES, rng.randint(3, 8))),
+        "color": rng.choice(COLORS),
+        "rating": None,
+        "sizes": rng.choice(SIZES),
+        "fit_details": [],
+        "category_auto": category,
+        "image": image,
+    }
+    # Même ordre de clés que les fichiers réels
+    if brand == "Mango":
+        product.update({"genre": genre, "type": p_type, "url": url})
+    else:
+        product.update({"url": url, "genre": genre, "type": p_type})
+    return product
+
+
+def write_sources(root, size, seed=42):
+    """Écrit les sources synthétiques (Mango ~55 %, Nike vêtements / chaussures) comme les scrapers."""
+    rng = random.Random(seed)
+    counts = {"Mango": size * 55 // 100}
+    counts["Nike_Vets"] = (size - counts["Mango"]) // 2
+    counts["Nike_Shoes"] = size - counts["Mango"] - counts["Nike_Vets"]
+    paths, offset = {}, 0
+    for source, n in counts.items():
+        path = os.path.join(root, f"{source}.json")
+        brand = "Mango" if source == "Mango" else "Nike"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([synthetic_product(rng, brand, offset + i) for i in range(n)], f, indent=4, ensure_ascii=False)
+        paths[source] = path
+        offset += n
+    return paths
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus courant (Mo), ou None si indisponible."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024 / 1024
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def dir_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def bench_size(size, streaming=False, workers=None):
+    """Mesure complète pour une taille de catalogue (exécutée dans un processus dédié)."""
+    root = tempfile.mkdtemp(prefix="smartwear_bench_")
+    stages = {}
+    try:
+        start = time.perf_counter()
+        pipeline = SmartWearDataPipeline()
+        pipeline.paths = write_sources(root, size)
+        pipeline.output_path = os.path.join(root, "SmartWear_DB.json")
+        pipeline.columnar_path = os.path.join(root, "SmartWear_DB.columns")
+        stages["generate_sources"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sources = {}
+        for name, path in pipeline.paths.items():
+            with open(path, "r", encoding="utf-8") as f:
+                sources[name] = json.load(f)
+        stages["load"] = time.perf_counter() - start
+
+        items = [(name, product) for name, data in sources.items() for product in data]
+
+        start = time.perf_counter()
+        final_db = [pipeline.normalize_item(product, name) for name, product in items]
+        stages["normalize_item"] = time.perf_counter() - start
+
+        # Sous-étapes, rejouées sur les fiches déjà normalisées
+        start = time.perf_counter()
+        labels = [pipeline._classify(item) for item in final_db]
+        stages["  _classify"] = time.perf_counter() - start
+        start = time.perf_counter()
+        for item, lab in zip(final_db, labels):
+            pipeline.determine_age_range(item, lab)
+        stages["  determine_age_range"] = time.perf_counter() - start
+        start = time.perf_counter()
+        for item, lab in zip(final_db, labels):
+            pipeline.determine_style(item, lab)
+        stages["  determine_style"] = time.perf_counter() - start
+        del labels, items, sources
+
+        start = time.perf_counter()
+        with open(pipeline.output_path, "w", encoding="utf-8") as f:
+            json.dump(final_db, f, indent=4, ensure_ascii=False)
+        stages["write_json"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        write_columnar(final_db, pipeline.columnar_path)
+        stages["write_columnar"] = time.perf_counter() - start
+        del final_db
+
+        pipeline_total = stages["load"] + stages["normalize_item"] + stages["write_json"]
+        result = {
+            "size": size,
+            "items_per_sec": size / pipeline_total,
+            "normalize_items_per_sec": size / stages["normalize_item"],
+            "stages_s": stages,
+            "output_json_mb": dir_size(pipeline.output_path) / 1024 / 1024,
+            "output_columnar_mb": dir_size(pipeline.columnar_path) / 1024 / 1024,
+        }
+
+        if streaming:
+            start = time.perf_counter()
+            pipeline.run_streaming(workers=workers)
+            result["streaming_s"] = time.perf_counter() - start
+            result["streaming_items_per_sec"] = size / result["streaming_s"]
+
+        result["peak_rss_mb"] = peak_rss_mb()
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def last_run(history_path, size):
+    """Dernière mesure enregistrée pour cette taille (pour afficher l'écart)."""
+    if not os.path.exists(history_path):
+        return None
+    previous = None
+    with open(history_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry["result"]["size"] == size:
+                    previous = entry
+    return previous
+
+
+def print_result(r, previous=None):
+    print(f"\n📊 {r['size']:,} produits : {r['items_per_sec']:,.0f} produits/s (chargement + normalisation + JSON), "
+          f"normalisation seule {r['normalize_items_per_sec']:,.0f} produits/s")
+    if previous:
+        before = previous["result"]["items_per_sec"]
+        print(f"  ∟ vs {previous['revision'] or '?'} : {(r['items_per_sec'] / before - 1) * 100:+.1f} %")
+    for stage, seconds in r["stages_s"].items():
+        print(f"  ∟ {stage:<24} {seconds:9.3f} s")
+    rss = f"{r['peak_rss_mb']:.0f} Mo" if r["peak_rss_mb"] is not None else "n/d"
+    print(f"  ∟ pic RSS {rss}, JSON {r['output_json_mb']:.1f} Mo, colonnaire {r['output_columnar_mb']:.1f} Mo")
+    if "streaming_s" in r:
+        print(f"  ∟ mode flux : {r['streaming_s']:.2f} s ({r['streaming_items_per_sec']:,.0f} produits/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline de normalisation SmartWear")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--streaming", action="store_true", help="Mesure aussi run_streaming (multi-processus)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--history", default=HISTORY_PATH, help="Historique JSONL des mesures")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+    for size in args.sizes:
+        print(f"⏱️ Catalogue synthétique de {size:,} produits...")
+        # Un processus neuf par taille : le pic RSS ne mesure que cette taille
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(bench_size, size, args.streaming, args.workers).result()
+        print_result(result, last_run(args.history, size))
+
+        entry = {"date": datetime.now().isoformat(timespec="seconds"), "revision": revision,
+                 "python": platform.python_version(), "machine": platform.machine(),
+                 "cpus": os.cpu_count(), "result": result}
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"\n📄 Historique : {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Benchmark_Scrapers.py
+# Banc d'essai hors ligne des parsers Mango / Nike sur un corpus enregistré
+# avec `python Mango.py --fixtures record` / `python Nike.py --fixtures record`.
+# Rapporte pages/s, temps de parsing par champ et pic mémoire, pour comparer
+# des runs de façon reproductible sans accès réseau.
+#
+# Usage : python Benchmark_Scrapers.py [--archive pages.zip] [--repeat 3] [--json résultats.json]
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+import Fixtures
+import Nike
+from Extraction import product_from_json_ld
+from Mango import MangoGlobalScraper
+
+
+class ArchivedResponse:
+    """Réponse minimale (texte + statut) reconstruite depuis l'archive."""
+
+    def __init__(self, meta, body):
+        self.status_code = meta["status"]
+        self.headers = meta["headers"]
+        self.content = body
+        self.text = body.decode("utf-8", errors="replace")
+
+
+def load_corpus(archive):
+    """Pages produit archivées (statut 200), séparées par scraper."""
+    corpus = {"Mango": [], "Nike": []}
+    for url in archive.urls():
+        meta, body = archive.get(url)
+        if meta["status"] != 200:
+            continue
+        if "shop.mango.com" in url and "/p/" in url:
+            corpus["Mango"].append(ArchivedResponse(meta, body))
+        elif "nike.com" in url and "/t/" in url:
+            corpus["Nike"].append(ArchivedResponse(meta, body))
+    return corpus
+
+
+def timed(fn, pages, repeat):
+    """Meilleur temps total (s) de `fn(page)` sur tout le corpus, sur `repeat` passes."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            fn(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(fn, pages):
+    """Pic d'allocation Python (Mo) pendant une passe complète."""
+    tracemalloc.start()
+    for page in pages:
+        fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def bench_scraper(pages, parse, fast, soup_fields, repeat):
+    total = timed(parse, pages, repeat)
+    result = {
+        "pages": len(pages),
+        "pages_per_sec": len(pages) / total if total else None,
+        "ms_per_page": total / len(pages) * 1000,
+        "peak_mem_mb": peak_memory(parse, pages),
+        "fields_ms_per_page": {},
+    }
+
+    # Chemin rapide (tous champs) puis construction de l'arbre et extracteurs soup, champ par champ
+    result["fields_ms_per_page"]["(rapide) données structurées"] = timed(lambda p: fast(p.text), pages, repeat) / len(pages) * 1000
+    result["fields_ms_per_page"]["(soup) construction de l'arbre"] = timed(lambda p: BeautifulSoup(p.text, "html.parser"), pages, repeat) / len(pages) * 1000
+    soups = [BeautifulSoup(p.text, "html.parser") for p in pages]
+    for field, extractor in soup_fields.items():
+        label = field if isinstance(field, str) else " + ".join(field)
+        result["fields_ms_per_page"][f"(soup) {label}"] = timed(extractor, soups, repeat) / len(pages) * 1000
+    return result
+
+
+def bench_price_parser(repeat):
+    """Micro-benchmark de Nike.parse_price_text sur des formats de prix courants."""
+    samples = ["129,99 €", "1 299,00 €", "$110", "Prix actuel 59,99 €", "89.99", " 49,97 €"] * 500
+    total = timed(Nike.parse_price_text, samples, repeat)
+    return {"calls": len(samples), "us_per_call": total / len(samples) * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne des parsers Mango / Nike")
+    parser.add_argument("--archive", default=Fixtures.DEFAULT_ARCHIVE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Écrit aussi les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    archive = Fixtures.FixtureArchive(args.archive, "r")
+    corpus = load_corpus(archive)
+    archive.close()
+
+    mango = MangoGlobalScraper(use_cache=False)
+    results = {}
+    if corpus["Mango"]:
+        results["Mango"] = bench_scraper(
+            corpus["Mango"], mango.parse_detail_page, product_from_json_ld,
+            {"price": mango._soup_price, "color": mango._soup_color,
+             "sizes": mango._soup_sizes, "description": mango._soup_description},
+            args.repeat)
+    if corpus["Nike"]:
+        results["Nike"] = bench_scraper(
+            corpus["Nike"], Nike.parse_product_page, Nike._fast_product_fields,
+            Nike.SOUP_EXTRACTORS, args.repeat)
+    results["parse_price_text"] = bench_price_parser(args.repeat)
+    mango.fetcher.close()
+
+    for name in ("Mango", "Nike"):
+        if name not in results:
+            print(f"⚠️ Aucune page produit {name} dans l'archive.")
+            continue
+        r = results[name]
+        print(f"\n📊 {name} : {r['pages']} pages — {r['pages_per_sec']:.1f} pages/s "
+              f"({r['ms_per_page']:.2f} ms/page), pic mémoire {r['peak_mem_mb']:.1f} Mo")
+        for field, ms in r["fields_ms_per_page"].items():
+            print(f"  ∟ {field:<36} {ms:8.3f} ms/page")
+    p = results["parse_price_text"]
+    print(f"\n📊 parse_price_text : {p['us_per_call']:.2f} µs/appel ({p['calls']} appels)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+        print(f"\n📄 Résultats : {args.json}")
+
+
+if __name__ == "__main__":
+    main()
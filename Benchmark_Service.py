@@ -0,0 +1,113 @@
+# Benchmark_Service.py
+# Charge concurrente sur le service du catalogue (CatalogService.py) : latences
+# p50 / p95 / p99 et débit de /select, avec en option une réécriture du catalogue
+# en pleine charge pour vérifier que le rechargement à chaud ne fait échouer
+# aucune requête.
+#
+# Usage : python Benchmark_Service.py [--url http://127.0.0.1:8765] [--clients 32] [--requests 5000] [--reload]
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import CatalogService
+from GENERATION_IMAGE_DANS_BDD import DB_PATH
+
+GENRES = ["Homme", "Femme", "Teen", "Enfant"]
+STYLES = ["Décontracté", "Sportif", "Professionnel", "Élégant", "Streetwear", "Vintage", "Minimaliste", "Urbain"]
+SEASONS = ["Hiver", "Été", "Automne", "Printemps"]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def rewrite_catalog(db_path):
+    """Réécrit le catalogue à l'identique (nouvelle date) : déclenche un rechargement."""
+    tmp = db_path + ".bench.tmp"
+    shutil.copyfile(db_path, tmp)
+    os.replace(tmp, db_path)
+
+
+def run_load(base_url, clients, total, seed=0):
+    rng = random.Random(seed)
+    queries = [{"mode": rng.choice("1234"), "genre": rng.choice(GENRES), "style": rng.choice(STYLES),
+                "season": rng.choice(SEASONS)} for _ in range(total)]
+    local = threading.local()
+
+    def one(params):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()  # Connexion keep-alive par client
+        start = time.perf_counter()
+        try:
+            ok = local.session.get(f"{base_url}/select", params=params, timeout=30).status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(one, queries))
+    elapsed = time.perf_counter() - start
+    latencies = [lat * 1000 for lat, ok in results if ok]
+    return {
+        "requests": total,
+        "errors": sum(1 for _, ok in results if not ok),
+        "rps": total / elapsed,
+        "p50_ms": percentile(latencies, 50) if latencies else None,
+        "p95_ms": percentile(latencies, 95) if latencies else None,
+        "p99_ms": percentile(latencies, 99) if latencies else None,
+        "mean_ms": statistics.mean(latencies) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latence du service du catalogue SmartWear")
+    parser.add_argument("--url", help="Service déjà lancé ; sinon un service local est démarré")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--reload", action="store_true", help="Réécrit le catalogue pendant la charge")
+    args = parser.parse_args()
+
+    server = snapshots = None
+    base_url = args.url
+    if not base_url:
+        server, snapshots = CatalogService.serve(port=0, db_path=args.db, reload_interval=0.2, use_cache=False)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    requests.get(f"{base_url}/health", timeout=30)  # Chauffe
+
+    reloader = None
+    if args.reload:
+        if args.url:
+            print("⚠️ --reload ne s'applique qu'au service local.")
+        else:
+            def reload_loop():
+                time.sleep(0.5)
+                rewrite_catalog(args.db)
+            reloader = threading.Thread(target=reload_loop, daemon=True)
+            reloader.start()
+
+    print(f"⏱️ {args.requests} requêtes /select, {args.clients} clients concurrents sur {base_url}...")
+    r = run_load(base_url, args.clients, args.requests)
+    if reloader:
+        reloader.join()
+
+    print(f"\n📊 {r['rps']:.0f} req/s — p50 {r['p50_ms']:.2f} ms, p95 {r['p95_ms']:.2f} ms, "
+          f"p99 {r['p99_ms']:.2f} ms (moyenne {r['mean_ms']:.2f} ms), {r['errors']} erreurs")
+    if snapshots:
+        print(f"  ∟ rechargements à chaud pendant la charge : {snapshots.reloads}")
+        snapshots.stop()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
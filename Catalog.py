@@ -0,0 +1,340 @@
+# Catalog.py
+# Format colonnaire du catalogue SmartWear, écrit à côté de SmartWear_DB.json.
+# Un dossier <SmartWear_DB>.columns (chaque version, voir plus bas) contient :
+# - meta.json : nombre de lignes, dictionnaires des colonnes catégorielles ;
+# - <colonne>.codes.npy : codes entiers des colonnes catégorielles (genre_clean, style, ...) ;
+# - <colonne>.offsets.npy + <colonne>.bin : valeurs JSON des autres colonnes, bout à bout.
+# Les lecteurs ouvrent tout en mémoire mappée : filtrer ne touche que les codes,
+# et seules les lignes réellement choisies sont décodées.
+#
+# Variante optionnelle : <SmartWear_DB>.sqlite, colonnes de filtre en minuscules,
+# index composite (genre_clean, style, season, main_category) et table des
+# effectifs par combinaison ; un tirage aléatoire = une recherche dans l'index.
+# Plusieurs processus peuvent la lire en même temps sans la charger.
+#
+# Versions : chaque écriture produit une nouvelle version à côté (<chemin>.v<horodatage>)
+# puis bascule le pointeur <chemin>.current vers elle. Les fichiers qu'un lecteur garde
+# ouverts (service à rechargement à chaud) ne sont jamais remplacés, ce que Windows
+# refuserait ; les anciennes versions sont supprimées dès qu'elles ne sont plus ouvertes.
+
+import json
+import mmap
+import os
+import random
+import shutil
+import sqlite3
+import time
+from array import array
+from urllib.request import pathname2url
+
+import numpy as np
+
+CATEGORICAL = ["genre_clean", "style", "season", "main_category", "brand_source"]
+FACETS = ["genre_clean", "style", "season", "main_category"]
+KEYS_COLUMN = "__keys__"  # Ordre des clés de chaque fiche (il varie selon la source)
+
+
+def columnar_path(json_path):
+    return os.path.splitext(json_path)[0] + ".columns"
+
+
+def sqlite_path(json_path):
+    return os.path.splitext(json_path)[0] + ".sqlite"
+
+
+def current_version(path):
+    """Chemin réel de la version courante de `path` (dossier colonnaire ou fichier SQLite), ou None."""
+    pointer = path + ".current"
+    if os.path.exists(pointer):
+        with open(pointer, "r", encoding="utf-8") as f:
+            return os.path.join(os.path.dirname(path), f.read().strip())
+    return path if os.path.exists(path) else None  # Ancienne disposition, sans version
+
+
+def _versions(path):
+    folder, prefix = os.path.dirname(path), os.path.basename(path) + ".v"
+    return [os.path.join(folder, name) for name in os.listdir(folder or ".") if name.startswith(prefix)]
+
+
+def _remove(path):
+    """Supprime un dossier ou un fichier ; False s'il est encore ouvert (Windows) ou déjà absent."""
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+def prune_versions(path):
+    """Supprime les versions de `path` autres que la courante (celles encore ouvertes restent)."""
+    current = current_version(path)
+    stale = [v for v in _versions(path) if current is None or os.path.abspath(v) != os.path.abspath(current)]
+    if current != path and os.path.exists(path):
+        stale.append(path)  # Copie de l'ancienne disposition, remplacée par les versions
+    return sum(_remove(v) for v in stale)
+
+
+def remove_versions(path):
+    """Retire le catalogue `path` : pointeur d'abord (plus aucun lecteur ne l'ouvre), puis ses versions."""
+    if os.path.exists(path + ".current"):
+        os.remove(path + ".current")
+    for version in _versions(path) + [path]:
+        if os.path.exists(version):
+            _remove(version)
+
+
+def publish_version(path, tmp):
+    """Renomme `tmp` en nouvelle version de `path`, y fait pointer <path>.current et nettoie les anciennes."""
+    version = f"{path}.v{time.time_ns()}"
+    os.replace(tmp, version)
+    pointer_tmp = f"{path}.current.{os.getpid()}.tmp"
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(version))
+    for attempt in range(5):
+        try:
+            os.replace(pointer_tmp, path + ".current")
+            break
+        except PermissionError:  # Windows : pointeur en cours de lecture par un autre processus
+            if attempt == 4:
+                raise
+            time.sleep(0.05)
+    prune_versions(path)
+    return version
+
+
+class ColumnarWriter:
+    """Écriture en flux, fiche par fiche ; le dossier final n'apparaît qu'à close()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path + ".tmp"
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+        self.rows = 0
+        self.dictionaries = {col: {} for col in CATEGORICAL + [KEYS_COLUMN]}
+        self.codes = {col: array("i") for col in self.dictionaries}
+        self.heaps = {}    # colonne -> fichier .bin ouvert
+        self.offsets = {}  # colonne -> array("q") des débuts de valeur
+
+    def _encode(self, col, value):
+        table = self.dictionaries[col]
+        key = json.dumps(value, ensure_ascii=False)
+        if key not in table:
+            table[key] = len(table)
+        self.codes[col].append(table[key])
+
+    def _heap(self, col):
+        if col not in self.heaps:
+            self.heaps[col] = open(os.path.join(self.tmp, f"{col}.bin"), "wb")
+            # Colonne apparue en cours de route : valeurs absentes (null) pour les lignes précédentes
+            self.offsets[col] = array("q", [0] * (self.rows + 1))
+        return self.heaps[col]
+
+    def add(self, record):
+        self._encode(KEYS_COLUMN, list(record))
+        for col in CATEGORICAL:
+            self._encode(col, record.get(col))
+        for col, value in record.items():
+            if col in self.dictionaries:
+                continue
+            heap = self._heap(col)
+            heap.write(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        self.rows += 1
+        for col, heap in self.heaps.items():
+            self.offsets[col].append(heap.tell())
+
+    def close(self):
+        for col, codes in self.codes.items():
+            dtype = np.int8 if len(self.dictionaries[col]) < 128 else np.int32
+            np.save(os.path.join(self.tmp, f"{col}.codes.npy"), np.frombuffer(codes, dtype=np.int32).astype(dtype))
+        for col, heap in self.heaps.items():
+            heap.close()
+            np.save(os.path.join(self.tmp, f"{col}.offsets.npy"), np.frombuffer(self.offsets[col], dtype=np.int64))
+        meta = {
+            "rows": self.rows,
+            "dictionaries": {col: [json.loads(k) for k in table] for col, table in self.dictionaries.items()},
+            "columns": sorted(self.heaps),
+        }
+        with open(os.path.join(self.tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        publish_version(self.path, self.tmp)
+        return self.rows
+
+    def abort(self):
+        for heap in self.heaps.values():
+            heap.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def write_columnar(records, path):
+    """Écrit un itérable de fiches au format colonnaire. Renvoie le nombre de lignes."""
+    writer = ColumnarWriter(path)
+    for record in records:
+        writer.add(record)
+    return writer.close()
+
+
+class ColumnarCatalog:
+    """Lecture en mémoire mappée : coût d'ouverture constant, décodage à la ligne."""
+
+    def __init__(self, path):
+        self.path = current_version(path) or path
+        with open(os.path.join(self.path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.dictionaries = meta["dictionaries"]
+        self.columns = meta["columns"]
+        self._codes = {}
+        self._heaps = {}
+
+    def __len__(self):
+        return self.rows
+
+    # ---- Colonnes catégorielles ----
+    def codes(self, col):
+        if col not in self._codes:
+            self._codes[col] = np.load(os.path.join(self.path, f"{col}.codes.npy"), mmap_mode="r")
+        return self._codes[col]
+
+    def mask(self, col, predicate):
+        """Masque booléen des lignes dont la valeur de `col` vérifie `predicate` (évalué une fois par modalité)."""
+        keep = np.array([bool(predicate(v)) for v in self.dictionaries[col]], dtype=bool)
+        return keep[self.codes(col)]
+
+    # ---- Autres colonnes ----
+    def _heap(self, col):
+        if col not in self._heaps:
+            offsets = np.load(os.path.join(self.path, f"{col}.offsets.npy"), mmap_mode="r")
+            with open(os.path.join(self.path, f"{col}.bin"), "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if offsets[-1] else b""
+            self._heaps[col] = (offsets, data)
+        return self._heaps[col]
+
+    def value(self, col, i):
+        if col in self.dictionaries:
+            return self.dictionaries[col][self.codes(col)[i]]
+        offsets, data = self._heap(col)
+        start, end = int(offsets[i]), int(offsets[i + 1])
+        return json.loads(data[start:end]) if end > start else None
+
+    def row(self, i):
+        """Fiche complète de la ligne `i`, identique à celle de SmartWear_DB.json."""
+        return {col: self.value(col, i) for col in self.value(KEYS_COLUMN, i)}
+
+    def open_all(self):
+        """
+        Ouvre tout de suite chaque colonne (sinon ouverte au premier accès) : le lecteur
+        reste lié aux fichiers de ce catalogue même si le pipeline les remplace ensuite.
+        """
+        for col in self.dictionaries:
+            self.codes(col)
+        for col in self.columns:
+            self._heap(col)
+        return self
+
+    def close(self):
+        for _, data in self._heaps.values():
+            if isinstance(data, mmap.mmap):
+                data.close()
+        self._heaps.clear()
+        self._codes.clear()
+
+
+class SqliteCatalogWriter:
+    """
+    Construit le catalogue SQLite en flux. Chaque fiche reçoit sa position `pos` dans
+    sa combinaison de facettes : (facettes, pos) désigne une fiche via l'index.
+    """
+
+    def __init__(self, path, batch_size=10000):
+        self.path = path
+        self.tmp = path + ".tmp"
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(self.tmp)
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute(
+            "CREATE TABLE products (id INTEGER PRIMARY KEY, genre_clean TEXT, style TEXT, season TEXT, "
+            "main_category TEXT, pos INTEGER, data TEXT)")
+        self.counts = {}
+        self.rows = 0
+        self.pending = []
+
+    def add(self, record):
+        facets = tuple((record.get(col) or "").lower() for col in FACETS)
+        pos = self.counts.get(facets, 0)
+        self.counts[facets] = pos + 1
+        self.pending.append((self.rows, *facets, pos, json.dumps(record, ensure_ascii=False)))
+        self.rows += 1
+        if len(self.pending) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        self.conn.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)", self.pending)
+        self.pending = []
+
+    def close(self):
+        self._flush()
+        # Index créé après le remplissage (plus rapide que de le maintenir ligne à ligne)
+        self.conn.execute(f"CREATE INDEX idx_facets ON products ({', '.join(FACETS)}, pos)")
+        self.conn.execute(f"CREATE TABLE facets ({', '.join(FACETS)}, n INTEGER)")
+        self.conn.executemany("INSERT INTO facets VALUES (?, ?, ?, ?, ?)",
+                              [(*facets, n) for facets, n in sorted(self.counts.items())])
+        self.conn.commit()
+        self.conn.close()
+        publish_version(self.path, self.tmp)
+        return self.rows
+
+    def abort(self):
+        self.conn.close()
+        os.remove(self.tmp)
+
+
+def write_sqlite(records, path):
+    """Écrit un itérable de fiches dans le catalogue SQLite. Renvoie le nombre de lignes."""
+    writer = SqliteCatalogWriter(path)
+    for record in records:
+        writer.add(record)
+    return writer.close()
+
+
+class SqliteCatalog:
+    """Lecture seule, partageable entre processus. Les facettes sont en minuscules."""
+
+    def __init__(self, path):
+        self.path = current_version(path) or path
+        self.conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(self.path))}?mode=ro", uri=True,
+                                    check_same_thread=False)
+        # Quelques centaines de combinaisons au plus : gardées en mémoire
+        self.facets = self.conn.execute(f"SELECT {', '.join(FACETS)}, n FROM facets").fetchall()
+
+    def __len__(self):
+        return sum(f[-1] for f in self.facets)
+
+    def count(self, keep):
+        """Nombre de fiches dont les facettes (genre, style, saison, catégorie) vérifient `keep`."""
+        return sum(f[-1] for f in self.facets if keep(*f[:-1]))
+
+    def pick(self, keep, rng=random):
+        """Fiche tirée uniformément parmi celles dont les facettes vérifient `keep`, ou None."""
+        groups = [f for f in self.facets if keep(*f[:-1])]
+        total = sum(f[-1] for f in groups)
+        if not total:
+            return None
+        r = rng.randrange(total)
+        for *facets, n in groups:
+            if r < n:
+                break
+            r -= n
+        where = " AND ".join(f"{col} = ?" for col in FACETS)
+        row = self.conn.execute(f"SELECT data FROM products WHERE {where} AND pos = ?", (*facets, r)).fetchone()
+        return json.loads(row[0])
+
+    def close(self):
+        self.conn.close()
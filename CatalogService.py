@@ -0,0 +1,264 @@
+# CatalogService.py
+# Service HTTP longue durée autour de SmartWearVisualizer : le catalogue et ses
+# index sont chargés une seule fois, puis servis à des requêtes concurrentes.
+# - GET  /health             : taille et date du snapshot courant ;
+# - GET  /select?genre=...   : tenue choisie (mode, genre, style, season) ;
+# - POST /look  (JSON prefs) : tenue + prompt + image générée (cache des looks) ;
+# - GET  /image/<clé>        : octets de l'image d'un look en cache.
+# Rechargement à chaud : quand le pipeline réécrit SmartWear_DB.json (ou ses copies
+# colonnaire / SQLite), un nouveau snapshot est construit à côté (toutes ses colonnes
+# ouvertes d'emblée) puis substitué d'un bloc ; les requêtes en cours terminent sur
+# l'ancien, fermé dès que la dernière d'entre elles a répondu.
+# Erreurs : préférences invalides -> 400, générateur injoignable -> 502, autre -> 500.
+#
+# Usage : python CatalogService.py [--port 8765] [--reload-interval 2]
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from Catalog import columnar_path, prune_versions, sqlite_path
+from Crawler import PoliteFetcher
+from GENERATION_IMAGE_DANS_BDD import DB_PATH, IMAGE_ENDPOINT, SmartWearVisualizer, validate_prefs
+from LookCache import LookCache
+
+
+def catalog_signature(db_path):
+    """(mtime, taille) du JSON et des pointeurs de version des copies : change dès que le pipeline réécrit."""
+    files = [db_path, columnar_path(db_path) + ".current", sqlite_path(db_path) + ".current"]
+    return tuple((os.stat(f).st_mtime_ns, os.stat(f).st_size) if os.path.exists(f) else None for f in files)
+
+
+def outfit_summary(outfit):
+    return {slot: p for slot, p in outfit.items() if p}
+
+
+class CatalogSnapshots:
+    """Snapshot courant du catalogue + surveillance des fichiers pour le rechargement à chaud."""
+
+    def __init__(self, db_path=DB_PATH, look_cache=None, endpoint=IMAGE_ENDPOINT, reload_interval=2.0):
+        self.db_path = db_path
+        self.look_cache = look_cache
+        self.endpoint = endpoint
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._lock = threading.Lock()  # Protège current et les compteurs d'utilisation des snapshots
+        self.current = self._build()
+        self.signature = catalog_signature(db_path)
+        self._stop = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+
+    def _build(self):
+        app = SmartWearVisualizer(use_cache=False, db_path=self.db_path, look_cache=self.look_cache)
+        app.image_endpoint = self.endpoint
+        app.loaded_at = time.time()
+        if app.catalog is not None:
+            app.catalog.open_all()  # Les lectures différées suivraient des fichiers déjà remplacés
+        app.users = 0  # Requêtes en cours sur ce snapshot
+        app.retired = False
+        return app
+
+    def acquire(self):
+        """Snapshot courant, réservé pour une requête (à rendre avec release)."""
+        with self._lock:
+            app = self.current
+            app.users += 1
+            return app
+
+    def release(self, app):
+        with self._lock:
+            app.users -= 1
+            close = app.retired and app.users == 0
+        if close:
+            self._retire(app)
+
+    def _retire(self, app):
+        """Ferme un snapshot remplacé, puis supprime les versions de fichiers qu'il était seul à garder ouvertes."""
+        app.close_catalog()
+        for path in (columnar_path(self.db_path), sqlite_path(self.db_path)):
+            prune_versions(path)
+
+    def start(self):
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        pending = None
+        while not self._stop.wait(self.reload_interval):
+            signature = catalog_signature(self.db_path)
+            if signature == self.signature:
+                pending = None
+                continue
+            # Le pipeline écrit le JSON en place : on attend deux relevés identiques
+            if signature != pending:
+                pending = signature
+                continue
+            try:
+                snapshot = self._build()
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Rechargement du catalogue reporté : {e}")
+                continue
+            # Substitution atomique : les requêtes en cours gardent leur référence à l'ancien snapshot,
+            # fermé par la dernière d'entre elles (ou tout de suite s'il n'est plus utilisé)
+            with self._lock:
+                old, self.current = self.current, snapshot
+                old.retired = True
+                close = old.users == 0
+            if close:
+                self._retire(old)
+            self.signature = signature
+            self.reloads += 1
+            pending = None
+            print(f"🔁 Catalogue rechargé ({self.size(snapshot)} articles).")
+
+    @staticmethod
+    def size(app):
+        if app.sqlite is not None:
+            return len(app.sqlite)
+        if app.catalog is not None:
+            return len(app.catalog)
+        return len(app.products)
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive : réponses toujours avec Content-Length
+    snapshots = None  # CatalogSnapshots, fixé par serve()
+    fetcher = None    # PoliteFetcher partagé pour le générateur d'images
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _prefs(self, query):
+        """Préférences de la requête (query string, puis corps JSON), validées et complétées par DEFAULT_PREFS."""
+        prefs = {k: v[0] for k, v in parse_qs(query).items()}
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                body = json.loads(self.rfile.read(length))
+                if not isinstance(body, dict):
+                    raise ValueError("Le corps doit être un objet JSON de préférences")
+                prefs.update(body)
+        # Le filtre du catalogue n'a pas de valeur par défaut raisonnable pour ces trois clés
+        missing = [k for k in ("genre", "style", "season") if prefs.get(k) in (None, "")]
+        if missing:
+            raise ValueError(f"Préférences manquantes : {', '.join(missing)}")
+        prefs, error = validate_prefs(prefs)
+        if error:
+            raise ValueError(f"Préférences invalides : {error}")
+        return prefs
+
+    def do_GET(self):
+        self._route()
+
+    def do_POST(self):
+        self._route()
+
+    def _route(self):
+        url = urlparse(self.path)
+        app = self.snapshots.acquire()  # Un seul snapshot pour toute la requête
+        try:
+            if url.path == "/health":
+                self._send_json({"products": self.snapshots.size(app), "loaded_at": app.loaded_at,
+                                 "reloads": self.snapshots.reloads})
+            elif url.path == "/select":
+                prefs = self._prefs(url.query)
+                self._send_json({"prefs": prefs, "outfit": outfit_summary(app.select_items(prefs))})
+            elif url.path == "/look":
+                self._look(app, self._prefs(url.query))
+            elif url.path.startswith("/image/"):
+                self._image(url.path.rsplit("/", 1)[-1])
+            else:
+                self._send_json({"error": "not found"}, 404)
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+        except requests.exceptions.RequestException as e:
+            self._send_json({"error": f"générateur d'images injoignable : {e}"}, 502)
+        except ConnectionError:
+            pass  # Client parti en cours de réponse
+        except Exception as e:
+            print(f"⚠️ {self.command} {url.path} : {type(e).__name__} : {e}")
+            self._send_json({"error": f"erreur interne : {type(e).__name__}"}, 500)
+        finally:
+            self.snapshots.release(app)
+
+    def _look(self, app, prefs):
+        outfit = app.select_items(prefs)
+        raw_prompt, links = app.build_prompt(prefs, outfit)
+        if raw_prompt is None:
+            self._send_json({"prefs": prefs, "outfit": {}, "error": "aucun article correspondant"}, 404)
+            return
+        body, status, ext, from_cache = app.fetch_look(raw_prompt, get=self.fetcher.get, timeout=120)
+        payload = {"prefs": prefs, "outfit": outfit_summary(outfit), "prompt": raw_prompt,
+                   "status": status, "from_cache": from_cache}
+        if status == 200 and app.look_cache:
+            payload["image"] = f"/image/{app.cache_key(raw_prompt)}"
+        self._send_json(payload, 200 if status == 200 else 502)
+
+    def _image(self, key):
+        path = self.snapshots.look_cache.get(key) if self.snapshots.look_cache else None
+        if not path:
+            self._send_json({"error": "image inconnue"}, 404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        ext = os.path.splitext(path)[1][1:]
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg" if ext == "jpg" else f"image/{ext}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Pas de log par requête (bruit sous charge)
+
+
+class CatalogServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # File d'attente TCP : 5 par défaut, trop peu sous charge concurrente
+
+
+def serve(host="127.0.0.1", port=8765, db_path=DB_PATH, endpoint=IMAGE_ENDPOINT, reload_interval=2.0,
+          use_cache=True, workers=16):
+    """Démarre le service (thread de fond) et renvoie (serveur, snapshots)."""
+    snapshots = CatalogSnapshots(db_path, LookCache() if use_cache else None, endpoint, reload_interval)
+    snapshots.start()
+    handler = type("Handler", (CatalogHandler,), {
+        "snapshots": snapshots,
+        "fetcher": PoliteFetcher(workers=workers, max_rps_per_host=None),
+    })
+    server = CatalogServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, snapshots
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service HTTP du catalogue SmartWear")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--endpoint", default=IMAGE_ENDPOINT, help="URL du générateur d'images, avec {prompt}")
+    parser.add_argument("--reload-interval", type=float, default=2.0, help="Secondes entre deux vérifications du catalogue")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    server, snapshots = serve(args.host, args.port, args.db, args.endpoint, args.reload_interval, not args.no_cache)
+    print(f"🛰️ Service SmartWear sur http://{args.host}:{args.port} ({snapshots.size(snapshots.current)} articles)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        snapshots.stop()
+        server.shutdown()
@@ -19,6 +19,18 @@ OUTPUT_GRAPH_DIR = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result"
 RESNET_FEATURE_SIZE = 2048
 BLIP_MODEL_NAME = "Salesforce/blip-image-captioning-base"
 GEMINI_MODEL_NAME = "gemini-2.5-flash"
+GEMINI_COMBINED_ANALYSIS = True  # Description + styles + couleurs en un seul appel (False = trois appels séparés)
+
+# Cache des analyses Gemini (AnalysisCache.py)
+ANALYSIS_CACHE = True               # False = contournement : ni lecture ni écriture du cache
+ANALYSIS_CACHE_PERCEPTUAL = False   # True = les copies ré-encodées / redimensionnées d'une photo retrouvent son analyse
+ANALYSIS_CACHE_TTL_DAYS = 30
+ANALYSIS_CACHE_MAX_ENTRIES = 5000
+
+# Image envoyée au modèle (Generation.py) : orientée, réduite et recompressée une fois
+UPLOAD_MAX_SIDE = 1024              # Côté max en pixels (0 = fichier original tel quel)
+UPLOAD_FORMAT = "JPEG"              # "JPEG" ou "WEBP"
+UPLOAD_QUALITY = 85
 
 # ==========================
 #  Template JSON pour chaque image
@@ -90,53 +102,63 @@ json_Description = {
 }
 
 # ==========================
-#  Packages pour le projet
+#  Packages pour le projet (chargement paresseux)
 # ==========================
+# Ce module ne contient que des constantes : l'importer coûte quelques millisecondes.
+# Les dépendances lourdes (TensorFlow, PyTorch, Transformers, scikit-learn...) ne sont
+# importées qu'au premier accès, par exemple `from Config import tf` ou `Config.torch`,
+# puis gardées dans le module pour les accès suivants.
 
+import importlib
 import os                       # Gestion des chemins et fichiers
-import h5py                     # Lecture des fichiers HDF5 (dataset)
-import numpy as np              # Manipulation des tableaux / matrices
-import matplotlib.pyplot as plt # Visualisation pour des graphiques
-from PIL import Image           # Gestion / conversion d'images
-from wordcloud import WordCloud # Nuage de Point
-
-# ==========================
-#  OPENAI
-# ==========================
-
-from google import genai        # IA Gemini
-
-# ==========================
-#  TensorFlow / Keras
-# ==========================
-import tensorflow as tf
-from tensorflow.keras.applications import resnet50   # Modèle ResNet50 pour features
-from tensorflow.keras.preprocessing import image     # Prétraitement des images
-
-# ==========================
-#  Scikit-learn
-# ==========================
-from sklearn.neighbors import KNeighborsClassifier  # KNN pour classification
-from sklearn.ensemble import RandomForestClassifier # Random Forest
-
-# ==========================
-#  Transformers / BLIP / HF
-# ==========================
-import torch                     # PyTorch requis pour Hugging Face
-from transformers import BlipProcessor, BlipForConditionalGeneration
-from transformers import pipeline  # Pour génération de texte / JSON
-
-# ==========================
-#  Utilitaires
-# ==========================
-
 import json                      # Pour sauvegarder le JSON
-import requests                  # Pour appeler une API externe (Gemini Pro)
-from tqdm import tqdm            # Barres de progression
+import base64
 
-# ==========================
-#  API & Scrapping
-# ==========================
+# nom exposé -> (module, attribut) ; attribut None = le module lui-même
+LAZY_IMPORTS = {
+    "h5py": ("h5py", None),                                      # Lecture des fichiers HDF5 (dataset)
+    "np": ("numpy", None),                                       # Manipulation des tableaux / matrices
+    "plt": ("matplotlib.pyplot", None),                          # Visualisation pour des graphiques
+    "Image": ("PIL", "Image"),                                   # Gestion / conversion d'images
+    "WordCloud": ("wordcloud", "WordCloud"),                     # Nuage de Point
+    # Gemini
+    "genai": ("google", "genai"),                                # IA Gemini
+    # TensorFlow / Keras
+    "tf": ("tensorflow", None),
+    "resnet50": ("tensorflow.keras.applications", "resnet50"),  # Modèle ResNet50 pour features
+    "image": ("tensorflow.keras.preprocessing", "image"),       # Prétraitement des images
+    # Scikit-learn
+    "KNeighborsClassifier": ("sklearn.neighbors", "KNeighborsClassifier"),    # KNN pour classification
+    "RandomForestClassifier": ("sklearn.ensemble", "RandomForestClassifier"),  # Random Forest
+    # Transformers / BLIP / HF
+    "torch": ("torch", None),                                    # PyTorch requis pour Hugging Face
+    "BlipProcessor": ("transformers", "BlipProcessor"),
+    "BlipForConditionalGeneration": ("transformers", "BlipForConditionalGeneration"),
+    "pipeline": ("transformers", "pipeline"),                    # Pour génération de texte / JSON
+    # Utilitaires
+    "requests": ("requests", None),                              # Pour appeler une API externe (Gemini Pro)
+    "tqdm": ("tqdm", "tqdm"),                                    # Barres de progression
+    # API & Scrapping
+    "BeautifulSoup": ("bs4", "BeautifulSoup"),
+}
 
-import base64
-from bs4 import BeautifulSoup
\ No newline at end of file
+
+def __getattr__(name):
+    """Import à la demande des dépendances lourdes (PEP 562)."""
+    if name not in LAZY_IMPORTS:
+        raise AttributeError(f"module 'Config' has no attribute {name!r}")
+    module_name, attr = LAZY_IMPORTS[name]
+    module = importlib.import_module(module_name)
+    if attr is None:
+        value = module
+    else:
+        try:
+            value = getattr(module, attr)
+        except AttributeError:
+            value = importlib.import_module(f"{module_name}.{attr}")  # Sous-module (PIL.Image, google.genai...)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(LAZY_IMPORTS))
@@ -0,0 +1,149 @@
+# Crawler.py
+# Couche de téléchargement partagée par les scrapers (Mango, Nike) :
+# session HTTP keep-alive, limiteur de débit par hôte et backoff adaptatif.
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Codes HTTP qui déclenchent un nouvel essai avec backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Seau à jetons : au plus `rate` requêtes par seconde, rafales de `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à obtention d'un jeton."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Suspend l'hôte entier (tous les workers) pendant `seconds`."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.updated = max(self.updated, self.paused_until)
+
+
+class PoliteFetcher:
+    """Session HTTP poolée + plafond de débit par hôte + backoff sur 429/5xx."""
+
+    def __init__(self, headers=None, workers=8, max_rps_per_host=2.0, burst=2,
+                 max_retries=4, backoff_base=1.0, backoff_max=60.0, timeout=15,
+                 max_rps_total=None):
+        self.workers = max(1, int(workers))
+        self.max_rps_per_host = max_rps_per_host
+        self.burst = burst
+        # Budget global optionnel, tous hôtes confondus (ex: www.nike.com + api.nike.com)
+        self.global_bucket = TokenBucket(max_rps_total, burst) if max_rps_total else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+
+    def _bucket(self, url):
+        """Seau de l'hôte de `url` (None si aucun plafond par hôte)."""
+        if not self.max_rps_per_host:
+            return None
+        host = urlparse(url).netloc
+        with self._buckets_lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.max_rps_per_host, self.burst)
+            return self._buckets[host]
+
+    def _retry_delay(self, response, attempt):
+        """Délai avant nouvel essai : Retry-After si fourni, sinon exponentiel + jitter."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                try:
+                    delta = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(self.backoff_max, max(0.0, delta))
+                except (TypeError, ValueError):
+                    pass
+        delay = self.backoff_base * (2 ** attempt)
+        return min(self.backoff_max, delay * random.uniform(0.5, 1.5))
+
+    def get(self, url, timeout=None, **kwargs):
+        """GET poli : respecte le plafond de l'hôte et réessaie sur 429/5xx/erreurs réseau."""
+        bucket = self._bucket(url)
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if self.global_bucket:
+                self.global_bucket.acquire()
+            if bucket:
+                bucket.acquire()
+            try:
+                response = self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+            except requests.exceptions.RequestException:
+                if attempt == self.max_retries:
+                    raise
+                self._backoff(bucket, self._retry_delay(None, attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            # L'hôte sature : on ralentit tous les workers, pas seulement celui-ci
+            self._backoff(bucket, self._retry_delay(response, attempt))
+        return response
+
+    def _backoff(self, bucket, delay):
+        if bucket:
+            bucket.pause(delay)
+        else:
+            time.sleep(delay)
+
+    def map(self, fn, items):
+        """Applique `fn` en parallèle (borné par `workers`) en conservant l'ordre."""
+        return list(self.imap(fn, items))
+
+    def imap(self, fn, items):
+        """Comme `map`, mais renvoie chaque résultat (dans l'ordre) dès qu'il est prêt."""
+        items = list(items)
+        if self.workers == 1 or len(items) <= 1:
+            for item in items:
+                yield fn(item)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            yield from pool.map(fn, items)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,123 @@
+# Dedup.py
+# Détection des quasi-doublons du catalogue fusionné (variantes de couleur Mango,
+# coloris Nike d'un même modèle, même article listé par deux sources...).
+# - signature MinHash des "shingles" (paires de mots) de name + description + color ;
+# - LSH par bandes : seuls les produits qui partagent une bande sont comparés,
+#   le coût reste quasi linéaire au lieu de quadratique ;
+# - les paires confirmées (similarité estimée >= seuil) sont regroupées en familles
+#   (union-find), chaque famille est réduite à une fiche canonique + ses variantes.
+# Les familles ne mélangent jamais genres ni catégories : un même modèle vendu en
+# Homme et en Femme reste sélectionnable des deux côtés.
+
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Champs gardés pour chaque variante rattachée à la fiche canonique
+VARIANT_FIELDS = ["url", "color", "brand_source", "image", "price_value", "sizes"]
+FAMILY_FIELDS = ("family_size", "variants")
+
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFKD", str(text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", text).split()
+
+
+def shingles(record):
+    words = normalize_text(" ".join(str(record.get(f) or "") for f in ("name", "description", "color")))
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class MinHashLSH:
+    """Signatures MinHash (num_perm permutations) découpées en `bands` bandes pour le LSH."""
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.7, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        rng = np.random.RandomState(seed)
+        # dtype explicite : l'entier par défaut de numpy est 32 bits sous Windows (borne 1 << 32 refusée)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+    def signature(self, tokens):
+        if not tokens:
+            return np.full(len(self.a), _MAX_HASH, dtype=np.uint64)
+        hv = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+        return (((np.outer(hv, self.a) + self.b) % _PRIME) & _MAX_HASH).min(axis=0)
+
+    def similarity(self, sig_a, sig_b):
+        return float(np.mean(sig_a == sig_b))
+
+    def families(self, records, block=None, max_checks=8):
+        """
+        Liste des familles (listes d'indices, dans l'ordre d'origine). `block(record)` limite
+        les comparaisons aux produits du même bloc (ex. même genre et même catégorie).
+        """
+        signatures = [self.signature(shingles(r)) for r in records]
+        parent = list(range(len(records)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets = {}
+        for i, sig in enumerate(signatures):
+            key = block(records[i]) if block else None
+            for band in range(self.bands):
+                chunk = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+                buckets.setdefault((key, band, chunk), []).append(i)
+
+        for members in buckets.values():
+            for pos in range(1, len(members)):
+                i = members[pos]
+                # Quelques vérifications suffisent : les membres déjà reliés partagent leur racine
+                for j in members[max(0, pos - max_checks):pos]:
+                    if find(i) == find(j):
+                        break
+                    if self.similarity(signatures[i], signatures[j]) >= self.threshold:
+                        parent[find(i)] = find(j)
+                        break
+
+        groups = {}
+        for i in range(len(records)):
+            groups.setdefault(find(i), []).append(i)
+        return sorted(groups.values(), key=lambda g: g[0])
+
+
+def _completeness(record):
+    return (len(record.get("description") or ""), len(record.get("sizes") or []), record.get("rating") is not None)
+
+
+def collapse_families(records, lsh=None, block=None):
+    """
+    Réduit chaque famille de quasi-doublons à sa fiche la plus complète, enrichie de
+    `family_size` et `variants` (url, couleur, source... des autres membres).
+    Les fiches isolées sont rendues telles quelles. L'ordre d'origine est conservé.
+    """
+    lsh = lsh or MinHashLSH()
+    # Une fiche reprise d'un run précédent peut déjà porter ses anciennes variantes
+    records = [{k: v for k, v in r.items() if k not in FAMILY_FIELDS} for r in records]
+    out = []
+    for members in lsh.families(records, block=block):
+        if len(members) == 1:
+            out.append(records[members[0]])
+            continue
+        best = max(members, key=lambda i: (_completeness(records[i]), -i))
+        canonical = dict(records[best])
+        canonical["family_size"] = len(members)
+        canonical["variants"] = [{f: records[i].get(f) for f in VARIANT_FIELDS} for i in members if i != best]
+        out.append(canonical)
+    return out
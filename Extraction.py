@@ -0,0 +1,137 @@
+# Extraction.py
+# Chemin rapide d'extraction : lit directement les données structurées embarquées
+# dans les pages produit (JSON-LD schema.org, JSON d'hydratation __NEXT_DATA__)
+# au lieu de parcourir tout l'arbre BeautifulSoup. Les scrapers gardent leur
+# extraction "soup" en secours, champ par champ, et comptent ces replis.
+
+import json
+import re
+import threading
+
+_JSON_LD_RE = re.compile(r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I)
+_NEXT_DATA_RE = re.compile(r'<script[^>]+id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S | re.I)
+
+
+class FieldStats:
+    """Compteurs par champ : extraits par le chemin rapide ou par le repli BeautifulSoup."""
+
+    def __init__(self):
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, field, fast):
+        with self.lock:
+            entry = self.counts.setdefault(field, {"fast": 0, "fallback": 0})
+            entry["fast" if fast else "fallback"] += 1
+
+    def report(self):
+        lines = ["Extraction (chemin rapide / repli soup) :"]
+        for field, c in sorted(self.counts.items()):
+            total = c["fast"] + c["fallback"]
+            ratio = c["fallback"] / total * 100 if total else 0
+            lines.append(f"  ∟ {field:<12} rapide: {c['fast']:<5} repli: {c['fallback']:<5} ({ratio:.0f}% repli)")
+        return "\n".join(lines)
+
+
+def _loads(raw):
+    try:
+        return json.loads(raw.strip())
+    except (ValueError, AttributeError):
+        return None
+
+
+def _as_list(value):
+    if value is None: return []
+    return value if isinstance(value, list) else [value]
+
+
+def _types(obj):
+    return {str(t) for t in _as_list(obj.get("@type"))}
+
+
+def json_ld_objects(html):
+    """Tous les objets JSON-LD de la page (les @graph sont aplatis)."""
+    objects = []
+    for m in _JSON_LD_RE.finditer(html):
+        data = _loads(m.group(1))
+        for obj in _as_list(data):
+            if isinstance(obj, dict):
+                objects.append(obj)
+                objects.extend(o for o in _as_list(obj.get("@graph")) if isinstance(o, dict))
+    return objects
+
+
+def next_data(html):
+    """JSON d'hydratation Next.js (__NEXT_DATA__), ou None."""
+    m = _NEXT_DATA_RE.search(html)
+    return _loads(m.group(1)) if m else None
+
+
+def find_key(obj, key):
+    """Première valeur associée à `key` dans une structure JSON imbriquée (parcours en profondeur)."""
+    stack = [obj]
+    while stack:
+        cur = stack.pop()
+        if isinstance(cur, dict):
+            if key in cur:
+                return cur[key]
+            stack.extend(reversed(list(cur.values())))
+        elif isinstance(cur, list):
+            stack.extend(reversed(cur))
+    return None
+
+
+def _to_float(value):
+    if value is None: return None
+    try:
+        return float(str(value).replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _is_available(offer):
+    availability = str((offer or {}).get("availability", ""))
+    return "InStock" in availability or "LimitedAvailability" in availability
+
+
+def product_from_json_ld(html):
+    """
+    Champs produit lus dans le JSON-LD schema.org (Product / ProductGroup).
+    Renvoie un dict ne contenant que les champs trouvés :
+    name, price, currency, color, description, image, rating, sizes [{"size", "available"}].
+    """
+    fields = {}
+    for obj in json_ld_objects(html):
+        types = _types(obj)
+        if not types & {"Product", "ProductGroup"}:
+            continue
+
+        if obj.get("name"): fields.setdefault("name", str(obj["name"]).strip())
+        if obj.get("description"): fields.setdefault("description", str(obj["description"]).strip())
+        if obj.get("color"): fields.setdefault("color", str(obj["color"]).strip())
+
+        image = _as_list(obj.get("image"))
+        if image:
+            first = image[0]
+            fields.setdefault("image", first.get("url") if isinstance(first, dict) else first)
+
+        rating = _to_float((obj.get("aggregateRating") or {}).get("ratingValue"))
+        if rating is not None: fields.setdefault("rating", rating)
+
+        offers = [o for o in _as_list(obj.get("offers")) if isinstance(o, dict)]
+        for offer in offers:
+            price = _to_float(offer.get("price") or offer.get("lowPrice"))
+            if price is not None:
+                fields.setdefault("price", price)
+                if offer.get("priceCurrency"): fields.setdefault("currency", offer["priceCurrency"])
+                break
+
+        # Variantes de taille (ProductGroup.hasVariant[].size + disponibilité de l'offre)
+        sizes = []
+        for variant in _as_list(obj.get("hasVariant")):
+            if not isinstance(variant, dict) or not variant.get("size"):
+                continue
+            variant_offer = next(iter(_as_list(variant.get("offers"))), None)
+            sizes.append({"size": str(variant["size"]).strip(), "available": _is_available(variant_offer)})
+        if sizes: fields.setdefault("sizes", sizes)
+    return fields
@@ -0,0 +1,145 @@
+# Fixtures.py
+# Enregistrement / rejeu des réponses HTTP des scrapers.
+# - mode "record" : chaque réponse réelle est archivée (URL, statut, en-têtes, corps)
+#   dans une archive zip compressée ;
+# - mode "replay" : les requêtes sont servies depuis l'archive par un adaptateur
+#   requests, sans aucun accès réseau.
+# Permet de mesurer les parsers et de détecter des régressions hors ligne.
+
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from io import BytesIO
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_ARCHIVE = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Fixtures\pages.zip"
+
+
+def _entry_name(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+class FixtureArchive:
+    """Archive zip (deflate) : <sha1(url)>.json pour les métadonnées, <sha1(url)>.body pour le corps."""
+
+    def __init__(self, path, mode="r"):
+        self.path = path
+        self.lock = threading.Lock()
+        if mode == "w":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.zip = zipfile.ZipFile(path, "a" if os.path.exists(path) else "w", zipfile.ZIP_DEFLATED, compresslevel=9)
+        else:
+            self.zip = zipfile.ZipFile(path, "r")
+        self.names = set(self.zip.namelist())
+
+    def add(self, url, status, headers, body):
+        name = _entry_name(url)
+        meta = {"url": url, "status": status, "headers": dict(headers)}
+        with self.lock:
+            if name + ".json" in self.names:
+                return  # Première capture conservée
+            self.zip.writestr(name + ".json", json.dumps(meta, ensure_ascii=False))
+            self.zip.writestr(name + ".body", body)
+            self.names.add(name + ".json")
+
+    def get(self, url):
+        """(métadonnées, corps) archivés pour `url`, ou None."""
+        name = _entry_name(url)
+        if name + ".json" not in self.names:
+            return None
+        with self.lock:
+            meta = json.loads(self.zip.read(name + ".json"))
+            body = self.zip.read(name + ".body")
+        return meta, body
+
+    def urls(self):
+        """Toutes les URLs archivées."""
+        with self.lock:
+            return [json.loads(self.zip.read(n))["url"] for n in sorted(self.names) if n.endswith(".json")]
+
+    def close(self):
+        with self.lock:
+            self.zip.close()
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Adaptateur HTTP normal qui archive au passage chaque réponse reçue."""
+
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # Les 304 dépendent du cache local : on n'archive que des réponses complètes
+        if response.status_code != 304:
+            self.archive.add(request.url, response.status_code, response.headers, response.content)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Sert les requêtes depuis l'archive ; 404 si l'URL n'a jamais été enregistrée."""
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+        self.misses = []
+
+    def send(self, request, **kwargs):
+        entry = self.archive.get(request.url)
+        response = Response()
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        if entry is None:
+            self.misses.append(request.url)
+            response.status_code = 404
+            response.headers = CaseInsensitiveDict()
+            response.raw = BytesIO(b"")
+            return response
+
+        meta, body = entry
+        headers = CaseInsensitiveDict(meta["headers"])
+        headers.pop("Content-Encoding", None)  # Corps déjà décompressé à l'enregistrement
+
+        # Requête conditionnelle : même ETag que l'archive -> 304 (utile pour mesurer HttpCache)
+        etag = headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            response.status_code = 304
+            response.headers = headers
+            response.raw = BytesIO(b"")
+            return response
+
+        response.status_code = meta["status"]
+        response.headers = headers
+        response.raw = BytesIO(body)
+        return response
+
+    def close(self):
+        pass
+
+
+def install(fetcher, mode, archive_path=DEFAULT_ARCHIVE):
+    """
+    Branche l'enregistrement ("record") ou le rejeu ("replay") sur la session
+    d'un PoliteFetcher. Renvoie l'archive ouverte (à fermer en fin de run).
+    """
+    if mode == "record":
+        archive = FixtureArchive(archive_path, "w")
+        adapter = RecordingAdapter(archive, pool_maxsize=fetcher.workers)
+    elif mode == "replay":
+        archive = FixtureArchive(archive_path, "r")
+        adapter = ReplayAdapter(archive)
+        # Pas de politesse à respecter hors ligne
+        fetcher.max_rps_per_host = None
+        fetcher.global_bucket = None
+    else:
+        raise ValueError(f"Mode de fixtures inconnu : {mode}")
+    fetcher.session.mount("http://", adapter)
+    fetcher.session.mount("https://", adapter)
+    return archive
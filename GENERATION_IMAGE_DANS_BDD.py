@@ -1,28 +1,131 @@
+import argparse
 import json
 import random
 import os
+from array import array
+import numpy as np
 import requests
-from PIL import Image
 from io import BytesIO
 
 # Import de ta config personnalisée (Clé API et Chemins)
 import Config 
+from Catalog import ColumnarCatalog, SqliteCatalog, columnar_path, current_version, sqlite_path
+from Crawler import PoliteFetcher
+from LookCache import LookCache, look_key
+from Scoring import OutfitScorer
+
+DB_PATH = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result\SmartWear_DB.json"
+
+# Générateur d'images : {prompt} est remplacé par le prompt encodé, {model}/{width}/{height}
+# par IMAGE_PARAMS (modifiable pour un serveur local de test)
+IMAGE_ENDPOINT = "https://image.pollinations.ai/prompt/{prompt}?width={width}&height={height}&model={model}&nologo=true"
+IMAGE_PARAMS = {"model": "flux", "width": 1024, "height": 1024}
+# Valeurs par défaut d'un jeu de préférences du mode batch (toutes les clés lues par le filtre et le prompt)
+DEFAULT_PREFS = {"mode": "1", "genre": "Homme", "age": "25", "style": "Décontracté", "season": "Été",
+                 "location": "Rue de Paris"}
+IMAGE_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+
+# Catégories de chaque emplacement de la tenue
+SLOT_CATEGORIES = {
+    "top": ['Hauts', 'Manteaux/Vestes'],
+    "bottom": ['Bas', 'Robes/Ensembles'],
+    "shoes": ['Chaussures'],
+}
+# Emplacements remplis selon le mode choisi
+MODE_SLOTS = {"1": ["top", "bottom", "shoes"], "2": ["top"], "3": ["bottom"], "4": ["shoes"]}
+
+def validate_prefs(entry):
+    """
+    Jeu de préférences du mode batch complété par DEFAULT_PREFS : (prefs, None),
+    ou (None, raison) si l'entrée est inutilisable.
+    """
+    if not isinstance(entry, dict):
+        return None, f"entrée {type(entry).__name__} au lieu d'un objet JSON"
+    prefs = dict(DEFAULT_PREFS)
+    for key, value in entry.items():
+        if value is None:
+            continue  # Clé explicitement vide : valeur par défaut
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return None, f"'{key}' doit être un texte"
+        prefs[key] = str(value).strip() or DEFAULT_PREFS.get(key, "")
+    if prefs["mode"] not in MODE_SLOTS:
+        return None, f"mode '{prefs['mode']}' inconnu (attendu : {', '.join(MODE_SLOTS)})"
+    return prefs, None
+
 
 class SmartWearVisualizer:
-    def __init__(self):
+    def __init__(self, use_cache=True, db_path=DB_PATH, look_cache=None):
         # On garde l'accès Gemini pour des évolutions futures, 
         # mais on utilise un moteur d'image robuste pour éviter l'erreur 404
-        self.db_path = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result\SmartWear_DB.json"
+        self.db_path = db_path
+        self.image_endpoint = IMAGE_ENDPOINT
+        self.image_params = dict(IMAGE_PARAMS)
+        # Cache des images générées, par prompt (LookCache.py), éventuellement partagé
+        self.look_cache = look_cache or (LookCache() if use_cache else None)
+        # Notation des tenues complètes (select_best)
+        self.scorer = OutfitScorer()
+        self.catalog = None
+        self.sqlite = None
         self.products = self._load_db()
+        self._build_facets()
+
+    def _is_fresh(self, copy_path):
+        """La copie existe et n'est pas plus ancienne que le JSON (sinon elle décrit un ancien catalogue)."""
+        if not copy_path or not os.path.exists(copy_path):
+            return False
+        return not os.path.exists(self.db_path) or os.path.getmtime(copy_path) >= os.path.getmtime(self.db_path)
 
     def _load_db(self):
-        """Chargement de la base de données normalisée."""
+        """Chargement de la base de données normalisée (catalogue SQLite ou copie colonnaire si le pipeline les a produits)."""
+        # Version courante de chaque copie, résolue une fois : le catalogue ouvert est celui qui a été vérifié
+        sqlite_version = current_version(sqlite_path(self.db_path))
+        if self._is_fresh(sqlite_version):
+            self.sqlite = SqliteCatalog(sqlite_version)
+            return []
+        columnar_version = current_version(columnar_path(self.db_path))
+        if columnar_version and self._is_fresh(os.path.join(columnar_version, "meta.json")):
+            self.catalog = ColumnarCatalog(columnar_version)
+            return []
         if os.path.exists(self.db_path):
             with open(self.db_path, "r", encoding="utf-8") as f:
                 return json.load(f)
         print(f"❌ Erreur : Base de données introuvable à {self.db_path}")
         return []
 
+    def close_catalog(self):
+        """Ferme la copie colonnaire / la connexion SQLite (le cache des looks, partageable, reste ouvert)."""
+        if self.catalog is not None:
+            self.catalog.close()
+        if self.sqlite is not None:
+            self.sqlite.close()
+
+    def _build_facets(self):
+        """
+        Index des facettes, construit une fois au chargement :
+        facets[genre][style][saison][emplacement] -> ids des produits (minuscules, comme le filtre).
+        genre_facets[genre][emplacement] sert la recherche élargie. Emplacement None = hors tenue.
+        """
+        slot_of = {cat: slot for slot, cats in SLOT_CATEGORIES.items() for cat in cats}
+        self.facets = {}
+        self.genre_facets = {}
+        for i, p in enumerate(self.products):
+            genre, slot = p['genre_clean'].lower(), slot_of.get(p['main_category'])
+            seasons = self.facets.setdefault(genre, {}).setdefault(p['style'].lower(), {})
+            seasons.setdefault(p['season'].lower(), {}).setdefault(slot, array('i')).append(i)
+            self.genre_facets.setdefault(genre, {}).setdefault(slot, array('i')).append(i)
+
+    def _pick(self, buckets, slot):
+        """Produit tiré uniformément dans l'union des `buckets` pour cet emplacement."""
+        ids = [b[slot] for b in buckets if slot in b]
+        total = sum(len(b) for b in ids)
+        if not total:
+            return None
+        r = random.randrange(total)
+        for b in ids:
+            if r < len(b):
+                return self.products[b[r]]
+            r -= len(b)
+
     def get_user_inputs(self):
         """Interface utilisateur dans le terminal."""
         print("\n" + "="*40)
@@ -46,42 +149,111 @@ class SmartWearVisualizer:
             "location": lieu
         }
 
-    def select_items(self, prefs):
-        """Sélection intelligente basée sur tes tags IA."""
-        # Filtrage flexible (Saison demandée OU Toutes saisons)
-        pool = [
-            p for p in self.products 
-            if p['genre_clean'].lower() == prefs['genre'].lower() 
-            and p['style'].lower() == prefs['style'].lower()
-            and (prefs['season'].lower() in p['season'].lower() or "toutes" in p['season'].lower())
-        ]
+    def _columnar_slot_rows(self, prefs):
+        """Lignes candidates de chaque emplacement, par masques sur les codes de la copie colonnaire."""
+        cat = self.catalog
+        genre = cat.mask('genre_clean', lambda g: (g or "").lower() == prefs['genre'].lower())
+        pool = (genre
+                & cat.mask('style', lambda s: (s or "").lower() == prefs['style'].lower())
+                & cat.mask('season', lambda s: prefs['season'].lower() in (s or "").lower() or "toutes" in (s or "").lower()))
 
-        # Sécurité : Si aucun article avec ce style précis, on élargit un peu
-        if not pool:
+        if not pool.any():
             print(f"⚠️ Aucun article '{prefs['style']}' trouvé pour cette saison. Recherche élargie...")
-            pool = [p for p in self.products if p['genre_clean'].lower() == prefs['genre'].lower()]
+            pool = genre
 
-        hauts = [p for p in pool if p['main_category'] in ['Hauts', 'Manteaux/Vestes']]
-        bas = [p for p in pool if p['main_category'] in ['Bas', 'Robes/Ensembles']]
-        shoes = [p for p in pool if p['main_category'] == 'Chaussures']
+        return {slot: np.flatnonzero(pool & cat.mask('main_category', lambda c: c in SLOT_CATEGORIES[slot]))
+                for slot in MODE_SLOTS.get(prefs['mode'], [])}
 
+    def _select_columnar(self, prefs):
+        """Même sélection que select_items, par masques sur les codes : seules les fiches tirées sont décodées."""
         selection = {"top": None, "bottom": None, "shoes": None}
+        for slot, rows in self._columnar_slot_rows(prefs).items():
+            selection[slot] = self.catalog.row(random.choice(rows)) if len(rows) else None
+        return selection
+
+    def _sqlite_slot_filters(self, prefs):
+        """Filtre des facettes (minuscules) de chaque emplacement pour le catalogue SQLite."""
+        genre, style, season = prefs['genre'].lower(), prefs['style'].lower(), prefs['season'].lower()
+
+        def in_pool(g, s, se, cat):
+            return g == genre and s == style and (season in se or "toutes" in se)
+
+        if not self.sqlite.count(in_pool):
+            print(f"⚠️ Aucun article '{prefs['style']}' trouvé pour cette saison. Recherche élargie...")
+            in_pool = lambda g, s, se, cat: g == genre
+
+        def slot_filter(slot):
+            categories = [c.lower() for c in SLOT_CATEGORIES[slot]]
+            return lambda g, s, se, cat: in_pool(g, s, se, cat) and cat in categories
 
-        if prefs['mode'] == "1":
-            selection["top"] = random.choice(hauts) if hauts else None
-            selection["bottom"] = random.choice(bas) if bas else None
-            selection["shoes"] = random.choice(shoes) if shoes else None
-        elif prefs['mode'] == "2": selection["top"] = random.choice(hauts) if hauts else None
-        elif prefs['mode'] == "3": selection["bottom"] = random.choice(bas) if bas else None
-        elif prefs['mode'] == "4": selection["shoes"] = random.choice(shoes) if shoes else None
+        return {slot: slot_filter(slot) for slot in MODE_SLOTS.get(prefs['mode'], [])}
 
+    def _select_sqlite(self, prefs):
+        """Même sélection via l'index SQLite : un tirage = une recherche (facettes, position)."""
+        selection = {"top": None, "bottom": None, "shoes": None}
+        for slot, keep in self._sqlite_slot_filters(prefs).items():
+            selection[slot] = self.sqlite.pick(keep)
         return selection
 
-    def generate_and_show(self):
-        """Génère l'image et affiche les liens réels du catalogue."""
-        prefs = self.get_user_inputs()
-        outfit = self.select_items(prefs)
+    def _facet_buckets(self, prefs):
+        """Buckets de l'index des facettes correspondant aux préférences (recherche élargie si vide)."""
+        # Filtrage flexible (Saison demandée OU Toutes saisons), servi par l'index des facettes
+        genre, season = prefs['genre'].lower(), prefs['season'].lower()
+        by_season = self.facets.get(genre, {}).get(prefs['style'].lower(), {})
+        buckets = [b for se, b in by_season.items() if season in se or "toutes" in se]
+
+        # Sécurité : Si aucun article avec ce style précis, on élargit un peu
+        if not buckets:
+            print(f"⚠️ Aucun article '{prefs['style']}' trouvé pour cette saison. Recherche élargie...")
+            buckets = [self.genre_facets.get(genre, {})]
+        return buckets
+
+    def select_items(self, prefs):
+        """Sélection intelligente basée sur tes tags IA."""
+        if self.sqlite is not None:
+            return self._select_sqlite(prefs)
+        if self.catalog is not None:
+            return self._select_columnar(prefs)
+
+        buckets = self._facet_buckets(prefs)
+        selection = {"top": None, "bottom": None, "shoes": None}
+        for slot in MODE_SLOTS.get(prefs['mode'], []):
+            selection[slot] = self._pick(buckets, slot)
+
+        return selection
+
+    def slot_candidates(self, prefs, limit=200):
+        """Jusqu'à `limit` articles distincts, tirés au hasard, pour chaque emplacement du mode demandé."""
+        if self.sqlite is not None:
+            candidates = {}
+            for slot, keep in self._sqlite_slot_filters(prefs).items():
+                # Tirages avec remise dans l'index, dédoublonnés
+                drawn = (self.sqlite.pick(keep) for _ in range(min(limit, self.sqlite.count(keep))))
+                candidates[slot] = list({(p['url'], p['genre_clean'], p['type']): p for p in drawn}.values())
+            return candidates
+        if self.catalog is not None:
+            return {slot: [self.catalog.row(int(i)) for i in (rows if len(rows) <= limit else np.random.choice(rows, limit, replace=False))]
+                    for slot, rows in self._columnar_slot_rows(prefs).items()}
+
+        buckets = self._facet_buckets(prefs)
+        candidates = {}
+        for slot in MODE_SLOTS.get(prefs['mode'], []):
+            ids = [i for b in buckets if slot in b for i in b[slot]]
+            candidates[slot] = [self.products[i] for i in (ids if len(ids) <= limit else random.sample(ids, limit))]
+        return candidates
+
+    def select_best(self, prefs, k=5, limit=200, budget_s=0.05):
+        """
+        Les k tenues les plus cohérentes (couleurs, style, saison, marque, prix) parmi
+        les candidats de chaque emplacement, notées en bloc par Scoring.OutfitScorer.
+        """
+        outfits, _ = self.scorer.top_k(self.slot_candidates(prefs, limit), k=k,
+                                       target_style=prefs['style'], budget_s=budget_s)
+        return [(score, {"top": o.get("top"), "bottom": o.get("bottom"), "shoes": o.get("shoes")})
+                for score, o in outfits]
 
+    def build_prompt(self, prefs, outfit):
+        """Prompt de génération et liens des articles choisis ; prompt None si rien n'a été trouvé."""
         desc_parts = []
         links = []
 
@@ -97,8 +269,7 @@ class SmartWearVisualizer:
             links.append(f"👟 CHAUSSURES ({outfit['shoes']['brand_source']}): {outfit['shoes']['url']}")
 
         if not desc_parts:
-            print("❌ Désolé, aucun article correspondant n'a été trouvé.")
-            return
+            return None, links
 
         # Construction du Prompt pour Stable Diffusion XL
         clothing_desc = " and ".join(desc_parts)
@@ -108,17 +279,51 @@ class SmartWearVisualizer:
             f"wearing {clothing_desc}. Standing in {prefs['location']}. "
             f"Cinematic lighting, 8k, highly detailed face and fabric, photorealistic."
         )
+        return raw_prompt, links
 
-        print("\n🚀 Génération de l'image SmartWear...")
-        
+    def image_url(self, raw_prompt):
         # Encodage de l'URL pour la génération
-        encoded_prompt = requests.utils.quote(raw_prompt)
-        image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1024&height=1024&model=flux&nologo=true"
+        return self.image_endpoint.format(prompt=requests.utils.quote(raw_prompt), **self.image_params)
+
+    def cache_key(self, raw_prompt):
+        return look_key(raw_prompt, self.image_params, self.image_endpoint)
+
+    def fetch_look(self, raw_prompt, get=None, timeout=30):
+        """
+        Image du look pour ce prompt : (octets bruts, statut HTTP, extension, depuis_le_cache).
+        `get` permet de passer une session partagée (PoliteFetcher.get) ; sinon requests.get.
+        """
+        key = self.cache_key(raw_prompt)
+        cached = self.look_cache.get(key) if self.look_cache else None
+        if cached:
+            with open(cached, "rb") as f:
+                return f.read(), 200, os.path.splitext(cached)[1][1:], True
+        response = (get or requests.get)(self.image_url(raw_prompt), timeout=timeout)
+        ext = IMAGE_EXTENSIONS.get(response.headers.get("Content-Type", "").split(";")[0].strip(), "png")
+        if response.status_code == 200 and self.look_cache:
+            self.look_cache.put(key, response.content, ext)
+        return response.content, response.status_code, ext, False
+
+    def generate_and_show(self):
+        """Génère l'image et affiche les liens réels du catalogue."""
+        prefs = self.get_user_inputs()
+        outfit = self.select_items(prefs)
+        raw_prompt, links = self.build_prompt(prefs, outfit)
+
+        if raw_prompt is None:
+            print("❌ Désolé, aucun article correspondant n'a été trouvé.")
+            return
+
+        print("\n🚀 Génération de l'image SmartWear...")
 
         try:
-            response = requests.get(image_url, timeout=30)
-            if response.status_code == 200:
-                img = Image.open(BytesIO(response.content))
+            body, status, _, from_cache = self.fetch_look(raw_prompt)
+            if from_cache:
+                print("♻️ Look déjà généré : image reprise du cache.")
+            if status == 200:
+                from PIL import Image  # Seulement pour l'affichage : pas d'import au démarrage
+
+                img = Image.open(BytesIO(body))
                 img.show() # Ouvre l'image avec la visionneuse Windows
                 
                 # Sauvegarde automatique
@@ -126,9 +331,11 @@ class SmartWearVisualizer:
                 img.save(save_path)
                 print(f"✅ Image enregistrée : {save_path}")
             else:
-                print(f"❌ Erreur serveur image (Code: {response.status_code})")
+                print(f"❌ Erreur serveur image (Code: {status})")
         except Exception as e:
             print(f"❌ Erreur technique : {e}")
+        if self.look_cache:
+            self.look_cache.print_report()
 
         # Affichage des liens réels
         print("\n" + "-"*50)
@@ -138,6 +345,124 @@ class SmartWearVisualizer:
             print(link)
         print("-"*50 + "\n")
 
+    def generate_batch(self, prefs_list, out_dir, workers=8, max_rps=None, timeout=120, best=False):
+        """
+        Mode non interactif : une tenue par jeu de préférences, images générées en parallèle
+        (session poolée, au plus `workers` requêtes en vol), puis manifest.json des looks.
+        `best` : tenue la mieux notée (select_best) au lieu d'un tirage aléatoire.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        looks = []
+        for i, entry in enumerate(prefs_list):
+            prefs, error = validate_prefs(entry)
+            if error:
+                # Entrée invalide : marquée en échec dans le manifest, le reste du lot continue
+                print(f"  ∟ ⚠️ Look {i} : {error}")
+                looks.append({"index": i, "prefs": entry, "prompt": None, "products": {}, "image": None,
+                              "status": f"invalide : {error}"})
+                continue
+            if best:
+                ranked = self.select_best(prefs, k=1)
+                outfit = ranked[0][1] if ranked else {"top": None, "bottom": None, "shoes": None}
+            else:
+                outfit = self.select_items(prefs)
+            raw_prompt, _ = self.build_prompt(prefs, outfit)
+            looks.append({
+                "index": i,
+                "prefs": prefs,
+                "prompt": raw_prompt,
+                "products": {slot: {"url": p['url'], "name": p['name'], "brand_source": p['brand_source']}
+                             for slot, p in outfit.items() if p},
+                "image": None,
+                "status": None,
+            })
+
+        # Un seul appel au générateur par prompt distinct ; les prompts déjà en cache n'en font aucun
+        by_key = {}
+        for look in looks:
+            if look["prompt"]:
+                by_key.setdefault(self.cache_key(look["prompt"]), []).append(look)
+        cached = {key: self.look_cache.get(key) for key in by_key} if self.look_cache else {}
+        todo = [key for key in by_key if not cached.get(key)]
+        requested = sum(map(len, by_key.values()))
+        invalid = sum(1 for look in looks if look["status"])
+        print(f"🚀 {len(by_key)} looks distincts ({requested} demandés, {invalid} invalides, "
+              f"{len(looks) - requested - invalid} sans article), {len(by_key) - len(todo)} en cache, "
+              f"{len(todo)} à générer avec {workers} en parallèle...")
+        fetcher = PoliteFetcher(workers=workers, max_rps_per_host=max_rps, timeout=timeout)
+
+        def fetch(key):
+            try:
+                response = fetcher.get(self.image_url(by_key[key][0]["prompt"]))
+                return key, response.status_code, response.headers.get("Content-Type", ""), response.content
+            except requests.exceptions.RequestException as e:
+                return key, f"erreur : {e}", "", None
+
+        def save(look, body, ext):
+            # Octets bruts du générateur, sans ré-encodage
+            path = os.path.join(out_dir, f"look_{look['index']:05d}.{ext}")
+            with open(path, "wb") as f:
+                f.write(body)
+            look["image"] = path
+
+        ok = 0
+        for key, path in cached.items():
+            if path:
+                with open(path, "rb") as f:
+                    body = f.read()
+                for look in by_key[key]:
+                    look["status"] = "cache"
+                    save(look, body, os.path.splitext(path)[1][1:])
+                    ok += 1
+        for key, status, content_type, body in fetcher.imap(fetch, todo):
+            ext = IMAGE_EXTENSIONS.get(content_type.split(";")[0].strip(), "png")
+            if status == 200 and body and self.look_cache:
+                self.look_cache.put(key, body, ext)
+            for look in by_key[key]:
+                look["status"] = status
+                if status == 200 and body:
+                    save(look, body, ext)
+                    ok += 1
+                else:
+                    print(f"  ∟ ⚠️ Look {look['index']} : {status}")
+        fetcher.close()
+
+        manifest_path = os.path.join(out_dir, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(looks, f, indent=4, ensure_ascii=False)
+        print(f"✅ {ok}/{requested} images. Manifest : {manifest_path}")
+        if self.look_cache:
+            self.look_cache.print_report()
+        return looks
+
+
+def load_prefs(path):
+    """Jeux de préférences : liste JSON ou un objet JSON par ligne (JSONL)."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
 if __name__ == "__main__":
-    app = SmartWearVisualizer()
-    app.generate_and_show()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Studio photo SmartWear")
+    parser.add_argument("--batch", help="Fichier de préférences (JSON ou JSONL) : génération non interactive")
+    parser.add_argument("--out", default=os.path.join(Config.OUTPUT_GRAPH_DIR, "Looks"))
+    parser.add_argument("--workers", type=int, default=8, help="Images générées en parallèle")
+    parser.add_argument("--max-rps", type=float, default=None, help="Plafond de requêtes/s vers le générateur")
+    parser.add_argument("--best", action="store_true", help="Mode batch : tenue la mieux notée plutôt qu'aléatoire")
+    parser.add_argument("--endpoint", default=IMAGE_ENDPOINT, help="URL du générateur, avec {prompt} (et {model}, {width}, {height})")
+    parser.add_argument("--no-cache", action="store_true", help="Régénère toujours les images (cache des looks désactivé)")
+    parser.add_argument("--cache-max-mb", type=float, default=1024)
+    args = parser.parse_args()
+
+    app = SmartWearVisualizer(use_cache=not args.no_cache)
+    if app.look_cache:
+        app.look_cache.max_bytes = int(args.cache_max_mb * 1024 * 1024)
+    app.image_endpoint = args.endpoint
+    if args.batch:
+        app.generate_batch(load_prefs(args.batch), args.out, workers=args.workers, max_rps=args.max_rps,
+                           best=args.best)
+    else:
+        app.generate_and_show()
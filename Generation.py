@@ -1,27 +1,159 @@
 # Generation.py
-
+# Analyse vestimentaire d'une photo avec Gemini : description JSON, radar des styles
+# et couleurs par zone. L'import du module est sans effet de bord (aucun appel au
+# modèle, aucun graphique, dépendances lourdes chargées à la première utilisation) ;
+# le travail se fait via main() / analyze_predict_image() / analyze_folder().
+#
+# Usage : python Generation.py [--batch [DOSSIER]] [--no-cache] [--max-side 1024]
+
+import argparse
+import asyncio
+import base64
 import json
+import mimetypes
 import os
-import matplotlib.pyplot as plt
-import numpy as np
-from PIL import Image 
-from google import genai
-from wordcloud import WordCloud
-from Config import GOOGLE_GEMINI_API_KEY, PREDICT_IMAGE, json_Description, GEMINI_MODEL_NAME, OUTPUT_JSON_PATH, OUTPUT_GRAPH_DIR
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from Config import GOOGLE_GEMINI_API_KEY, PREDICT_IMAGE, json_Description, GEMINI_MODEL_NAME, OUTPUT_JSON_PATH, OUTPUT_GRAPH_DIR, GEMINI_COMBINED_ANALYSIS
+from Config import ANALYSIS_CACHE, ANALYSIS_CACHE_PERCEPTUAL, ANALYSIS_CACHE_TTL_DAYS, ANALYSIS_CACHE_MAX_ENTRIES
+from Config import UPLOAD_MAX_SIDE, UPLOAD_FORMAT, UPLOAD_QUALITY
+from AnalysisCache import AnalysisCache
+
+_client = None
+_analysis_cache = None
+use_analysis_cache = ANALYSIS_CACHE  # False = contournement du cache (--no-cache)
+
+
+def get_client():
+    """Client Gemini, créé au premier appel (google.genai est long à importer)."""
+    global _client
+    if _client is None:
+        from google import genai
+        _client = genai.Client(api_key=GOOGLE_GEMINI_API_KEY)
+    return _client
+
+
+def get_analysis_cache():
+    """Cache des réponses (contenu de l'image + prompt + modèle), ouvert au premier appel ; None si contourné."""
+    global _analysis_cache
+    if not use_analysis_cache:
+        return None
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache(perceptual=ANALYSIS_CACHE_PERCEPTUAL, ttl_s=ANALYSIS_CACHE_TTL_DAYS * 86400,
+                                        max_entries=ANALYSIS_CACHE_MAX_ENTRIES)
+    return _analysis_cache
 
-# Initialisation du client Gemini
-client = genai.Client(api_key=GOOGLE_GEMINI_API_KEY)
 
-def analyze_image(image_path, json_Description):
+# ========================
+# Préparation de l'image avant envoi
+# ========================
+
+# Orientation EXIF, côté max et recompression ; max_side = 0 envoie le fichier original tel quel
+upload_settings = {"max_side": UPLOAD_MAX_SIDE, "format": UPLOAD_FORMAT, "quality": UPLOAD_QUALITY}
+upload_stats = {"images": 0, "original_bytes": 0, "sent_bytes": 0, "seconds": 0.0}
+_prepared = {}  # (chemin, mtime, taille, réglages) -> (octets, type MIME)
+_upload_lock = threading.Lock()  # Le lot prépare les images dans des threads
+
+
+def upload_tag():
+    """Réglages d'envoi, ajoutés à la clé du cache : une analyse faite sur une autre taille n'est pas réutilisée."""
+    if not upload_settings["max_side"]:
+        return "original"
+    return f"{upload_settings['max_side']}px-{upload_settings['format'].lower()}-q{upload_settings['quality']}"
+
+
+def cache_model_name(model_name, endpoint=None):
+    """Modèle tel qu'il entre dans la clé du cache : backend (Gemini ou URL du stub) + réglages d'envoi."""
+    return f"{model_name}|{endpoint or 'gemini'}|{upload_tag()}"
+
+
+def prepare_image(image_path, remember=True):
     """
-    Analyse une image et remplit un JSON selon le contenu visible en utilisant Gemini.
+    Octets envoyés au modèle pour une image : orientée, réduite à `max_side` px
+    et recompressée une seule fois, puis réutilisés par tous les appels
+    (remember=False en lot, où chaque image n'est envoyée qu'une fois).
     """
-    try:
-        img = Image.open(image_path)
-    except FileNotFoundError:
-        print(f"Erreur : Image non trouvée à l'emplacement {image_path}")
-        return json_Description
-    prompt_text = f"""
+    st = os.stat(image_path)
+    key = (os.path.abspath(image_path), st.st_mtime_ns, st.st_size, upload_tag())
+    if key in _prepared:
+        return _prepared[key]
+
+    from PIL import Image, ImageOps
+
+    start = time.perf_counter()
+    with open(image_path, "rb") as f:
+        original = f.read()
+    data, mime_type = original, mimetypes.guess_type(image_path)[0] or "image/png"
+    if upload_settings["max_side"]:
+        with Image.open(BytesIO(original)) as img:
+            resized = max(img.size) > upload_settings["max_side"]
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                img = Image.alpha_composite(Image.new("RGBA", img.size, "white"), img)  # Fond blanc pour la transparence
+            img = img.convert("RGB")
+            img.thumbnail((upload_settings["max_side"], upload_settings["max_side"]), Image.LANCZOS)
+            buf = BytesIO()
+            img.save(buf, upload_settings["format"], quality=upload_settings["quality"])
+        # Une petite image déjà compressée peut grossir au ré-encodage : on garde alors l'original
+        if resized or len(buf.getvalue()) < len(original):
+            data, mime_type = buf.getvalue(), f"image/{upload_settings['format'].lower()}"
+
+    with _upload_lock:
+        upload_stats["images"] += 1
+        upload_stats["original_bytes"] += len(original)
+        upload_stats["sent_bytes"] += len(data)
+        upload_stats["seconds"] += time.perf_counter() - start
+    if remember:
+        _prepared[key] = (data, mime_type)
+    return data, mime_type
+
+
+def print_upload_report():
+    if not upload_stats["images"]:
+        return
+    original, sent = upload_stats["original_bytes"], upload_stats["sent_bytes"]
+    print(f"📦 Envoi ({upload_tag()}) : {original / 1024 / 1024:.2f} Mo -> {sent / 1024 / 1024:.2f} Mo "
+          f"({(1 - sent / original) * 100:.0f} % économisés) pour {upload_stats['images']} image(s), "
+          f"préparation {upload_stats['seconds'] * 1000:.0f} ms")
+
+
+def ask_gemini(prompt, image_path, model_name):
+    """
+    Texte de la réponse Gemini (JSON) pour une image. Passe par le cache d'analyses :
+    l'image n'est préparée et envoyée qu'en cas de miss, et seule une réponse JSON valide est stockée.
+    """
+    from google.genai import types as genai_types
+
+    cache_model = cache_model_name(model_name)
+    analysis_cache = get_analysis_cache()
+    if analysis_cache is not None:
+        cached = analysis_cache.get(image_path, prompt, cache_model)
+        if cached is not None:
+            return cached
+
+    data, mime_type = prepare_image(image_path)
+    response = get_client().models.generate_content(
+        model=model_name,
+        contents=[prompt, genai_types.Part.from_bytes(data=data, mime_type=mime_type)],
+        config={"response_mime_type": "application/json"}
+    )
+
+    if analysis_cache is not None:
+        try:
+            json.loads(response.text.strip().replace("```json", "").replace("```", "").strip())
+            analysis_cache.put(image_path, prompt, cache_model, response.text)
+        except json.JSONDecodeError:
+            pass
+    return response.text
+
+
+def description_prompt(json_Description):
+    """Consignes de remplissage du JSON descriptif (analyse séparée ou combinée)."""
+    return f"""
 Tu es un expert en analyse vestimentaire. Remplis ce JSON avec les informations visibles sur l'image.
 
 Réponds **UNIQUEMENT** avec le JSON rempli, sans texte supplémentaire, ni introduction.
@@ -58,15 +190,22 @@ Ne répète pas les mêmes informations inutilement. Chaque champ doit être ren
 
 JSON template : {json.dumps(json_Description)}
 """
+
+
+def analyze_image(image_path, json_Description):
+    """
+    Analyse une image et remplit un JSON selon le contenu visible en utilisant Gemini.
+    """
+    if not os.path.exists(image_path):
+        print(f"Erreur : Image non trouvée à l'emplacement {image_path}")
+        return json_Description
+    prompt_text = description_prompt(json_Description)
+
     # Appel à Gemini
-    response = client.models.generate_content(
-        model=GEMINI_MODEL_NAME,
-        contents=[prompt_text, img],
-        config={"response_mime_type": "application/json"}
-    )
+    response_text = ask_gemini(prompt_text, image_path, GEMINI_MODEL_NAME)
 
     # Récupérer le JSON généré
-    filled_json_text = response.text
+    filled_json_text = response_text
 
     # Nettoyer le JSON si Gemini ajoute des balises
     if filled_json_text.startswith("```json") and filled_json_text.endswith("```"):
@@ -78,33 +217,18 @@ JSON template : {json.dumps(json_Description)}
     except json.JSONDecodeError:
         print("Erreur : le texte retourné n'est pas un JSON valide.")
         print("Texte brut :", filled_json_text)
-        filled_json = json_template
+        filled_json = json_Description
 
     return filled_json
 
-if __name__ == "__main__":
-    result = analyze_image(PREDICT_IMAGE, json_Description)
-
-    # Afficher le résultat 
-    print(json.dumps(result, indent=2, ensure_ascii=False))
-
-    # Sauvegarder dans le fichier JSON
-    os.makedirs(os.path.dirname(OUTPUT_JSON_PATH), exist_ok=True)
-    with open(OUTPUT_JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
-
-    print(f"\nRésultat sauvegardé dans : {OUTPUT_JSON_PATH}")
-
-
 # ========================
 # Visualisation radar du style vestimentaire
 # ========================
 
-def generate_style_scores(image_path, model_name):
-    """    Score de 0 à 1 pour chaque style vestimentaire    """
-    img = Image.open(image_path)
+all_styles = ["Sportif", "Décontracté", "Streetwear", "Urbain", "Minimaliste",
+              "Élégant", "Professionnel", "Classique", "Vintage", "Bohème", "Avant-garde"]
 
-    prompt_radar = f"""
+PROMPT_RADAR = """
 Tu es un expert en mode et style vestimentaire.
 Pour l'image fournie, évalue **la probabilité pour chaque style**.
 Les styles sont : Sportif, Décontracté, Streetwear, Urbain, Minimaliste, 
@@ -113,13 +237,11 @@ Retourne un JSON où chaque style a une valeur entre 0 et 1 correspondant à sa
 Ne renvoie que le JSON, sans texte supplémentaire.
 """
 
-    response = client.models.generate_content(
-        model=model_name,
-        contents=[prompt_radar, img],
-        config={"response_mime_type": "application/json"}
-    )
+def generate_style_scores(image_path, model_name):
+    """    Score de 0 à 1 pour chaque style vestimentaire    """
+    response_text = ask_gemini(PROMPT_RADAR, image_path, model_name)
 
-    radar_json_text = response.text
+    radar_json_text = response_text
     if radar_json_text.startswith("```json") and radar_json_text.endswith("```"):
         radar_json_text = radar_json_text.strip("`").lstrip("json\n")
 
@@ -131,70 +253,14 @@ Ne renvoie que le JSON, sans texte supplémentaire.
 
     return style_scores
 
-style_scores = generate_style_scores(PREDICT_IMAGE, GEMINI_MODEL_NAME)
-
-labels = list(style_scores.keys())
-values = list(style_scores.values())
-
-
-values += values[:1]  # boucle pour fermer le radar
-# Recalcul des angles avec la nouvelle longueur (11 catégories)
-angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
-angles += angles[:1]
-
-# Création du radar
-# Augmentation de la taille de la figure (8, 8) et ajustement du padding pour les labels coupés.
-fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-
-ax.plot(angles, values, color='green', linewidth=2)
-ax.fill(angles, values, color='green', alpha=0.25)
-
-ax.set_xticks(angles[:-1])
-
-# Eviter les chevauchements & éloignement des labels
-ax.set_xticklabels(labels, ha='center', size=10) 
-ax.tick_params(pad=15)
-
-# Correction de l'alignement des étiquettes
-for label, angle in zip(ax.get_xticklabels(), angles[:-1]):
-    # Si le label est sur la gauche (entre 90° et 270° / pi/2 et 3pi/2)
-    if angle >= np.pi / 2 and angle <= 3 * np.pi / 2:
-        label.set_horizontalalignment("right")
-    # Si le label est sur la droite (entre 270° et 90°)
-    else:
-        label.set_horizontalalignment("left")
-
-
-ax.set_yticks([0, 0.25, 0.5, 0.75, 1])
-ax.set_yticklabels(["0%", "25%", "50%", "75%", "100%"], color='gray', size=9) # Ajustement de la taille de police pour les pourcentages
-ax.set_title("Radar des styles vestimentaires (scores)", va='bottom', size=14)
-
-# ========================
-# Export du RADAR
-# ========================
-
-GRAPH_FILENAME_PREFIX = "Radar_Predict" 
-FULL_SAVE_PATH = os.path.join(OUTPUT_GRAPH_DIR, f"{GRAPH_FILENAME_PREFIX}.png")
-
-try:
-    fig.savefig(FULL_SAVE_PATH, bbox_inches='tight', dpi=300) 
-    print(f"\n✅ Graphique radar sauvegardé : {FULL_SAVE_PATH}")
-except Exception as e:
-    print(f"\n❌ Erreur lors de la sauvegarde du graphique : {e}")
-
 
 # ========================
 # Couleurs général de l'accoutrement
 # ========================
 
-def generate_color_analysis(image_path, model_name):
-    """
-    Analyse des couleurs dominantes dans la tenue en utilisant Gemini.
-    """
-
-    img = Image.open(image_path)
+color_categories = ["haut", "bas", "chaussures", "accessoires"]
 
-    prompt_colors = """
+PROMPT_COLORS = """
 Tu es un expert en mode et analyse visuelle.
 Pour l'image fournie, donne les **couleurs dominantes** du haut, bas, chaussures et accessoires.
 FORMAT STRICT (JSON PUR) :
@@ -227,14 +293,15 @@ Règles :
 - Si une catégorie n’est pas visible : toutes les valeurs = 0%.
 - Ne renvoie QUE le JSON, aucun texte autour.
 """
-    
-    response = client.models.generate_content(
-        model=model_name,
-        contents=[prompt_colors, img],
-        config={"response_mime_type": "application/json"}
-    )
 
-    colors_json = response.text.strip()
+def generate_color_analysis(image_path, model_name):
+    """
+    Analyse des couleurs dominantes dans la tenue en utilisant Gemini.
+    """
+
+    response_text = ask_gemini(PROMPT_COLORS, image_path, model_name)
+
+    colors_json = response_text.strip()
     colors_json = colors_json.replace("```json", "").replace("```", "").strip()
 
     try:
@@ -251,120 +318,464 @@ Règles :
     return colors_data
 
 
+# ========================
+# Analyse combinée : une seule requête Gemini par image
+# ========================
+
+def combined_prompt(json_Description):
+    """Consignes des trois analyses (description, styles, couleurs) regroupées en un seul JSON."""
+    return f"""
+Tu vas réaliser trois analyses de la même image et les regrouper dans UN SEUL JSON :
+{{"description": {{...}}, "styles": {{...}}, "couleurs": {{...}}}}
+Les consignes de chaque partie ne s'appliquent qu'à sa clé. Ne renvoie QUE ce JSON, aucun texte autour.
+
+=== Partie "description" ===
+{description_prompt(json_Description)}
+=== Partie "styles" ===
+{PROMPT_RADAR}
+=== Partie "couleurs" ===
+{PROMPT_COLORS}
+"""
+
+
+def parse_combined(response_text):
+    """
+    Découpe la réponse combinée en (description, style_scores, colors_data).
+    Une partie absente ou invalide vaut None.
+    """
+    combined_text = response_text.strip()
+    combined_text = combined_text.replace("```json", "").replace("```", "").strip()
+    try:
+        combined = json.loads(combined_text)
+    except json.JSONDecodeError:
+        combined = {}
+    if not isinstance(combined, dict):
+        combined = {}
+
+    description = combined.get("description")
+    if not isinstance(description, dict) or not description:
+        description = None
+
+    style_scores = combined.get("styles")
+    try:
+        # Aucun style reconnu (clés traduites, inventées...) : invalide plutôt que tout à zéro
+        if not isinstance(style_scores, dict) or not any(style in style_scores for style in all_styles):
+            style_scores = None
+        else:
+            style_scores = {style: float(style_scores.get(style) or 0) for style in all_styles}
+    except (TypeError, ValueError):
+        style_scores = None
+
+    colors_data = combined.get("couleurs")
+    if not isinstance(colors_data, dict) or not all(isinstance(colors_data.get(c), dict) for c in color_categories):
+        colors_data = None
+
+    return description, style_scores, colors_data
+
+
+def analyze_outfit(image_path, json_Description, model_name):
+    """
+    Description JSON, scores de style et couleurs par zone en un seul appel Gemini :
+    l'image n'est préparée et envoyée qu'une fois. Chaque partie absente ou invalide
+    de la réponse est recalculée par son appel séparé.
+    Renvoie (description, style_scores, colors_data).
+    """
+    if not os.path.exists(image_path):
+        print(f"Erreur : Image non trouvée à l'emplacement {image_path}")
+        return json_Description, {style: 0 for style in all_styles}, {c: {"Inconnu": 100} for c in color_categories}
+
+    response_text = ask_gemini(combined_prompt(json_Description), image_path, model_name)
+    description, style_scores, colors_data = parse_combined(response_text)
+    if None in (description, style_scores, colors_data):
+        print("Erreur : réponse combinée incomplète, repli sur les appels séparés.")
+
+    if description is None:
+        description = analyze_image(image_path, json_Description)
+    if style_scores is None:
+        style_scores = generate_style_scores(image_path, model_name)
+    if colors_data is None:
+        colors_data = generate_color_analysis(image_path, model_name)
+
+    return description, style_scores, colors_data
+
 
 # ========================
-# Analyse des couleurs
+# Analyse par lots d'un dossier (asynchrone, reprise sur JSONL)
 # ========================
 
-colors_data = generate_color_analysis(PREDICT_IMAGE, GEMINI_MODEL_NAME)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+BATCH_OUTPUT_PATH = os.path.join(OUTPUT_GRAPH_DIR, "BDD_batch.jsonl")
+
+
+class RateLimited(Exception):
+    """Quota du modèle atteint (HTTP 429 / RESOURCE_EXHAUSTED, ou 503) : la requête est retentée."""
+
+
+async def gemini_async_call(prompt, data, mime_type, model_name):
+    """Appel Gemini asynchrone (client.aio) avec les octets de l'image."""
+    from google.genai import errors as genai_errors
+    from google.genai import types as genai_types
+
+    try:
+        response = await get_client().aio.models.generate_content(
+            model=model_name,
+            contents=[prompt, genai_types.Part.from_bytes(data=data, mime_type=mime_type)],
+            config={"response_mime_type": "application/json"}
+        )
+    except genai_errors.APIError as e:
+        if e.code in (429, 503):
+            raise RateLimited(str(e)) from e
+        raise
+    return response.text
+
+
+def stub_call(endpoint, concurrency=8):
+    """
+    Modèle local à la place de Gemini (benchmark hors ligne) : POST JSON
+    {"model", "prompt", "mime_type", "image" (base64)} -> {"text": ...}, 429 = quota.
+    """
+    import requests
+
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))  # Une connexion par requête en vol
+
+    def post(payload):
+        return session.post(endpoint, json=payload, timeout=120)
+
+    async def call(prompt, data, mime_type, model_name):
+        payload = {"model": model_name, "prompt": prompt, "mime_type": mime_type,
+                   "image": base64.b64encode(data).decode("ascii")}
+        r = await asyncio.to_thread(post, payload)
+        if r.status_code in (429, 503):
+            raise RateLimited(f"HTTP {r.status_code}")
+        r.raise_for_status()
+        return r.json()["text"]
+    return call
+
+
+def list_images(folder):
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def done_images(out_path):
+    """Images déjà analysées avec succès dans le JSONL (les erreurs seront retentées)."""
+    done = set()
+    if os.path.exists(out_path):
+        with open(out_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Ligne tronquée par une interruption
+                if "error" not in record:
+                    done.add(record["image"])
+    return done
+
+
+async def analyze_one(folder, name, call, model_name, semaphore, max_retries=5, base_delay=1.0, endpoint=None):
+    """
+    Analyse combinée d'une image, avec retries à backoff exponentiel « full jitter » sur quota.
+    `endpoint` (stub local) entre dans la clé du cache : ses réponses ne passent jamais pour celles de Gemini.
+    """
+    path = os.path.join(folder, name)
+    prompt = combined_prompt(json_Description)
+    cache_model = cache_model_name(model_name, endpoint)
+    analysis_cache = get_analysis_cache()
+    record = {"image": name, "started": time.time(), "attempts": 0}
+    try:
+        # Lecture du fichier, sha256 / dHash et SQLite hors de la boucle : les autres requêtes continuent
+        response_text = (await asyncio.to_thread(analysis_cache.get, path, prompt, cache_model)
+                         if analysis_cache is not None else None)
+        if response_text is None:
+            data, mime_type = await asyncio.to_thread(prepare_image, path, False)
+            record["bytes_sent"] = len(data)
+            async with semaphore:
+                record["sent"] = time.time()  # Après l'attente de la file : latence de l'appel seul
+                while True:
+                    record["attempts"] += 1
+                    try:
+                        response_text = await call(prompt, data, mime_type, model_name)
+                        break
+                    except RateLimited:
+                        if record["attempts"] >= max_retries:
+                            raise
+                        await asyncio.sleep(random.uniform(0, base_delay * 2 ** (record["attempts"] - 1)))
+        description, style_scores, colors_data = parse_combined(response_text)
+        if None in (description, style_scores, colors_data):
+            raise ValueError("réponse combinée incomplète")
+        if analysis_cache is not None and record["attempts"]:
+            await asyncio.to_thread(analysis_cache.put, path, prompt, cache_model, response_text)
+        record.update({"description": description, "styles": style_scores, "couleurs": colors_data})
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["finished"] = time.time()
+    return record
+
+
+async def analyze_folder(folder, out_path=BATCH_OUTPUT_PATH, concurrency=8, endpoint=None,
+                         model_name=GEMINI_MODEL_NAME, max_retries=5, base_delay=1.0):
+    """
+    Analyse toutes les images de `folder` (au plus `concurrency` requêtes en vol) et ajoute
+    un enregistrement JSONL par image dès qu'elle est terminée. Les images déjà présentes
+    dans `out_path` sont sautées : une relance reprend là où le lot s'est arrêté.
+    """
+    images = list_images(folder)
+    done = done_images(out_path)
+    todo = [name for name in images if name not in done]
+    print(f"🖼️ {len(images)} images dans {folder} : {len(images) - len(todo)} déjà analysées, {len(todo)} à traiter.")
+    if not todo:
+        return {"images": 0, "errors": 0, "seconds": 0.0}
+
+    call = stub_call(endpoint, concurrency) if endpoint else gemini_async_call
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [analyze_one(folder, name, call, model_name, semaphore, max_retries, base_delay, endpoint) for name in todo]
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    start = time.perf_counter()
+    errors = 0
+    with open(out_path, "a", encoding="utf-8") as out:
+        for i, task in enumerate(asyncio.as_completed(tasks), 1):
+            record = await task
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if "error" in record:
+                errors += 1
+                print(f"  ❌ {record['image']} : {record['error']}")
+            elif i % 10 == 0 or i == len(todo):
+                print(f"  ✅ {i}/{len(todo)} images analysées")
+    elapsed = time.perf_counter() - start
+    print(f"\n📄 {len(todo) - errors} analyses ajoutées à {out_path} ({errors} erreurs) "
+          f"— {len(todo) / elapsed:.1f} images/s, concurrence {concurrency}")
+    return {"images": len(todo), "errors": errors, "seconds": elapsed}
+
 
 # ========================
-# Construction du graphique
+# Radar des styles
 # ========================
 
-labels = []
-values = []
-bar_colors = []
-
-# Palette élargie
-palette = {
-    "Noir": "#000000",
-    "Blanc": "#FFFFFF",
-    "Bleu": "#1f77b4",
-    "Rouge": "#d62728",
-    "Vert": "#2ca02c",
-    "Gris": "#7f7f7f",
-    "Jaune": "#ffdd00",
-    "Orange": "#ff7f0e",
-    "Marron": "#8b4513",
-    "Violet": "#9467bd",
-    "Rose": "#ff69b4",
-    "Beige": "#f5f5dc",
-    "Doré": "#d4af37",
-    "Argenté": "#c0c0c0",
-    "Bordeaux": "#800020",
-    "Turquoise": "#40e0d0"
-}
-category_order = ["haut", "bas", "chaussures", "accessoires"]
-category_labels_display = [c.capitalize() for c in category_order] # Pour l'affichage sur l'axe Y
+def plot_style_radar(style_scores, out_dir=OUTPUT_GRAPH_DIR):
+    """Radar des scores de style, sauvegardé en PNG dans out_dir."""
+    import matplotlib.pyplot as plt
+    import numpy as np
 
-# Les données pour les barres empilées doivent être sous forme de dictionnaires pour Matplotlib
-# { couleur: [pct_haut, pct_bas, pct_chaussures, pct_accessoires] }
-plot_data = {} 
+    labels = list(style_scores.keys())
+    values = list(style_scores.values())
 
-# Initialisation pour toutes les couleurs possibles avec des zéros
-all_colors_list = list(palette.keys())
 
-for color_name in all_colors_list:
-    plot_data[color_name] = [0] * len(category_order)
+    values += values[:1]  # boucle pour fermer le radar
+    # Recalcul des angles avec la nouvelle longueur (11 catégories)
+    angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
+    angles += angles[:1]
 
-# Remplir plot_data avec les pourcentages réels
-for i, category in enumerate(category_order):
-    color_dict = colors_data.get(category, {})
-    sorted_colors = sorted(color_dict.items(), key=lambda item: item[1], reverse=True)
-    
-    for color, pct in sorted_colors:
-        if pct > 0 and color != "Inconnu" and color in plot_data: # S'assurer que la couleur est dans notre palette
-            plot_data[color][i] = pct
+    # Création du radar
+    # Augmentation de la taille de la figure (8, 8) et ajustement du padding pour les labels coupés.
+    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+
+    ax.plot(angles, values, color='green', linewidth=2)
+    ax.fill(angles, values, color='green', alpha=0.25)
+
+    ax.set_xticks(angles[:-1])
+
+    # Eviter les chevauchements & éloignement des labels
+    ax.set_xticklabels(labels, ha='center', size=10) 
+    ax.tick_params(pad=15)
+
+    # Correction de l'alignement des étiquettes
+    for label, angle in zip(ax.get_xticklabels(), angles[:-1]):
+        # Si le label est sur la gauche (entre 90° et 270° / pi/2 et 3pi/2)
+        if angle >= np.pi / 2 and angle <= 3 * np.pi / 2:
+            label.set_horizontalalignment("right")
+        # Si le label est sur la droite (entre 270° et 90°)
+        else:
+            label.set_horizontalalignment("left")
 
-# Retirer les couleurs qui sont à 0% partout pour ne pas encombrer la légende
-plot_data = {color: pcts for color, pcts in plot_data.items() if any(p > 0 for p in pcts)}
+
+    ax.set_yticks([0, 0.25, 0.5, 0.75, 1])
+    ax.set_yticklabels(["0%", "25%", "50%", "75%", "100%"], color='gray', size=9) # Ajustement de la taille de police pour les pourcentages
+    ax.set_title("Radar des styles vestimentaires (scores)", va='bottom', size=14)
+
+    # Export du RADAR
+    GRAPH_FILENAME_PREFIX = "Radar_Predict" 
+    FULL_SAVE_PATH = os.path.join(out_dir, f"{GRAPH_FILENAME_PREFIX}.png")
+
+    try:
+        fig.savefig(FULL_SAVE_PATH, bbox_inches='tight', dpi=300) 
+        print(f"\n✅ Graphique radar sauvegardé : {FULL_SAVE_PATH}")
+    except Exception as e:
+        print(f"\n❌ Erreur lors de la sauvegarde du graphique : {e}")
+    plt.close(fig)
 
 
 # ========================
-# Affichage (Graphique en barres empilées)
+# Couleurs par catégorie
 # ========================
 
-fig, ax = plt.subplots(figsize=(10, 8))
+def plot_color_analysis(colors_data, out_dir=OUTPUT_GRAPH_DIR):
+    """Barres empilées des couleurs dominantes par zone, sauvegardées en PNG dans out_dir."""
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    # Palette élargie
+    palette = {
+        "Noir": "#000000",
+        "Blanc": "#FFFFFF",
+        "Bleu": "#1f77b4",
+        "Rouge": "#d62728",
+        "Vert": "#2ca02c",
+        "Gris": "#7f7f7f",
+        "Jaune": "#ffdd00",
+        "Orange": "#ff7f0e",
+        "Marron": "#8b4513",
+        "Violet": "#9467bd",
+        "Rose": "#ff69b4",
+        "Beige": "#f5f5dc",
+        "Doré": "#d4af37",
+        "Argenté": "#c0c0c0",
+        "Bordeaux": "#800020",
+        "Turquoise": "#40e0d0"
+    }
+    category_order = ["haut", "bas", "chaussures", "accessoires"]
+    category_labels_display = [c.capitalize() for c in category_order] # Pour l'affichage sur l'axe Y
+
+    # Les données pour les barres empilées doivent être sous forme de dictionnaires pour Matplotlib
+    # { couleur: [pct_haut, pct_bas, pct_chaussures, pct_accessoires] }
+    plot_data = {} 
+
+    # Initialisation pour toutes les couleurs possibles avec des zéros
+    all_colors_list = list(palette.keys())
+
+    for color_name in all_colors_list:
+        plot_data[color_name] = [0] * len(category_order)
+
+    # Remplir plot_data avec les pourcentages réels
+    for i, category in enumerate(category_order):
+        color_dict = colors_data.get(category, {})
+        sorted_colors = sorted(color_dict.items(), key=lambda item: item[1], reverse=True)
+    
+        for color, pct in sorted_colors:
+            if pct > 0 and color != "Inconnu" and color in plot_data: # S'assurer que la couleur est dans notre palette
+                plot_data[color][i] = pct
+
+    # Retirer les couleurs qui sont à 0% partout pour ne pas encombrer la légende
+    plot_data = {color: pcts for color, pcts in plot_data.items() if any(p > 0 for p in pcts)}
 
-# Créer les barres empilées
-bottom = np.zeros(len(category_order)) # Piste pour empiler les barres
 
-for color_name, percentages in plot_data.items():
-    if any(p > 0 for p in percentages): # N'afficher que les couleurs qui ont une contribution
-        ax.barh(
-            category_labels_display,
-            percentages,
-            left=bottom, # Position de départ de la barre
-            height=0.6, # Épaisseur des barres
-            label=color_name, # Pour la légende
-            color=palette.get(color_name, "#999999") # Couleur de la palette
-        )
-        bottom += np.array(percentages) # Mise à jour de la base pour la prochaine couleur
+    # Affichage (Graphique en barres empilées)
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+
+    # Créer les barres empilées
+    bottom = np.zeros(len(category_order)) # Piste pour empiler les barres
 
-# Ajout des étiquettes de pourcentage sur les barres
-# Ce n'est pas trivial pour les barres empilées, nous allons simplifier pour les totaux si besoin
-# Ou itérer sur chaque segment :
-for i, category_label in enumerate(category_labels_display):
-    current_offset = 0
     for color_name, percentages in plot_data.items():
-        pct = percentages[i]
-        if pct > 0:
-            # Positionnement du texte au centre du segment
-            text_x_position = current_offset + pct / 2
-            ax.text(text_x_position, i, f'{pct:.0f}%', va='center', ha='center',
-                    color='black', fontsize=9, bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', pad=1))
-            current_offset += pct
+        if any(p > 0 for p in percentages): # N'afficher que les couleurs qui ont une contribution
+            ax.barh(
+                category_labels_display,
+                percentages,
+                left=bottom, # Position de départ de la barre
+                height=0.6, # Épaisseur des barres
+                label=color_name, # Pour la légende
+                color=palette.get(color_name, "#999999") # Couleur de la palette
+            )
+            bottom += np.array(percentages) # Mise à jour de la base pour la prochaine couleur
+
+    # Ajout des étiquettes de pourcentage sur les barres
+    # Ce n'est pas trivial pour les barres empilées, nous allons simplifier pour les totaux si besoin
+    # Ou itérer sur chaque segment :
+    for i, category_label in enumerate(category_labels_display):
+        current_offset = 0
+        for color_name, percentages in plot_data.items():
+            pct = percentages[i]
+            if pct > 0:
+                # Positionnement du texte au centre du segment
+                text_x_position = current_offset + pct / 2
+                ax.text(text_x_position, i, f'{pct:.0f}%', va='center', ha='center',
+                        color='black', fontsize=9, bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', pad=1))
+                current_offset += pct
+
+
+    ax.set_xlabel("Pourcentage (%)")
+    ax.set_title("Couleurs dominantes de la tenue par catégorie")
+    ax.set_xlim(0, 100) # Les pourcentages vont de 0 à 100
+    ax.invert_yaxis() # Pour avoir "Haut" en haut
+
+    ax.legend(title="Couleurs", bbox_to_anchor=(1.05, 1), loc='upper left') # Légende à droite
+    plt.tight_layout()
+
+    # Sauvegarde du graphique
+
+    GRAPH_FILENAME_PREFIX = "Couleurs_Predict"
+    FULL_SAVE_PATH = os.path.join(out_dir, f"{GRAPH_FILENAME_PREFIX}.png")
 
+    try:
+        fig.savefig(FULL_SAVE_PATH, bbox_inches='tight', dpi=300)
+        print(f"\n✅ Graphique couleurs sauvegardé : {FULL_SAVE_PATH}")
+    except Exception as e:
+        print(f"\n❌ Erreur lors de la sauvegarde : {e}")
+    plt.close(fig)
 
-ax.set_xlabel("Pourcentage (%)")
-ax.set_title("Couleurs dominantes de la tenue par catégorie")
-ax.set_xlim(0, 100) # Les pourcentages vont de 0 à 100
-ax.invert_yaxis() # Pour avoir "Haut" en haut
 
-ax.legend(title="Couleurs", bbox_to_anchor=(1.05, 1), loc='upper left') # Légende à droite
-plt.tight_layout()
+# ========================
+# Analyse de l'image
+# ========================
+
+def analyze_predict_image(image_path=PREDICT_IMAGE, combined=GEMINI_COMBINED_ANALYSIS, model_name=GEMINI_MODEL_NAME):
+    """Renvoie (description, style_scores, colors_data) pour une image."""
+    if combined:
+        return analyze_outfit(image_path, json_Description, model_name)
+    # Trois allers-retours Gemini (mêmes octets préparés pour chaque appel)
+    return (analyze_image(image_path, json_Description),
+            generate_style_scores(image_path, model_name),
+            generate_color_analysis(image_path, model_name))
+
 
 # ========================
-# Sauvegarde du graphique
+# Ligne de commande
 # ========================
 
-GRAPH_FILENAME_PREFIX = "Couleurs_Predict"
-FULL_SAVE_PATH = os.path.join(OUTPUT_GRAPH_DIR, f"{GRAPH_FILENAME_PREFIX}.png")
+def main(argv=None):
+    global use_analysis_cache
+    parser = argparse.ArgumentParser(description="Analyse vestimentaire d'une image (ou d'un dossier) avec Gemini")
+    parser.add_argument("--image", default=PREDICT_IMAGE, help="Image analysée (défaut : PREDICT_IMAGE)")
+    parser.add_argument("--batch", nargs="?", const=os.path.dirname(PREDICT_IMAGE), metavar="DOSSIER",
+                        help="Analyse toutes les images du dossier (défaut : dossier de PREDICT_IMAGE)")
+    parser.add_argument("--out", default=BATCH_OUTPUT_PATH, help="Fichier JSONL des résultats du lot")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requêtes simultanées au modèle")
+    parser.add_argument("--retries", type=int, default=5, help="Tentatives par image sur erreur de quota")
+    parser.add_argument("--endpoint", help="URL d'un modèle local (stub) à la place de Gemini")
+    parser.add_argument("--no-cache", action="store_true", help="Contourne le cache des analyses")
+    parser.add_argument("--max-side", type=int, default=UPLOAD_MAX_SIDE, help="Côté max envoyé au modèle (px, 0 = original)")
+    parser.add_argument("--format", default=UPLOAD_FORMAT, choices=["JPEG", "WEBP"], help="Format de recompression")
+    parser.add_argument("--quality", type=int, default=UPLOAD_QUALITY, help="Qualité de recompression (1-100)")
+    args = parser.parse_args(argv)
+    if args.no_cache:
+        use_analysis_cache = False
+    upload_settings.update({"max_side": args.max_side, "format": args.format, "quality": args.quality})
+
+    if args.batch:
+        asyncio.run(analyze_folder(args.batch, args.out, args.concurrency, args.endpoint, max_retries=args.retries))
+        print_upload_report()
+        return
+
+    result, style_scores, colors_data = analyze_predict_image(args.image)
 
-try:
-    fig.savefig(FULL_SAVE_PATH, bbox_inches='tight', dpi=300)
-    print(f"\n✅ Graphique couleurs sauvegardé : {FULL_SAVE_PATH}")
-except Exception as e:
-    print(f"\n❌ Erreur lors de la sauvegarde : {e}")
+    # Afficher le résultat 
+    print(json.dumps(result, indent=2, ensure_ascii=False))
 
+    # Sauvegarder dans le fichier JSON
+    os.makedirs(os.path.dirname(OUTPUT_JSON_PATH), exist_ok=True)
+    with open(OUTPUT_JSON_PATH, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print(f"\nRésultat sauvegardé dans : {OUTPUT_JSON_PATH}")
+    print_upload_report()
+    if get_analysis_cache() is not None:
+        get_analysis_cache().print_report()
+
+    plot_style_radar(style_scores)
+    plot_color_analysis(colors_data)
+
+
+if __name__ == "__main__":
+    main()
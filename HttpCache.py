@@ -0,0 +1,146 @@
+# HttpCache.py
+# Cache HTTP persistant partagé par les scrapers Mango et Nike.
+# Pour chaque URL produit : validateurs ETag / Last-Modified, empreinte du HTML
+# et fiche produit déjà parsée (avec son empreinte). Une relance envoie des requêtes
+# conditionnelles et saute le parsing sur 304 ou si le HTML n'a pas changé ; si le
+# HTML a changé mais que la fiche parsée est identique, la fiche en cache est
+# conservée telle quelle (pas de réécriture, comptée comme inchangée).
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Cache\http_cache.sqlite"
+
+
+def record_hash(record):
+    """Empreinte stable d'une fiche parsée (indépendante de l'ordre des clés)."""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """Cache conditionnel sur disque (SQLite), évincé par âge et par taille totale."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age_days=30, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self.max_bytes = max_bytes
+        self.stats = {"not_modified": 0, "unchanged": 0, "same_record": 0, "parsed": 0}
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                record TEXT,
+                record_hash TEXT,
+                size INTEGER,
+                fetched_at REAL,
+                last_used REAL
+            )""")
+        self.conn.commit()
+        self.evict()
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _get(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, body_hash, record, record_hash FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "body_hash": row[2], "record": json.loads(row[3]),
+                "record_hash": row[4]}
+
+    def _touch(self, url, etag=None, last_modified=None, body_hash=None):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE pages SET last_used = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified), body_hash = COALESCE(?, body_hash) WHERE url = ?",
+                (time.time(), etag, last_modified, body_hash, url))
+            self.conn.commit()
+
+    def _store(self, url, etag, last_modified, body_hash, record):
+        payload = json.dumps(record, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body_hash, payload, record_hash(record), len(payload), now, now))
+            self.conn.commit()
+
+    def fetch(self, fetcher, url, parse, timeout=None):
+        """
+        Télécharge `url` via `fetcher` avec validateurs conditionnels et renvoie
+        `parse(response)`, ou la fiche en cache si la page n'a pas changé.
+        Seules les réponses 200 parsées sans erreur sont mises en cache.
+        """
+        entry = self._get(url)
+        headers = {}
+        if entry:
+            if entry["etag"]: headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]: headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = fetcher.get(url, timeout=timeout, headers=headers)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if entry and response.status_code == 304:
+            self._count("not_modified")
+            self._touch(url)
+            return entry["record"]
+
+        body_hash = hashlib.sha1(response.content).hexdigest()
+        if entry and response.status_code == 200 and entry["body_hash"] == body_hash:
+            self._count("unchanged")
+            self._touch(url, etag, last_modified)
+            return entry["record"]
+
+        record = parse(response)
+        self._count("parsed")
+        if response.status_code == 200 and record is not None:
+            if entry and entry["record_hash"] == record_hash(record):
+                # HTML modifié (jetons, bannières...) mais fiche identique : on garde la fiche en cache
+                self._count("same_record")
+                self._touch(url, etag, last_modified, body_hash)
+                return entry["record"]
+            self._store(url, etag, last_modified, body_hash, record)
+        return record
+
+    def evict(self):
+        """Supprime les entrées trop anciennes puis les moins récemment utilisées au-delà de max_bytes."""
+        with self.lock:
+            self.conn.execute("DELETE FROM pages WHERE last_used < ?", (time.time() - self.max_age,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total > self.max_bytes:
+                for url, size in self.conn.execute("SELECT url, size FROM pages ORDER BY last_used").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                    total -= size
+            self.conn.commit()
+
+    def report(self):
+        total = self.stats["not_modified"] + self.stats["unchanged"] + self.stats["parsed"]
+        skipped = self.stats["not_modified"] + self.stats["unchanged"]
+        ratio = (skipped / total * 100) if total else 0
+        return (f"Cache HTTP : {skipped}/{total} pages non re-parsées ({ratio:.0f}%) — "
+                f"304: {self.stats['not_modified']}, inchangées: {self.stats['unchanged']}, "
+                f"parsées: {self.stats['parsed']} (dont fiche identique : {self.stats['same_record']})")
+
+    def close(self):
+        self.evict()
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,236 @@
+# ImageStore.py
+# Stockage local des images du catalogue, adressé par contenu.
+# - téléchargement parallèle (connexions poolées) des images de SmartWear_DB.json ;
+# - un fichier par contenu (sha256) : une même image partagée par plusieurs produits
+#   ou plusieurs sources n'est stockée qu'une fois ;
+# - dérivés à taille fixe (224 px pour les modèles, 512 px pour les aperçus) ;
+# - reprise : les URLs déjà stockées ne sont pas retéléchargées ;
+# - éviction LRU quand le stockage dépasse sa taille maximale. La borne est souple :
+#   les images référencées par le catalogue courant ne sont jamais évincées, le stockage
+#   ne descend donc pas sous leur taille (un avertissement le signale) ;
+# - SmartWear_DB.json est réécrit avec les chemins locaux, puis ses copies .columns
+#   (et .sqlite si elle existe) sont régénérées pour rester synchronisées.
+#
+# Usage : python ImageStore.py [--workers 16] [--max-gb 5]
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from io import BytesIO
+
+import requests
+from PIL import Image, ImageOps
+
+from Catalog import columnar_path, current_version, sqlite_path, write_columnar, write_sqlite
+from Crawler import PoliteFetcher
+
+DB_PATH = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result\SmartWear_DB.json"
+STORE_DIR = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Images"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+}
+
+# Dérivés : nom -> (mode, taille). "fit" = carré recadré (entrée modèle), "thumb" = côté max (aperçu)
+DERIVATIVES = {
+    "224": ("fit", 224),
+    "512": ("thumb", 512),
+}
+
+
+class ImageStore:
+    """Images originales + dérivés, indexés par sha256 du contenu."""
+
+    def __init__(self, root=STORE_DIR, max_bytes=5 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, ext TEXT, size INTEGER, last_used REAL)")
+        self.conn.commit()
+
+    # ---- Chemins ----
+    def original_path(self, digest, ext):
+        return os.path.join(self.root, "originals", digest[:2], f"{digest}.{ext}")
+
+    def derivative_path(self, digest, name):
+        return os.path.join(self.root, name, digest[:2], f"{digest}.jpg")
+
+    def paths(self, digest, ext):
+        """Chemins locaux d'une image : {"original": ..., "224": ..., "512": ...}."""
+        out = {"original": self.original_path(digest, ext)}
+        out.update({name: self.derivative_path(digest, name) for name in DERIVATIVES})
+        return out
+
+    # ---- Index ----
+    def lookup(self, url):
+        """(hash, ext) si l'image de `url` est déjà complète sur disque, sinon None."""
+        row = self.conn.execute(
+            "SELECT u.hash, b.ext FROM urls u JOIN blobs b ON b.hash = u.hash WHERE u.url = ?", (url,)
+        ).fetchone()
+        if row and all(os.path.exists(p) for p in self.paths(*row).values()):
+            return row
+        return None
+
+    def register(self, url, digest, ext, size):
+        now = time.time()
+        self.conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, digest))
+        self.conn.execute(
+            "INSERT INTO blobs VALUES (?, ?, ?, ?) ON CONFLICT(hash) DO UPDATE SET last_used = excluded.last_used",
+            (digest, ext, size, now))
+
+    def touch(self, digest):
+        self.conn.execute("UPDATE blobs SET last_used = ? WHERE hash = ?", (time.time(), digest))
+
+    # ---- Écriture (appelée depuis les workers : uniquement des fichiers, pas de SQLite) ----
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{id(data)}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def store_bytes(self, data):
+        """Écrit l'original (si nouveau) et ses dérivés. Renvoie (hash, ext, taille totale)."""
+        digest = hashlib.sha256(data).hexdigest()
+        img = Image.open(BytesIO(data))
+        ext = (img.format or "jpg").lower().replace("jpeg", "jpg")
+
+        original = self.original_path(digest, ext)
+        if not os.path.exists(original):
+            self._write_atomic(original, data)
+        size = len(data)
+
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        for name, (mode, side) in DERIVATIVES.items():
+            path = self.derivative_path(digest, name)
+            if not os.path.exists(path):
+                if mode == "fit":
+                    derived = ImageOps.fit(img, (side, side), Image.LANCZOS)
+                else:
+                    derived = img.copy()
+                    derived.thumbnail((side, side), Image.LANCZOS)
+                buf = BytesIO()
+                derived.save(buf, "JPEG", quality=90)
+                self._write_atomic(path, buf.getvalue())
+            size += os.path.getsize(path)
+        return digest, ext, size
+
+    # ---- Éviction ----
+    def evict(self, keep=()):
+        """
+        Supprime les images les moins récemment utilisées au-delà de max_bytes, sauf celles
+        de `keep` : si elles dépassent à elles seules max_bytes, le stockage reste au-dessus.
+        """
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        evicted = 0
+        if total > self.max_bytes:
+            for digest, ext, size in self.conn.execute("SELECT hash, ext, size FROM blobs ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                if digest in keep:
+                    continue
+                for path in self.paths(digest, ext).values():
+                    if os.path.exists(path):
+                        os.remove(path)
+                self.conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+                self.conn.execute("DELETE FROM urls WHERE hash = ?", (digest,))
+                total -= size
+                evicted += 1
+        if total > self.max_bytes:
+            print(f"⚠️ Stockage à {total / 1024 ** 3:.2f} Go malgré l'éviction (max {self.max_bytes / 1024 ** 3:.2f} Go) : "
+                  f"les images du catalogue courant sont conservées.")
+        self.conn.commit()
+        return evicted
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def ingest(products, store, fetcher):
+    """
+    Télécharge en parallèle les images manquantes des `products` et ajoute à chaque
+    fiche `image_local` (original) et `image_derivatives` ({"224": ..., "512": ...}).
+    """
+    urls = sorted({p["image"] for p in products if p.get("image")})
+    known = {url: store.lookup(url) for url in urls}
+    todo = [url for url in urls if known[url] is None]
+    print(f"🖼️ {len(urls)} images uniques, {len(urls) - len(todo)} déjà en stock, {len(todo)} à télécharger...")
+
+    def download(url):
+        try:
+            r = fetcher.get(url, timeout=30)
+            if r.status_code != 200:
+                return url, None
+            return url, store.store_bytes(r.content)
+        except (requests.exceptions.RequestException, OSError) as e:
+            print(f"  ∟ ⚠️ {url} : {e}")
+            return url, None
+        except Exception as e:
+            # Image indécodable (bombe de décompression, format tronqué...) : seule cette URL est sautée
+            print(f"  ∟ ⚠️ {url} : {type(e).__name__} : {e}")
+            return url, None
+
+    done = 0
+    for url, stored in fetcher.imap(download, todo):
+        if stored:
+            digest, ext, size = stored
+            store.register(url, digest, ext, size)
+            known[url] = (digest, ext)
+            done += 1
+            if done % 100 == 0:
+                store.conn.commit()  # Point de reprise
+    store.conn.commit()
+
+    used = set()
+    for p in products:
+        entry = known.get(p.get("image"))
+        if not entry:
+            continue
+        digest, ext = entry
+        store.touch(digest)
+        used.add(digest)
+        paths = store.paths(digest, ext)
+        p["image_local"] = paths.pop("original")
+        p["image_derivatives"] = paths
+
+    evicted = store.evict(keep=used)
+    print(f"✅ {done} images téléchargées, {len(used)} images distinctes référencées, {evicted} évincées.")
+    return products
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stockage local des images du catalogue SmartWear")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--max-rps", type=float, default=8.0, help="Plafond de requêtes/s par hôte d'images")
+    parser.add_argument("--max-gb", type=float, default=5.0,
+                        help="Taille visée du stockage (les images du catalogue courant ne sont jamais évincées)")
+    args = parser.parse_args()
+
+    with open(args.db, "r", encoding="utf-8") as f:
+        products = json.load(f)
+
+    store = ImageStore(args.store, max_bytes=int(args.max_gb * 1024 ** 3))
+    fetcher = PoliteFetcher(HEADERS, workers=args.workers, max_rps_per_host=args.max_rps)
+    ingest(products, store, fetcher)
+    fetcher.close()
+    store.close()
+
+    with open(args.db, "w", encoding="utf-8") as f:
+        json.dump(products, f, indent=4, ensure_ascii=False)
+    print(f"📄 Chemins locaux ajoutés à : {args.db}")
+
+    # Copies dérivées du JSON : régénérées pour ne pas servir des fiches sans chemins locaux
+    write_columnar(products, columnar_path(args.db))
+    print(f"🗂️ Catalogue colonnaire régénéré : {columnar_path(args.db)}")
+    if current_version(sqlite_path(args.db)):
+        write_sqlite(products, sqlite_path(args.db))
+        print(f"🗂️ Catalogue SQLite régénéré : {sqlite_path(args.db)}")
@@ -0,0 +1,119 @@
+# LookCache.py
+# Cache disque des images de looks générées, adressé par le prompt.
+# - clé = sha256 du prompt normalisé (casse, espaces) + paramètres de génération
+#   (modèle, largeur, hauteur) + URL du générateur : un même look n'est généré qu'une
+#   fois par générateur (un serveur de test ne pollue pas le cache de production) ;
+# - les octets bruts du générateur sont stockés tels quels (pas de ré-encodage PIL) ;
+# - éviction LRU quand le cache dépasse sa taille maximale ;
+# - compteurs de hits / misses cumulés pour suivre le taux de réussite.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+CACHE_DIR = r"C:\Users\Ivin\Documents\SmartWear\Prediction\LookCache"
+
+
+def normalize_prompt(prompt):
+    return " ".join(unicodedata.normalize("NFC", prompt).casefold().split())
+
+
+def look_key(prompt, params, endpoint):
+    payload = {"prompt": normalize_prompt(prompt), "endpoint": endpoint, **{k: str(v) for k, v in params.items()}}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class LookCache:
+    """Index SQLite (clé -> fichier, taille, dernier accès) + un fichier par image. Partageable entre threads."""
+
+    def __init__(self, root=CACHE_DIR, max_bytes=1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS looks (key TEXT PRIMARY KEY, ext TEXT, size INTEGER, last_used REAL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)")
+        self.conn.commit()
+
+    def path(self, key, ext):
+        return os.path.join(self.root, key[:2], f"{key}.{ext}")
+
+    def get(self, key):
+        """Chemin de l'image en cache pour `key`, ou None (compte un hit ou un miss)."""
+        with self.lock:
+            row = self.conn.execute("SELECT ext FROM looks WHERE key = ?", (key,)).fetchone()
+            if row and os.path.exists(self.path(key, row[0])):
+                self.hits += 1
+                self.conn.execute("UPDATE looks SET last_used = ? WHERE key = ?", (time.time(), key))
+                return self.path(key, row[0])
+            self.misses += 1
+            return None
+
+    def put(self, key, body, ext="png"):
+        """Stocke les octets bruts d'une image générée. Renvoie son chemin."""
+        path = self.path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO looks VALUES (?, ?, ?, ?)", (key, ext, len(body), time.time()))
+            self._evict(keep=(key,))
+        return path
+
+    def evict(self, keep=()):
+        """Supprime les images les moins récemment utilisées au-delà de max_bytes."""
+        with self.lock:
+            return self._evict(keep)
+
+    def _evict(self, keep=()):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM looks").fetchone()[0]
+        evicted = 0
+        if total > self.max_bytes:
+            for key, ext, size in self.conn.execute("SELECT key, ext, size FROM looks ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                if key in keep:
+                    continue
+                if os.path.exists(self.path(key, ext)):
+                    os.remove(self.path(key, ext))
+                self.conn.execute("DELETE FROM looks WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        self.conn.commit()
+        return evicted
+
+    def report(self):
+        """Taux de hits de la session et cumulé, volume du cache."""
+        with self.lock:
+            for name, value in (("hits", self.hits), ("misses", self.misses)):
+                self.conn.execute("INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                                  (name, value))
+            self.conn.commit()
+            self.hits = self.misses = 0
+            stats = dict(self.conn.execute("SELECT name, value FROM stats").fetchall())
+            count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM looks").fetchone()
+        return stats, count, size
+
+    def print_report(self):
+        session = self.hits + self.misses
+        rate = f"{self.hits / session * 100:.0f} %" if session else "n/d"
+        print(f"🗃️ Cache des looks : {self.hits}/{session} hits cette session ({rate})", end="")
+        stats, count, size = self.report()
+        total = stats.get("hits", 0) + stats.get("misses", 0)
+        if total:
+            print(f", {stats.get('hits', 0) / total * 100:.0f} % cumulé", end="")
+        print(f" — {count} images, {size / 1024 / 1024:.1f} Mo")
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
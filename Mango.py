@@ -1,19 +1,30 @@
-import requests
 from bs4 import BeautifulSoup
-import json
+import argparse
 import os
 import re
-import time
-import random
+
+from Crawler import PoliteFetcher
+from HttpCache import HttpCache
+from Extraction import FieldStats, product_from_json_ld
+from Stream import JsonlSink
+import Fixtures
 
 class MangoGlobalScraper:
-    def __init__(self):
+    def __init__(self, workers=8, max_rps=4.0, use_cache=True):
         self.base_url = "https://shop.mango.com"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept-Language": "fr-FR,fr;q=0.9"
         }
         self.output_path = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result\Mango.json"
+        # Flux JSONL écrit au fil de l'eau (+ checkpoint) d'où est reconstruit Mango.json
+        self.stream_path = os.path.splitext(self.output_path)[0] + ".jsonl"
+
+        # Téléchargements concurrents, plafonnés à `max_rps` requêtes/s sur shop.mango.com
+        self.fetcher = PoliteFetcher(self.headers, workers=workers, max_rps_per_host=max_rps)
+        # Cache conditionnel (ETag/Last-Modified) partagé avec Nike.py
+        self.cache = HttpCache() if use_cache else None
+        self.field_stats = FieldStats()
 
     def clean_product_name(self, raw_name, url):
         """Corrige les noms parasites en extrayant le nom réel depuis l'URL."""
@@ -28,52 +39,78 @@ class MangoGlobalScraper:
         return raw_name
 
     def get_detailed_data(self, url):
-        """Extraction approfondie sur la page produit."""
+        """Extraction approfondie sur la page produit (via le cache HTTP si actif)."""
         try:
-            time.sleep(random.uniform(0.5, 1.0))
-            res = requests.get(url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(res.text, 'html.parser')
-            
-            # 1. Vrai Prix (Final Price)
-            price = None
-            p_tag = soup.find('span', class_=re.compile(r"finalPrice|SinglePrice_finalPrice", re.I))
-            if not p_tag: p_tag = soup.find('span', class_=re.compile(r"SinglePrice_center", re.I))
-            if p_tag:
-                price = float(re.sub(r'[^\d,.]', '', p_tag.get_text()).replace(',', '.'))
-
-            # 2. Couleur (Alt de l'image sélectionnée)
-            color = None
-            sel = soup.find('span', class_=re.compile(r"selected", re.I))
-            if sel and sel.find('img'):
-                color = sel.find('img').get('alt', '').replace('Couleur ', '').replace(' sélectionnée', '').strip()
-
-            # 3. Tailles Disponibles (Exclut les notifyMe)
-            sizes = []
-            items = soup.find_all(['div', 'button'], class_=re.compile(r"sizeItem|sizePicker", re.I))
-            for item in items:
-                if not item.find(class_=re.compile(r"notifyMe|unavailable", re.I)):
-                    s_tag = item.find(class_=re.compile(r"textActionM|size-label", re.I))
-                    if s_tag:
-                        val = s_tag.get_text(strip=True)
-                        if val and val not in sizes: sizes.append(val)
-            
-            # 4. Description courte
-            desc = ""
-            desc_meta = soup.find('meta', {'property': 'og:description'})
-            if desc_meta: desc = desc_meta['content']
-
-            return color, sizes, price, desc
+            if self.cache:
+                return tuple(self.cache.fetch(self.fetcher, url, self.parse_detail_page, timeout=10))
+            return self.parse_detail_page(self.fetcher.get(url, timeout=10))
         except:
             return None, [], None, ""
 
-    def scrape_category(self, url, genre, p_type):
+    def parse_detail_page(self, res):
+        """Parse la réponse d'une page produit : (couleur, tailles, prix, description)."""
+        # Chemin rapide : JSON-LD embarqué, une seule passe sur les balises <script>
+        fast = product_from_json_ld(res.text)
+        price = fast.get("price")
+        color = fast.get("color")
+        sizes = [s["size"] for s in fast.get("sizes", []) if s["available"]]
+        desc = fast.get("description", "")
+
+        # Repli BeautifulSoup, uniquement pour les champs manquants
+        found = {"price": price is not None, "color": bool(color), "sizes": bool(sizes), "description": bool(desc)}
+        for field, from_fast in found.items():
+            self.field_stats.record(field, from_fast)
+
+        if not all(found.values()):
+            soup = BeautifulSoup(res.text, 'html.parser')
+            if not found["price"]: price = self._soup_price(soup)
+            if not found["color"]: color = self._soup_color(soup)
+            if not found["sizes"]: sizes = self._soup_sizes(soup)
+            if not found["description"]: desc = self._soup_description(soup)
+
+        return color, sizes, price, desc
+
+    def _soup_price(self, soup):
+        # 1. Vrai Prix (Final Price)
+        p_tag = soup.find('span', class_=re.compile(r"finalPrice|SinglePrice_finalPrice", re.I))
+        if not p_tag: p_tag = soup.find('span', class_=re.compile(r"SinglePrice_center", re.I))
+        if p_tag:
+            return float(re.sub(r'[^\d,.]', '', p_tag.get_text()).replace(',', '.'))
+        return None
+
+    def _soup_color(self, soup):
+        # 2. Couleur (Alt de l'image sélectionnée)
+        sel = soup.find('span', class_=re.compile(r"selected", re.I))
+        if sel and sel.find('img'):
+            return sel.find('img').get('alt', '').replace('Couleur ', '').replace(' sélectionnée', '').strip()
+        return None
+
+    def _soup_sizes(self, soup):
+        # 3. Tailles Disponibles (Exclut les notifyMe)
+        sizes = []
+        items = soup.find_all(['div', 'button'], class_=re.compile(r"sizeItem|sizePicker", re.I))
+        for item in items:
+            if not item.find(class_=re.compile(r"notifyMe|unavailable", re.I)):
+                s_tag = item.find(class_=re.compile(r"textActionM|size-label", re.I))
+                if s_tag:
+                    val = s_tag.get_text(strip=True)
+                    if val and val not in sizes: sizes.append(val)
+        return sizes
+
+    def _soup_description(self, soup):
+        # 4. Description courte
+        desc_meta = soup.find('meta', {'property': 'og:description'})
+        return desc_meta['content'] if desc_meta else ""
+
+    def scrape_category(self, url, genre, p_type, sink=None):
+        """Scrape une catégorie ; chaque produit est écrit dans `sink` dès qu'il est parsé. None en cas d'erreur."""
         print(f"📡 Analyse : {genre} > {p_type}")
         try:
-            response = requests.get(url, headers=self.headers, timeout=20)
+            response = self.fetcher.get(url, timeout=20)
             soup = BeautifulSoup(response.text, 'html.parser')
             
             links = soup.find_all('a', href=re.compile(r'/p/'))
-            cat_results = []
+            entries = []
             seen_urls = set()
 
             for l in links:
@@ -83,6 +120,8 @@ class MangoGlobalScraper:
 
                 if clean_url in seen_urls: continue
                 seen_urls.add(clean_url)
+                # Déjà dans le flux (relance --resume)
+                if sink and sink.is_done(genre, p_type, clean_url): continue
 
                 # Extraction du nom brut
                 name_tag = l.find(['p', 'span']) or l.find_next(['p', 'span'])
@@ -95,11 +134,19 @@ class MangoGlobalScraper:
                 img_tag = l.find('img')
                 image_url = img_tag.get('src') if img_tag else None
 
-                print(f"  ∟ {name}...")
-                color, sizes, price, desc = self.get_detailed_data(clean_url)
+                entries.append((name, image_url, clean_url))
+
+            # Pages produit téléchargées en parallèle (ordre des résultats conservé)
+            def fetch(entry):
+                print(f"  ∟ {entry[0]}...")
+                return self.get_detailed_data(entry[2])
 
+            details = self.fetcher.imap(fetch, entries)
+
+            cat_results = []
+            for (name, image_url, clean_url), (color, sizes, price, desc) in zip(entries, details):
                 if price or sizes:
-                    cat_results.append({
+                    record = {
                         "name": name,
                         "price_value": price,
                         "currency": "EUR",
@@ -113,13 +160,15 @@ class MangoGlobalScraper:
                         "genre": genre,
                         "type": p_type,
                         "url": clean_url
-                    })
+                    }
+                    if sink: sink.write(record)
+                    cat_results.append(record)
             return cat_results
         except Exception as e:
             print(f"⚠️ Erreur catégorie: {e}")
-            return []
+            return None
 
-    def run(self):
+    def run(self, resume=False):
         catalog = [
             ("Femme", "Pulls", "https://shop.mango.com/fr/fr/c/femme/pulls-et-cardigans_f9a8c868"),
             ("Femme", "Manteaux", "https://shop.mango.com/fr/fr/c/femme/manteau_d1b967bc"),
@@ -139,17 +188,37 @@ class MangoGlobalScraper:
             ("Enfants Garçon", "T-shirts", "https://shop.mango.com/fr/fr/c/enfants/garcon/t-shirts_d4d4580c"),
         ]
 
-        all_data = []
+        sink = JsonlSink(self.stream_path, resume=resume)
         for genre, p_type, url in catalog:
-            category_data = self.scrape_category(url, genre, p_type)
-            all_data.extend(category_data)
+            category = f"{genre} > {p_type}"
+            if sink.category_done(category):
+                print(f"⏭️ Déjà terminée : {category}")
+                continue
+            category_data = self.scrape_category(url, genre, p_type, sink)
+            if category_data is None:
+                continue  # Catégorie non validée : elle sera reprise au prochain --resume
+            sink.complete_category(category)
             print(f"✅ {len(category_data)} produits ajoutés.")
 
-        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
-        with open(self.output_path, "w", encoding="utf-8") as f:
-            json.dump(all_data, f, indent=4, ensure_ascii=False)
+        # Mango.json reconstruit depuis le flux, sans charger tout le catalogue
+        total = sink.materialize(self.output_path)
+        sink.close()
         
-        print(f"\n✨ BASE DE DONNÉES COMPLÈTE & NETTOYÉE : {len(all_data)} produits.")
+        self.fetcher.close()
+        print(self.field_stats.report())
+        if self.cache:
+            print(self.cache.report())
+            self.cache.close()
+        print(f"\n✨ BASE DE DONNÉES COMPLÈTE & NETTOYÉE : {total} produits.")
 
 if __name__ == "__main__":
-    MangoGlobalScraper().run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scraper du catalogue Mango")
+    parser.add_argument("--resume", action="store_true", help="Reprend un scraping interrompu (catégories et produits déjà écrits ignorés)")
+    parser.add_argument("--fixtures", choices=["record", "replay"], help="Enregistre les réponses HTTP ou les rejoue hors ligne")
+    parser.add_argument("--archive", default=Fixtures.DEFAULT_ARCHIVE, help="Archive des réponses HTTP")
+    args = parser.parse_args()
+
+    scraper = MangoGlobalScraper()
+    archive = Fixtures.install(scraper.fetcher, args.fixtures, args.archive) if args.fixtures else None
+    scraper.run(resume=args.resume)
+    if archive: archive.close()
\ No newline at end of file
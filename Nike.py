@@ -1,11 +1,15 @@
 import requests
 from bs4 import BeautifulSoup
-import json
-import time
-import random
+import argparse
 import re
 import os
 
+from Crawler import PoliteFetcher
+from HttpCache import HttpCache
+from Extraction import FieldStats, find_key, next_data, product_from_json_ld
+from Stream import JsonlSink
+import Fixtures
+
 # --- Constantes Globales ---
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
@@ -15,6 +19,48 @@ BASE_URL = "https://www.nike.com"
 
 # Chemins de sortie centralisés
 OUTPUT_RESULT_DIR = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result"
+# Flux JSONL (+ checkpoint) d'où sont reconstruits les fichiers *_Nike.json
+STREAM_PATH = os.path.join(OUTPUT_RESULT_DIR, "Nike.jsonl")
+
+ALL_CATEGORIES_TO_SCRAPE = {
+    "Chaussures": {
+        "Homme": "https://www.nike.com/fr/w/hommes-chaussures-nik1zy7ok",
+        "Femme": "https://www.nike.com/fr/w/femmes-chaussures-5e1x6zy7ok"
+    },
+    "Vêtements": {
+        "Homme": "https://www.nike.com/fr/w/hommes-vetements-6ymx6znik1",
+        "Femme": "https://www.nike.com/fr/w/femmes-vetements-5e1x6z6ymx6"
+    }
+}
+
+# Téléchargement : pool de connexions partagé, N workers, budget global de requêtes/s
+WORKERS = 4
+MAX_RPS = 1.0
+
+# Cache conditionnel des pages produit (partagé avec Mango.py)
+USE_CACHE = True
+
+_fetcher = None
+_cache = None
+SHARED_CACHE = object()  # Valeur par défaut de `cache` : cache partagé ; cache=None le désactive pour un appel
+
+# Champs d'une page produit et compteurs chemin rapide / repli soup
+PAGE_FIELDS = ["name", "price_value", "currency", "description", "color", "rating", "sizes", "fit_details", "image"]
+FIELD_STATS = FieldStats()
+
+def get_fetcher():
+    """Fetcher partagé (keep-alive) utilisé par toutes les requêtes Nike."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = PoliteFetcher(HEADERS, workers=WORKERS, max_rps_per_host=MAX_RPS, max_rps_total=MAX_RPS)
+    return _fetcher
+
+def get_cache():
+    """Cache HTTP partagé, ou None si désactivé."""
+    global _cache
+    if _cache is None and USE_CACHE:
+        _cache = HttpCache()
+    return _cache
 
 
 # =====================================================================
@@ -61,53 +107,164 @@ def classify_clothing(name, description):
 # =====================================================================
 # 1. Scrape une page produit Nike 
 # =====================================================================
-def scrape_product(product_url, genre, product_type):
+def scrape_product(product_url, genre, product_type, fetcher=None, cache=SHARED_CACHE):
     """Scrape les détails d'un produit unique (avec genre et type d'article)."""
+    page = fetch_product_page(product_url, fetcher, cache)
+    if page is None:
+        return None
+    return build_record(page, product_url, genre, product_type)
+
+
+def fetch_product_page(product_url, fetcher=None, cache=SHARED_CACHE):
+    """Champs de la page produit (via le cache HTTP si actif), ou None."""
+    fetcher = fetcher or get_fetcher()
+    if cache is SHARED_CACHE:
+        cache = get_cache()
     
     try:
-        r = requests.get(product_url, headers=HEADERS, timeout=15) 
+        if cache:
+            return cache.fetch(fetcher, product_url, parse_product_page, timeout=15)
+        return parse_product_page(fetcher.get(product_url, timeout=15))
     except requests.exceptions.RequestException:
         return None
 
-    if r.status_code != 200:
-        return None
 
-    soup = BeautifulSoup(r.text, "html.parser")
+def build_record(page, product_url, genre, product_type):
+    """Fiche produit finale à partir des champs de page."""
+    # Classification automatique pour les VÊTEMENTS
+    category_auto = classify_clothing(page["name"], page["description"]) if product_type == "Vêtements" else product_type
+    
+
+    return {
+        "name": page["name"],
+        "price_value": page["price_value"],
+        "currency": page["currency"],
+        "description": page["description"],
+        "color": page["color"],       
+        "rating": page["rating"],     
+        "sizes": page["sizes"], 
+        "fit_details": page["fit_details"], # Détaillée sur les vêtements
+        "category_auto": category_auto, 
+        "image": page["image"],
+        "url": product_url,
+        "genre": genre,
+        "type": product_type # Chaussures ou Vêtements
+    }
+
 
-    # --- Initialisation ---
-    name, price_value, currency, description, color, rating = "Inconnu", None, None, "Aucune description", "Couleur inconnue", None
-    available_sizes, fit_details = [], []
-    image_url = None
-    price_raw = None 
+def parse_product_page(r):
+    """Parse la réponse d'une page produit (champs indépendants du genre / type)."""
+    if r.status_code != 200:
+        return None
 
-    # ---- Extraction des données (simplifiée pour la concision) ----
+    # Chemin rapide : JSON d'hydratation + JSON-LD, sans construire l'arbre HTML
+    try:
+        page = _fast_product_fields(r.text)
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        # Données d'hydratation inattendues (prix non numérique, titre null...) : tout passe par le HTML
+        print(f"  ∟ ⚠️ Données structurées illisibles ({type(e).__name__}) : extraction HTML.")
+        page = {}
+    missing = [field for field in PAGE_FIELDS if field not in page]
+    for field in PAGE_FIELDS:
+        FIELD_STATS.record(field, field not in missing)
+
+    # Repli BeautifulSoup pour les seuls champs absents des données structurées
+    if missing:
+        soup = BeautifulSoup(r.text, "html.parser")
+        for key, extractor in SOUP_EXTRACTORS.items():
+            fields = (key,) if isinstance(key, str) else key
+            if not any(field in missing for field in fields):
+                continue
+            values = extractor(soup) if len(fields) > 1 else (extractor(soup),)
+            for field, value in zip(fields, values):
+                if field in missing:
+                    page[field] = value
+
+    return {field: page[field] for field in PAGE_FIELDS}
+
+
+def _fast_product_fields(html):
+    """Champs trouvés dans __NEXT_DATA__ (selectedProduct) puis complétés par le JSON-LD."""
+    fields = {}
+
+    product = find_key(next_data(html) or {}, "selectedProduct")
+    if isinstance(product, dict):
+        info = product.get("productInfo") or {}
+        prices = product.get("prices") or {}
+        if info.get("title"): fields["name"] = info["title"].strip()
+        if prices.get("currentPrice") is not None:
+            fields["price_value"] = float(prices["currentPrice"])
+            if prices.get("currency"): fields["currency"] = prices["currency"]
+        if info.get("productDescription"): fields["description"] = info["productDescription"].strip()
+        if product.get("colorDescription"): fields["color"] = product["colorDescription"].strip()
+        if product.get("sizes"):
+            fields["sizes"] = [
+                {"size": (s.get("localizedLabel") or s.get("label") or "").strip(), "available": s.get("status") == "ACTIVE"}
+                for s in product["sizes"] if (s.get("localizedLabel") or s.get("label") or "").strip()
+            ]
+        images = product.get("contentImages") or []
+        if images:
+            url = find_key(images[0], "url")
+            if url: fields["image"] = url
+
+    ld = product_from_json_ld(html)
+    for field, key in (("name", "name"), ("price_value", "price"), ("currency", "currency"),
+                       ("description", "description"), ("color", "color"), ("rating", "rating"),
+                       ("sizes", "sizes"), ("image", "image")):
+        if field not in fields and key in ld:
+            fields[field] = ld[key]
+
+    # Pas d'accordéon "Taille et coupe" dans la page : rien à extraire, inutile de parser le HTML
+    if "pdp-info-accordions__size-fit-accordion" not in html:
+        fields["fit_details"] = []
+    # La note n'est présente que si le produit a des avis
+    if "rating" not in fields and "reviews-summary-rating" not in html:
+        fields["rating"] = None
+
+    return fields
+
+
+# ---- Extraction historique par parcours de l'arbre BeautifulSoup (un extracteur par champ) ----
+
+def _soup_name(soup):
     name_tag = soup.find("h1")
-    name = name_tag.get_text(strip=True) if name_tag else "Inconnu"
+    return name_tag.get_text(strip=True) if name_tag else "Inconnu"
 
+def _soup_price(soup):
+    """(valeur, monnaie) lues dans le bloc prix."""
     price_elem = soup.find(attrs={"data-testid": "currentPrice-container"}) or soup.find(id="price-container")
-    if price_elem: price_raw = price_elem.get_text(" ", strip=True)
-    if price_raw:
-        val, curr, _ = parse_price_text(price_raw)
-        price_value = val
-        currency = currency or curr
-
+    price_raw = price_elem.get_text(" ", strip=True) if price_elem else None
+    if not price_raw:
+        return None, None
+    val, curr, _ = parse_price_text(price_raw)
+    return val, curr
+
+def _soup_description(soup):
+    description = "Aucune description"
     desc_container = soup.find("div", {"id": "product-description-container"})
     if desc_container:
         desc_elem = desc_container.find(attrs={"data-testid": "product-description"})
         description = desc_elem.get_text(" ", strip=True) if desc_elem else description
-    
+    return description
+
+def _soup_color(soup):
     color_elem = soup.find(attrs={"data-testid": "product-description-color-description"})
     if color_elem:
         raw_color_text = color_elem.get_text(" ", strip=True)
-        color = raw_color_text.replace("Couleur affichée :", "").strip()
-    
+        return raw_color_text.replace("Couleur affichée :", "").strip()
+    return "Couleur inconnue"
+
+def _soup_rating(soup):
     rating_elem = soup.find(attrs={"data-testid": "reviews-summary-rating"})
     if rating_elem:
         rating_text = rating_elem.get_text(" ", strip=True).replace('\xa0', ' ').replace('\u202f', ' ').strip()
         rating_match = re.search(r'(\d+[.,]\d+)', rating_text)
-        if rating_match: rating = float(rating_match.group(1).replace(',', '.'))
-            
+        if rating_match: return float(rating_match.group(1).replace(',', '.'))
+    return None
+
+def _soup_sizes(soup):
     # Tailles (commune aux chaussures et vêtements)
+    available_sizes = []
     size_items = soup.find_all(attrs={"data-testid": "pdp-grid-selector-item"})
     for item in size_items:
         is_disabled = 'disabled' in item.get('class', [])
@@ -117,8 +274,11 @@ def scrape_product(product_url, genre, product_type):
         if size_text and not size_text.isspace():
             cleaned_size = size_text.strip()
             if cleaned_size: available_sizes.append({"size": cleaned_size, "available": not is_disabled})
+    return available_sizes
 
+def _soup_fit_details(soup):
     # Fit Details (Pour les vêtements)
+    fit_details = []
     fit_accordion = soup.find(attrs={"data-testid": "pdp-info-accordions__size-fit-accordion"})
     if fit_accordion:
         ul_tag = fit_accordion.find('ul') 
@@ -126,45 +286,40 @@ def scrape_product(product_url, genre, product_type):
             for li in ul_tag.find_all('li'):
                 text = li.get_text(" ", strip=True)
                 if text and "Guide des tailles" not in text: fit_details.append(text)
+    return fit_details
 
+def _soup_image(soup):
     # Image (Fallback HTML)
-    if not image_url:
-        img_tag = soup.find("img", {"alt": True})
-        image_url = img_tag["src"] if img_tag and img_tag.get("src") else None
-
-    # Classification automatique pour les VÊTEMENTS
-    category_auto = classify_clothing(name, description) if product_type == "Vêtements" else product_type
-    
-
-    return {
-        "name": name,
-        "price_value": price_value,
-        "currency": currency,
-        "description": description,
-        "color": color,       
-        "rating": rating,     
-        "sizes": available_sizes, 
-        "fit_details": fit_details, # Détaillée sur les vêtements
-        "category_auto": category_auto, 
-        "image": image_url,
-        "url": product_url,
-        "genre": genre,
-        "type": product_type # Chaussures ou Vêtements
-    }
+    img_tag = soup.find("img", {"alt": True})
+    return img_tag["src"] if img_tag and img_tag.get("src") else None
+
+# Champ (ou tuple de champs remplis ensemble) -> extracteur ; le bloc prix n'est parcouru qu'une fois
+SOUP_EXTRACTORS = {
+    "name": _soup_name,
+    ("price_value", "currency"): _soup_price,
+    "description": _soup_description,
+    "color": _soup_color,
+    "rating": _soup_rating,
+    "sizes": _soup_sizes,
+    "fit_details": _soup_fit_details,
+    "image": _soup_image,
+}
 
 
 # =====================================================================
 # 2. Scrape une page catalogue Nike
 # =====================================================================
-def scrape_catalogue(catalogue_url, genre, product_type):
+def scrape_catalogue(catalogue_url, genre, product_type, fetcher=None, sink=None):
+    """Scrape un catalogue ; chaque produit est écrit dans `sink` dès qu'il est parsé. None si la page est inaccessible."""
+    fetcher = fetcher or get_fetcher()
     
     try:
-        r = requests.get(catalogue_url, headers=HEADERS, timeout=20) 
+        r = fetcher.get(catalogue_url, timeout=20) 
     except requests.exceptions.RequestException:
-        return []
+        return None
 
     if r.status_code != 200:
-        return []
+        return None
 
     soup = BeautifulSoup(r.text, "html.parser")
     unique_product_urls = set()
@@ -180,84 +335,229 @@ def scrape_catalogue(catalogue_url, genre, product_type):
     unique_product_urls.update(hrefs_from_regex)
     
     # --- PHASE 2: SCRAPING DES DÉTAILS ---
+    # Ordre trié : le mode parallèle renvoie exactement les mêmes résultats que le mode série
+    urls_to_scrape = sorted(unique_product_urls)
+    # Déjà dans le flux (relance --resume)
+    if sink:
+        urls_to_scrape = [u for u in urls_to_scrape if not sink.is_done(genre, product_type, u)]
+
+    # Le budget de requêtes/s du fetcher remplace la pause fixe après chaque produit
     products = []
-    urls_to_scrape = list(unique_product_urls)
-    
-    for product_url in urls_to_scrape:
-        # Passage du genre et du type d'article
-        details = scrape_product(product_url, genre, product_type)
+    for details in fetcher.imap(lambda product_url: scrape_product(product_url, genre, product_type, fetcher), urls_to_scrape):
         if details:
+            if sink: sink.write(details)
             products.append(details)
-
-        time.sleep(random.uniform(5, 10)) 
         
     return products
 
 
 # =====================================================================
-# 3. FONCTION D'EXÉCUTION PRINCIPALE (COMBINÉE)
+# 2 bis. Ingestion par le flux JSON paginé du catalogue
 # =====================================================================
-def main_scraper():
-    
-    ALL_CATEGORIES_TO_SCRAPE = {
-        "Chaussures": {
-            "Homme": "https://www.nike.com/fr/w/hommes-chaussures-nik1zy7ok",
-            "Femme": "https://www.nike.com/fr/w/femmes-chaussures-5e1x6zy7ok"
-        },
-        "Vêtements": {
-            "Homme": "https://www.nike.com/fr/w/hommes-vetements-6ymx6znik1",
-            "Femme": "https://www.nike.com/fr/w/femmes-vetements-5e1x6z6ymx6"
-        }
+# La page catalogue embarque la première page du "product wall" (__NEXT_DATA__ ->
+# Wall.productGroupings) et le lien vers la suivante ; chaque page de l'API renvoie
+# des dizaines de produits avec nom, prix, couleur et image (le sous-titre sert de
+# description). Tailles, coupe, description complète et note n'y figurent pas : la page
+# produit n'est demandée que pour les champs listés dans `detail_fields` (aucun par
+# défaut, soit environ une requête par page du flux au lieu d'une par produit).
+
+API_BASE_URL = "https://api.nike.com"
+API_HEADERS = {"nike-api-caller-id": "com.nike.commerce.nikedotcom.web"}
+FEED_MAX_PAGES = 50
+
+def _page_defaults():
+    """Valeurs par défaut identiques à l'extraction HTML."""
+    return {
+        "name": "Inconnu", "price_value": None, "currency": None, "description": "Aucune description",
+        "color": "Couleur inconnue", "rating": None, "sizes": [], "fit_details": [], "image": None,
     }
-    
-    all_combined_results = {}
+
+
+def _feed_item(product):
+    """Champs disponibles dans une entrée du flux (mêmes noms que PAGE_FIELDS)."""
+    pdp = product.get("pdpUrl")
+    url = (pdp.get("url") if isinstance(pdp, dict) else pdp) or product.get("url")
+    if not url:
+        return None
+    url = BASE_URL + url if url.startswith("/") else url
+
+    copy = product.get("copy") or {}
+    prices = product.get("prices") or product.get("price") or {}
+    colors = product.get("displayColors") or {}
+    images = product.get("colorwayImages") or product.get("images") or {}
+
+    item = {"url": url}
+    title = copy.get("title") or product.get("title")
+    if title: item["name"] = title.strip()
+    price = prices.get("currentPrice")
+    if price is not None:
+        item["price_value"] = float(price)
+        if prices.get("currency"): item["currency"] = prices["currency"]
+    color = colors.get("colorDescription") or product.get("colorDescription")
+    if color: item["color"] = color.strip()
+    image = images.get("portraitURL") or images.get("squarishURL") or images.get("portraitImg")
+    if image: item["image"] = image
+    subtitle = copy.get("subTitle") or product.get("subtitle")
+    if subtitle: item["subtitle"] = subtitle.strip()
+    return item
+
+
+def _feed_page(data):
+    """(produits, lien de la page suivante) d'une page du flux ou de l'état initial du catalogue."""
+    wall = find_key(data, "Wall") or data
+    groupings = wall.get("productGroupings") or []
+    products = [p for group in groupings for p in (group.get("products") or [])]
+    products += wall.get("products") or []
+    next_link = (wall.get("pages") or wall.get("pageData") or {}).get("next")
+    return products, next_link
+
+
+def iter_feed_products(catalogue_url, fetcher, max_pages=FEED_MAX_PAGES, stats=None):
+    """
+    Parcourt toutes les pages du flux d'un catalogue. None si la page catalogue est inaccessible.
+    `stats["feed_pages"]` reçoit le nombre de requêtes faites.
+    """
+    stats = {} if stats is None else stats
+    try:
+        r = fetcher.get(catalogue_url, timeout=20)
+    except requests.exceptions.RequestException:
+        return None
+    if r.status_code != 200:
+        return None
+
+    items = []
+    products, next_link = _feed_page(next_data(r.text) or {})
+    stats["feed_pages"] = 1
+    while True:
+        items.extend(i for i in map(_feed_item, products) if i)
+        # Plafond atteint : la page suivante ne serait pas lue, inutile de la demander
+        if not next_link or stats["feed_pages"] >= max_pages:
+            break
+        try:
+            r = fetcher.get(API_BASE_URL + next_link, timeout=20, headers=API_HEADERS)
+            stats["feed_pages"] += 1
+            products, next_link = _feed_page(r.json()) if r.status_code == 200 else ([], None)
+        except (requests.exceptions.RequestException, ValueError):
+            break
+    return items
+
+
+def scrape_catalogue_feed(catalogue_url, genre, product_type, fetcher=None, sink=None, detail_fields=()):
+    """
+    Variante de scrape_catalogue alimentée par le flux JSON (toutes les pages).
+    `detail_fields` : champs à compléter par la page produit quand le flux ne les fournit pas
+    (ex. ("sizes", "fit_details")) ; chaque produit concerné coûte alors une requête de plus.
+    Les autres champs absents gardent leur valeur par défaut.
+    """
+    fetcher = fetcher or get_fetcher()
+    stats = {}
+    items = iter_feed_products(catalogue_url, fetcher, stats=stats)
+    if items is None:
+        return None
+
+    # Dédoublonnage par URL, ordre trié comme en mode HTML
+    unique = {}
+    for item in items:
+        unique.setdefault(item["url"], item)
+    feed_items = [unique[u] for u in sorted(unique)]
+    if sink:
+        feed_items = [i for i in feed_items if not sink.is_done(genre, product_type, i["url"])]
+
+    def build(item):
+        page = _page_defaults()
+        if item.get("subtitle"): page["description"] = item["subtitle"]
+        page.update({k: v for k, v in item.items() if k in PAGE_FIELDS})
+        missing = [f for f in detail_fields if f not in item]
+        if missing:
+            details = fetch_product_page(item["url"], fetcher)
+            detail_requests.append(item["url"])
+            if details:
+                page.update({f: details[f] for f in missing})
+        return build_record(page, item["url"], genre, product_type)
+
+    detail_requests = []
+    products = []
+    for record in fetcher.imap(build, feed_items):
+        if sink: sink.write(record)
+        products.append(record)
+    print(f"📡 {len(products)} produits : {stats['feed_pages']} page(s) de flux + "
+          f"{len(detail_requests)} page(s) produit")
+    return products
+
+
+# =====================================================================
+# 3. FONCTION D'EXÉCUTION PRINCIPALE (COMBINÉE)
+# =====================================================================
+def main_scraper(sink, ingestion="html", detail_fields=()):
+    """
+    Scrape toutes les catégories dans `sink` ; les sous-catégories déjà terminées sont sautées.
+    ingestion : "html" (liens de la 1re page + une page par produit) ou "feed" (flux JSON paginé,
+    pages produit seulement pour les `detail_fields` absents du flux).
+    """
 
     for product_type, gender_urls in ALL_CATEGORIES_TO_SCRAPE.items():
-        type_results = []
         
         for genre, url in gender_urls.items():
+            category = f"{product_type} > {genre}"
+            if sink.category_done(category):
+                print(f"--- Déjà terminé : {product_type} ({genre}) ---")
+                continue
+
             print(f"--- Démarrage du scraping : {product_type} ({genre}) ---")
             
             # Scrape_catalogue reçoit le genre et le type d'article
-            results_category = scrape_catalogue(url, genre, product_type) 
-            type_results.extend(results_category)
+            if ingestion == "html":
+                results_category = scrape_catalogue(url, genre, product_type, sink=sink) 
+            else:
+                results_category = scrape_catalogue_feed(url, genre, product_type, sink=sink, detail_fields=detail_fields)
+            if results_category is None:
+                print(f"⚠️ Catalogue inaccessible : {url}")
+                continue  # Non validée : reprise au prochain --resume
+            sink.complete_category(category)
             
             print(f"--- {len(results_category)} articles trouvés pour {genre} ({product_type}). ---")
-            
-            # Pause après chaque sous-catégorie
-            time.sleep(random.uniform(10, 20))
-            
-        all_combined_results[product_type] = type_results
-        
-    return all_combined_results
 
 
 # =====================================================================
 # 4. Exécution et Sauvegarde Silencieuse
 # =====================================================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper du catalogue Nike")
+    parser.add_argument("--resume", action="store_true", help="Reprend un scraping interrompu (catégories et produits déjà écrits ignorés)")
+    parser.add_argument("--fixtures", choices=["record", "replay"], help="Enregistre les réponses HTTP ou les rejoue hors ligne")
+    parser.add_argument("--archive", default=Fixtures.DEFAULT_ARCHIVE, help="Archive des réponses HTTP")
+    parser.add_argument("--ingestion", choices=["html", "feed"], default="html",
+                        help="html : pages catalogue + une page par produit ; feed : flux JSON paginé (~1 requête par page du flux)")
+    parser.add_argument("--detail-fields", nargs="*", default=[], choices=PAGE_FIELDS,
+                        help="Mode feed : champs complétés par la page produit (une requête de plus par produit), ex. sizes fit_details")
+    args = parser.parse_args()
+    archive = Fixtures.install(get_fetcher(), args.fixtures, args.archive) if args.fixtures else None
     
     # --- EXÉCUTION ---
-    combined_results = main_scraper() 
-    
-    # Créer le répertoire s'il n'existe pas
-    if not os.path.exists(OUTPUT_RESULT_DIR):
-        os.makedirs(OUTPUT_RESULT_DIR)
+    sink = JsonlSink(STREAM_PATH, resume=args.resume)
+    main_scraper(sink, args.ingestion, args.detail_fields) 
         
     total_products = 0
 
-    # --- SAUVEGARDE DES FICHIERS DISTINCTS ---
-    for product_type, results_list in combined_results.items():
+    # --- SAUVEGARDE DES FICHIERS DISTINCTS (reconstruits depuis le flux) ---
+    for product_type in ALL_CATEGORIES_TO_SCRAPE:
         
         # Définir le nom du fichier (ex: Chaussures_Nike.json ou Vêtements_Nike.json)
         OUTPUT_FILENAME = f"{product_type}_Nike.json"
         FULL_OUTPUT_PATH = os.path.join(OUTPUT_RESULT_DIR, OUTPUT_FILENAME)
         
-        with open(FULL_OUTPUT_PATH, "w", encoding="utf-8") as f:
-            json.dump(results_list, f, indent=4, ensure_ascii=False)
+        count = sink.materialize(FULL_OUTPUT_PATH, keep=lambda record: record["type"] == product_type)
             
-        total_products += len(results_list)
-        print(f"\n📁 {len(results_list)} résultats pour {product_type} enregistrés dans {FULL_OUTPUT_PATH}")
+        total_products += count
+        print(f"\n📁 {count} résultats pour {product_type} enregistrés dans {FULL_OUTPUT_PATH}")
+    sink.close()
+
+    print(FIELD_STATS.report())
+    if get_cache():
+        print(get_cache().report())
+        get_cache().close()
+
+    if archive: archive.close()
 
     print("\n==========================")
     print("SCRAPING TERMINÉ")
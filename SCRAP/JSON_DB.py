@@ -1,6 +1,152 @@
+import argparse
+import hashlib
 import json
 import os
 import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Modules partagés à la racine du projet (format colonnaire du catalogue)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Dedup import MinHashLSH, collapse_families
+from Catalog import ColumnarWriter, SqliteCatalogWriter, columnar_path, current_version, remove_versions, sqlite_path
+
+# Automate Aho-Corasick en C (pip install pyahocorasick) si disponible, sinon regex compilée
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+class KeywordClassifier:
+    """
+    Toutes les listes de mots-clés compilées en un seul automate (Aho-Corasick, ou
+    à défaut une expression régulière construite sur un trie).
+    Un texte est parcouru une seule fois ; chaque groupe de règles (catégorie, saison,
+    style...) est ensuite résolu à partir des mots-clés trouvés, avec la même priorité
+    "première règle qui matche" que les boucles any(...) d'origine.
+    """
+
+    def __init__(self, groups):
+        # groups : {nom_du_groupe: [(label, [mots-clés...]), ...]} dans l'ordre de priorité
+        self.labels = {}
+        self.word_ranks = {}  # mot-clé -> [(groupe, rang de la première règle qui le contient)]
+        for group, rules in groups.items():
+            self.labels[group] = [label for label, _ in rules]
+            rank = {}
+            for i, (_, words) in enumerate(rules):
+                for word in words:
+                    rank.setdefault(word, i)
+            for word, i in rank.items():
+                self.word_ranks.setdefault(word, []).append((group, i))
+        keywords = set(self.word_ranks)
+
+        self.automaton = None
+        if ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for word in keywords:
+                self.automaton.add_word(word, word)
+            self.automaton.make_automaton()
+
+        # Expression compilée depuis un trie des mots-clés (préfixes communs factorisés) :
+        # coût par position proportionnel à la longueur du mot, pas au nombre de mots-clés
+        trie = {}
+        for word in keywords:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = True
+        self.pattern = re.compile(self._trie_regex(trie))
+        # Les mots-clés plus courts qui commencent à la même position sont des préfixes du plus long
+        self.prefixes = {w: [k for k in keywords if w.startswith(k)] for w in keywords}
+
+    @classmethod
+    def _trie_regex(cls, node):
+        """Regex d'un nœud du trie ; le "?" glouton fait gagner le mot-clé le plus long."""
+        branches = [re.escape(char) + cls._trie_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = f"(?:{body})?"
+        return body
+
+    def scan(self, text):
+        """Liste des (début, fin, mot-clé) présents dans `text` (déjà en minuscules)."""
+        if self.automaton is not None:
+            return [(end + 1 - len(word), end + 1, word) for end, word in self.automaton.iter(text)]
+
+        hits = []
+        search = self.pattern.search
+        m = search(text)
+        while m:
+            start = m.start()
+            for word in self.prefixes[m.group()]:
+                hits.append((start, start + len(word), word))
+            # Reprise à la position suivante (et non après le match) : chevauchements compris
+            m = search(text, start + 1)
+        return hits
+
+    def classify(self, text, spans):
+        """
+        Scanne `text` une fois et résout tous les groupes : {groupe: label de la première règle
+        dont un mot-clé apparaît}. spans : {groupe: (début, fin)} restreint un groupe à une
+        partie du texte (fin=None : jusqu'au bout) ; sans span, tout le texte compte.
+        """
+        best = {}
+        for s, e, word in self.scan(text):
+            for group, rank in self.word_ranks[word]:
+                start, end = spans.get(group, (0, None))
+                if s >= start and (end is None or e <= end) and rank < best.get(group, rank + 1):
+                    best[group] = rank
+        return {group: self.labels[group][rank] for group, rank in best.items()}
+
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """Lit un fichier JSON `[ {...}, {...} ]` élément par élément, par blocs de `chunk_size` caractères."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, started = "", 0, False
+        while True:
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if not started:
+                    if pos == len(buf):
+                        break
+                    if buf[pos] != "[":
+                        raise ValueError(f"{path} : tableau JSON attendu")
+                    started, pos = True, pos + 1
+                    continue
+                if pos < len(buf) and buf[pos] == "]":
+                    return
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    break  # Élément incomplet : on lit la suite
+                yield item
+                pos = end
+            if not chunk:
+                if buf[pos:].strip():
+                    raise ValueError(f"{path} : JSON tronqué")
+                return
+
+
+_WORKER_PIPELINE = None
+
+
+def _init_worker():
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = SmartWearDataPipeline()
+
+
+def _normalize_batch(source, batch):
+    return [_WORKER_PIPELINE.normalize_item(product, source) for product in batch]
+
 
 class SmartWearDataPipeline:
     def __init__(self):
@@ -11,63 +157,105 @@ class SmartWearDataPipeline:
             "Nike_Shoes": r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result\Chaussures_Nike.json"
         }
         self.output_path = r"C:\Users\Ivin\Documents\SmartWear\Prediction\Result\SmartWear_DB.json"
+        # Manifeste du mode incrémental : empreintes des sources et de chaque produit
+        self.manifest_path = os.path.splitext(self.output_path)[0] + ".manifest.json"
+        # Copie colonnaire (mémoire mappée) lue par le visualiseur
+        self.columnar_path = columnar_path(self.output_path)
+        # Catalogue SQLite indexé (optionnel, voir Catalog.sqlite_path)
+        self.sqlite_path = None
+        # Regroupement des quasi-doublons (MinHash/LSH) en familles avant écriture
+        self.dedup = False
+        self.dedup_threshold = 0.7
         
         # Mots-clés pour la saisonnalité
         self.winter_keywords = ['laine', 'cachemire', 'manteau', 'anorak', 'polaire', 'doublure', 'chaud', 'froid', 'parka', 'velours', 'hiver', 'doudoune', 'bottines']
         self.summer_keywords = ['t-shirt', 'satin', 'lin', 'sandales', 'léger', 'fleurs', 'court', 'sans manches', 'fluide', 'été', 'débardeur']
 
-    def determine_age_range(self, item):
+        # Catégorie unifiée (sur type + category_auto), par ordre de priorité
+        self.category_rules = [
+            ('Chaussures', ['chaussure', 'bottine', 'sneaker', 'air max', 'jordan', 'sandale', 'claquette']),
+            ('Manteaux/Vestes', ['manteau', 'veste', 'anorak', 'parka', 'blouson', 'gabardine', 'trench']),
+            ('Hauts', ['pull', 'sweat', 'hoodie', 't-shirt', 'haut', 'chemise', 'gilet', 'top']),
+            ('Bas', ['pantalon', 'jean', 'bas', 'jogging', 'short', 'trouser']),
+            ('Robes/Ensembles', ['robe', 'combinaison', 'jupe']),
+        ]
+
+        # Mots-clés "occasion" qui élargissent la tranche d'âge adulte
+        self.occasion_keywords = ["fêtes", "soirée", "mariage", "élégant", "sélection"]
+
+        # Styles : spécialisation Nike, puis mots-clés détaillés (Mango et autres), puis secours par catégorie
+        self.nike_streetwear_keywords = ["jordan", "air max", "dunk", "shox", "force 1", "cargo", "oversize", "stranger things"]
+        self.specific_styles = {
+            "Élégant": ["satin", "cachemire", "bijou", "fêtes", "robe", "dentelle", "strass", "soie", "tailleur", "mariage", "noël", "talons"],
+            "Urbain": ["manteau", "trench", "bottines", "chelsea", "laine", "pince", "cuir", "blazer", "ville", "gabardine"],
+            "Streetwear": ["hoodie", "sweat", "jogging", "baggy", "mom-fit", "wideleg", "cargo", "denim", "jean", "skate", "jaspe"],
+            "Minimaliste": ["uni", "coton", "basique", "essentiels", "simple", "droit", "noir", "blanc", "perkins"],
+            "Vintage": ["rétro", "archive", "old school", "80s", "90s", "vintage", "pied-de-coq", "chevrons"],
+            "Professionnel": ["chemise", "bureau", "travail", "veste basique", "pantalons regular fit", "viscose", "col polo"]
+        }
+        self.fallback_map = {
+            "Chaussures": "Urbain",
+            "Robes/Ensembles": "Élégant",
+            "Manteaux/Vestes": "Urbain",
+            "Hauts": "Décontracté",
+            "Bas": "Décontracté"
+        }
+
+        # Toutes les listes compilées une seule fois pour tout le pipeline
+        self.classifier = KeywordClassifier({
+            "category": self.category_rules,
+            "season": [('Hiver/Automne', self.winter_keywords), ('Été/Printemps', self.summer_keywords)],
+            "occasion": [("20-49", self.occasion_keywords)],
+            "nike_style": [("Streetwear", self.nike_streetwear_keywords)],
+            "style": list(self.specific_styles.items()),
+        })
+
+    def _classify(self, item):
+        """
+        Un seul passage sur "nom description type category_auto" (en minuscules), chaque
+        groupe restreint à la partie du texte que lisait sa règle d'origine.
+        """
+        name = str(item.get('name', '')).lower()
+        desc = (item.get('description', '') or '').lower()
+        full_type = (str(item.get('type', '')) + " " + str(item.get('category_auto', ''))).lower()
+        desc_start = len(name) + 1
+        desc_end = desc_start + len(desc)
+        spans = {
+            "category": (desc_end + 1, None),     # type + category_auto
+            "occasion": (desc_start, desc_end),   # description
+            "nike_style": (0, desc_end),          # nom + description
+            "style": (0, desc_end),
+            # saison : tout le texte
+        }
+        return self.classifier.classify(f"{name} {desc} {full_type}", spans)
+
+    def determine_age_range(self, item, labels=None):
         """Détermine la tranche d'âge basée sur le genre clean et les mots-clés."""
         genre = item.get('genre_clean')
-        desc = (item.get('description', '') or '').lower()
         
         if genre == "Enfant": return "0-9"
         if genre == "Teen": return "10-19"
         
         # Logique pour adultes
-        if any(x in desc for x in ["fêtes", "soirée", "mariage", "élégant", "sélection"]):
-            return "20-49"
-        
-        return "20-29"
+        labels = self._classify(item) if labels is None else labels
+        return labels.get("occasion", "20-29")
 
-    def determine_style(self, item):
+    def determine_style(self, item, labels=None):
         """Détermine le style avec une logique de Fallback pour éliminer l'Inconnu."""
-        name = item.get('name', '').lower()
-        desc = (item.get('description', '') or '').lower()
-        full_text = f"{name} {desc}".lower()
+        labels = self._classify(item) if labels is None else labels
         source = item.get('brand_source', '')
         main_cat = item.get('main_category', '')
 
         # 1. LOGIQUE PAR MARQUE (Spécialisation Nike)
         if "Nike" in source:
-            if any(x in full_text for x in ["jordan", "air max", "dunk", "shox", "force 1", "cargo", "oversize", "stranger things"]):
-                return "Streetwear"
-            return "Sportif"
+            return labels.get("nike_style", "Sportif")
 
         # 2. LOGIQUE PAR MOTS-CLÉS DÉTAILLÉS (Mango et autres)
-        specific_styles = {
-            "Élégant": ["satin", "cachemire", "bijou", "fêtes", "robe", "dentelle", "strass", "soie", "tailleur", "mariage", "noël", "talons"],
-            "Urbain": ["manteau", "trench", "bottines", "chelsea", "laine", "pince", "cuir", "blazer", "ville", "gabardine"],
-            "Streetwear": ["hoodie", "sweat", "jogging", "baggy", "mom-fit", "wideleg", "cargo", "denim", "jean", "skate", "jaspe"],
-            "Minimaliste": ["uni", "coton", "basique", "essentiels", "simple", "droit", "noir", "blanc", "perkins"],
-            "Vintage": ["rétro", "archive", "old school", "80s", "90s", "vintage", "pied-de-coq", "chevrons"],
-            "Professionnel": ["chemise", "bureau", "travail", "veste basique", "pantalons regular fit", "viscose", "col polo"]
-        }
-
-        for style, keywords in specific_styles.items():
-            if any(word in full_text for word in keywords):
-                return style
+        if "style" in labels:
+            return labels["style"]
 
         # 3. LOGIQUE DE SECOURS PAR CATÉGORIE (Élimine l'inconnu)
-        fallback_map = {
-            "Chaussures": "Urbain",
-            "Robes/Ensembles": "Élégant",
-            "Manteaux/Vestes": "Urbain",
-            "Hauts": "Décontracté",
-            "Bas": "Décontracté"
-        }
-
-        return fallback_map.get(main_cat, "Décontracté")
+        return self.fallback_map.get(main_cat, "Décontracté")
 
     def normalize_item(self, item, source):
         # A. Source
@@ -84,37 +272,234 @@ class SmartWearDataPipeline:
         else:
             item['genre_clean'] = 'Homme'
 
+        # Un seul scan du texte pour catégorie, saison, âge et style
+        labels = self._classify(item)
+
         # C. Catégorie Unifiée
-        full_type = (str(item.get('type', '')) + " " + str(item.get('category_auto', ''))).lower()
-        if any(x in full_type for x in ['chaussure', 'bottine', 'sneaker', 'air max', 'jordan', 'sandale', 'claquette']):
-            item['main_category'] = 'Chaussures'
-        elif any(x in full_type for x in ['manteau', 'veste', 'anorak', 'parka', 'blouson', 'gabardine', 'trench']):
-            item['main_category'] = 'Manteaux/Vestes'
-        elif any(x in full_type for x in ['pull', 'sweat', 'hoodie', 't-shirt', 'haut', 'chemise', 'gilet', 'top']):
-            item['main_category'] = 'Hauts'
-        elif any(x in full_type for x in ['pantalon', 'jean', 'bas', 'jogging', 'short', 'trouser']):
-            item['main_category'] = 'Bas'
-        elif any(x in full_type for x in ['robe', 'combinaison', 'jupe']):
-            item['main_category'] = 'Robes/Ensembles'
-        else:
-            item['main_category'] = 'Autre'
+        item['main_category'] = labels.get("category", 'Autre')
 
         # D. Saisonnalité
-        text_to_scan = f"{item.get('name','')} {item.get('description','')} {full_type}".lower()
-        if any(word in text_to_scan for word in self.winter_keywords):
-            item['season'] = 'Hiver/Automne'
-        elif any(word in text_to_scan for word in self.summer_keywords):
-            item['season'] = 'Été/Printemps'
-        else:
-            item['season'] = 'Toutes saisons'
+        item['season'] = labels.get("season", 'Toutes saisons')
 
         # E. UPGRADE IA : Age & Style
-        item['age_range'] = self.determine_age_range(item)
-        item['style'] = self.determine_style(item)
+        item['age_range'] = self.determine_age_range(item, labels)
+        item['style'] = self.determine_style(item, labels)
 
         return item
 
-    def run(self):
+    # ==========================
+    #  Mode incrémental
+    # ==========================
+
+    @staticmethod
+    def _hash(payload):
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _file_hash(path):
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _rules_hash(self):
+        """Empreinte des règles de classification : si elles changent, tout est re-normalisé."""
+        return self._hash([self.winter_keywords, self.summer_keywords, self.category_rules, self.occasion_keywords,
+                           self.nike_streetwear_keywords, self.specific_styles, self.fallback_map])
+
+    @staticmethod
+    def _product_keys(products, source_name):
+        """Clé de chaque produit : source|url|genre|type (un même URL peut figurer dans plusieurs catégories)."""
+        keys, seen = [], {}
+        for p in products:
+            key = f"{source_name}|{p.get('url')}|{p.get('genre')}|{p.get('type')}"
+            seen[key] = seen.get(key, 0) + 1
+            keys.append(key if seen[key] == 1 else f"{key}#{seen[key]}")
+        return keys
+
+    def _settings(self):
+        """Options qui changent le contenu écrit sans toucher aux sources : les modifier force une réécriture."""
+        return {"dedup": self.dedup, "dedup_threshold": self.dedup_threshold, "sqlite": bool(self.sqlite_path)}
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path) and os.path.exists(self.output_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("rules") == self._rules_hash():
+                return manifest
+        return {"rules": self._rules_hash(), "sources": {}, "products": {}}
+
+    def run_incremental(self):
+        """
+        Ne re-normalise que les produits nouveaux ou modifiés (clé par URL) depuis le dernier run,
+        retire les produits disparus et réécrit la base. Sans aucun changement, rien n'est réécrit.
+
+        Limite : seul le coût de normalisation est incrémental. Dès qu'une source change,
+        l'ancienne base est relue en entier et SmartWear_DB.json, sa copie colonnaire (et
+        SQLite) sont réécrits en entier : les E/S restent proportionnelles à la taille du
+        catalogue, pas au nombre de produits modifiés.
+        """
+        print("🔄 Pipeline SmartWear (mode incrémental)...")
+        manifest = self._load_manifest()
+        new_manifest = {"rules": manifest["rules"], "settings": self._settings(), "sources": {}, "products": {}}
+
+        source_hashes = {name: self._file_hash(path) for name, path in self.paths.items() if os.path.exists(path)}
+        if manifest["sources"] and {n: s["hash"] for n, s in manifest["sources"].items()} == source_hashes:
+            # Copie SQLite demandée mais absente (supprimée à la main) : à reconstruire aussi
+            sqlite_missing = self.sqlite_path and not current_version(self.sqlite_path)
+            if manifest.get("settings") == self._settings() and not sqlite_missing:
+                print("✅ Aucune source modifiée : base de données déjà à jour.")
+                return
+            print("⚙️ Options de sortie modifiées : la base est réécrite.")
+
+        # Fiches normalisées du run précédent, par clé
+        previous = {}
+        if manifest["sources"]:
+            with open(self.output_path, "r", encoding="utf-8") as f:
+                old_db = json.load(f)
+            by_source = {}
+            for record in old_db:
+                by_source.setdefault(record.get("brand_source"), []).append(record)
+            for name, records in by_source.items():
+                previous.update(zip(self._product_keys(records, name), records))
+
+        final_db = []
+        stats = {"reused": 0, "normalized": 0}
+        for source_name, path in self.paths.items():
+            if source_name not in source_hashes:
+                print(f"⚠️ Fichier introuvable : {path}")
+                continue
+            old_source = manifest["sources"].get(source_name)
+
+            # Source inchangée : ses fiches sont reprises telles quelles
+            if old_source and old_source["hash"] == source_hashes[source_name] and all(k in previous for k in old_source["keys"]):
+                print(f"📥 {source_name} inchangé.")
+                final_db.extend(previous[k] for k in old_source["keys"])
+                new_manifest["sources"][source_name] = old_source
+                new_manifest["products"].update({k: manifest["products"][k] for k in old_source["keys"]})
+                stats["reused"] += len(old_source["keys"])
+                continue
+
+            print(f"📥 Traitement de {source_name} (produits nouveaux ou modifiés)...")
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            keys = self._product_keys(data, source_name)
+            for key, product in zip(keys, data):
+                raw_hash = self._hash(product)
+                if manifest["products"].get(key) == raw_hash and key in previous:
+                    final_db.append(previous[key])
+                    stats["reused"] += 1
+                else:
+                    final_db.append(self.normalize_item(product, source_name))
+                    stats["normalized"] += 1
+                new_manifest["products"][key] = raw_hash
+            new_manifest["sources"][source_name] = {"hash": source_hashes[source_name], "keys": keys}
+
+        removed = len(set(manifest["products"]) - set(new_manifest["products"]))
+        self._write_db(final_db)
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(new_manifest, f, ensure_ascii=False)
+        print(f"🧮 {stats['normalized']} normalisés, {stats['reused']} repris, {removed} retirés.")
+
+    def _catalog_writers(self):
+        """Copies du catalogue écrites à côté du JSON : colonnaire, et SQLite si demandé."""
+        writers = [ColumnarWriter(self.columnar_path)]
+        if self.sqlite_path:
+            writers.append(SqliteCatalogWriter(self.sqlite_path))
+        elif current_version(sqlite_path(self.output_path)):
+            # Copie SQLite d'un run précédent : elle décrirait l'ancien catalogue
+            remove_versions(sqlite_path(self.output_path))
+            print(f"🗑️ Catalogue SQLite obsolète supprimé : {sqlite_path(self.output_path)}")
+        return writers
+
+    def _deduplicate(self, final_db):
+        """Une fiche canonique par famille de quasi-doublons (même genre et même catégorie)."""
+        lsh = MinHashLSH(threshold=self.dedup_threshold)
+        deduped = collapse_families(final_db, lsh, block=lambda r: (r.get("genre_clean"), r.get("main_category")))
+        print(f"🧬 Quasi-doublons : {len(final_db)} fiches -> {len(deduped)} familles.")
+        return deduped
+
+    def _write_db(self, final_db):
+        if self.dedup:
+            final_db = self._deduplicate(final_db)
+        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+        with open(self.output_path, "w", encoding="utf-8") as f:
+            json.dump(final_db, f, indent=4, ensure_ascii=False)
+        writers = self._catalog_writers()
+        for record in final_db:
+            for writer in writers:
+                writer.add(record)
+        for writer in writers:
+            writer.close()
+        
+        print(f"\n✨ SUCCÈS : {len(final_db)} articles prêts pour SmartWear.")
+        print(f"📄 Base de données finale : {self.output_path}")
+
+    def run_streaming(self, workers=None, batch_size=500):
+        """
+        Lecture des sources en flux, normalisation par lots dans un pool de processus et
+        écriture dans l'ordre au fil de l'eau : la mémoire reste bornée par
+        `batch_size` x le nombre de lots en vol, quelle que soit la taille du catalogue.
+        """
+        workers = workers or os.cpu_count() or 1
+        if self.dedup:
+            print("⚠️ Dédoublonnage indisponible en mode flux (il compare tout le catalogue) : ignoré.")
+        print(f"🔄 Pipeline SmartWear en flux ({workers} processus, lots de {batch_size})...")
+
+        def batches():
+            for source_name, path in self.paths.items():
+                if not os.path.exists(path):
+                    print(f"⚠️ Fichier introuvable : {path}")
+                    continue
+                print(f"📥 Traitement de {source_name}...")
+                items = iter_json_array(path)
+                while True:
+                    batch = list(islice(items, batch_size))
+                    if not batch:
+                        break
+                    yield source_name, batch
+
+        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+        tmp = self.output_path + ".tmp"
+        count = 0
+        writers = self._catalog_writers()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool, \
+                open(tmp, "w", encoding="utf-8") as out:
+            out.write("[")
+            pending = deque()
+            todo = batches()
+            while True:
+                # Au plus 2 lots en vol par processus : la lecture suit le rythme de l'écriture
+                for source_name, batch in islice(todo, 2 * workers - len(pending)):
+                    pending.append(pool.submit(_normalize_batch, source_name, batch))
+                if not pending:
+                    break
+                for record in pending.popleft().result():
+                    block = json.dumps(record, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+                    out.write(("," if count else "") + "\n    " + block)
+                    for writer in writers:
+                        writer.add(record)
+                    count += 1
+            out.write("\n]" if count else "]")
+
+        if not count:
+            os.remove(tmp)
+            for writer in writers:
+                writer.abort()
+            return
+        os.replace(tmp, self.output_path)
+        for writer in writers:
+            writer.close()
+        print(f"\n✨ SUCCÈS : {count} articles prêts pour SmartWear.")
+        print(f"📄 Base de données finale : {self.output_path}")
+
+    def run(self, incremental=False, streaming=False, workers=None):
+        if incremental:
+            return self.run_incremental()
+        if streaming:
+            return self.run_streaming(workers=workers)
+
         print("🔄 Démarrage du Pipeline SmartWear (Fusion + Style Intelligence)...")
         final_db = []
 
@@ -129,13 +514,22 @@ class SmartWearDataPipeline:
                 print(f"⚠️ Fichier introuvable : {path}")
 
         if final_db:
-            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
-            with open(self.output_path, "w", encoding="utf-8") as f:
-                json.dump(final_db, f, indent=4, ensure_ascii=False)
-            
-            print(f"\n✨ SUCCÈS : {len(final_db)} articles prêts pour SmartWear.")
-            print(f"📄 Base de données finale : {self.output_path}")
+            self._write_db(final_db)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fusion et normalisation des catalogues SmartWear")
+    parser.add_argument("--incremental", action="store_true", help="Ne re-normalise que les produits nouveaux ou modifiés "
+                                                                     "(la base et ses copies restent réécrites en entier)")
+    parser.add_argument("--streaming", action="store_true", help="Lecture en flux et normalisation multi-processus")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus en mode --streaming")
+    parser.add_argument("--sqlite", action="store_true", help="Construit aussi le catalogue SQLite indexé")
+    parser.add_argument("--dedup", action="store_true", help="Regroupe les quasi-doublons en familles (fiche canonique + variantes)")
+    parser.add_argument("--dedup-threshold", type=float, default=0.7, help="Similarité minimale (Jaccard estimé)")
+    args = parser.parse_args()
+
     pipeline = SmartWearDataPipeline()
-    pipeline.run()
\ No newline at end of file
+    if args.sqlite:
+        pipeline.sqlite_path = sqlite_path(pipeline.output_path)
+    pipeline.dedup = args.dedup
+    pipeline.dedup_threshold = args.dedup_threshold
+    pipeline.run(incremental=args.incremental, streaming=args.streaming, workers=args.workers)
\ No newline at end of file
@@ -0,0 +1,185 @@
+# Scoring.py
+# Score de compatibilité des tenues (haut x bas x chaussures), vectorisé avec NumPy.
+# Chaque article candidat est encodé en tableaux (style, saison, famille de couleur,
+# marque, prix) ; toutes les combinaisons sont notées d'un coup par broadcasting
+# (termes par article + termes par paire d'emplacements), puis les k meilleures
+# sont extraites par tri partiel (argpartition). Un budget de temps borne le calcul :
+# les hauts sont traités par blocs, dans un ordre aléatoire, jusqu'à épuisement du budget.
+
+import itertools
+import time
+
+import numpy as np
+
+# Familles de couleur (mots-clés FR / EN vus dans les catalogues Mango et Nike)
+COLOR_FAMILIES = {
+    "noir": ["noir", "black", "anthracite"],
+    "blanc": ["blanc", "white", "sail", "ivoire", "ecru", "écru", "summit white"],
+    "gris": ["gris", "grey", "gray", "platinum", "argent", "silver", "chiné"],
+    "beige": ["beige", "camel", "sable", "khaki", "kaki", "taupe", "hemp", "muslin", "orewood", "crème"],
+    "marine": ["marine", "navy", "obsidian"],
+    "bleu": ["bleu", "blue", "denim", "turquoise", "cyan"],
+    "rouge": ["rouge", "red", "bordeaux", "burgundy", "crimson"],
+    "rose": ["rose", "pink", "fuchsia"],
+    "vert": ["vert", "green", "olive"],
+    "jaune": ["jaune", "yellow", "moutarde", "doré", "gold"],
+    "orange": ["orange", "corail", "rouille"],
+    "marron": ["marron", "brown", "chocolat", "cognac", "baroque"],
+    "violet": ["violet", "purple", "mauve", "lilas", "lavande"],
+}
+FAMILIES = list(COLOR_FAMILIES) + ["autre"]
+NEUTRALS = {"noir", "blanc", "gris", "beige", "marine"}
+# Paires de couleurs vives qui se heurtent
+CLASHES = {("rouge", "rose"), ("rouge", "orange"), ("rouge", "vert"), ("vert", "rose"), ("orange", "rose"),
+           ("violet", "jaune"), ("orange", "violet"), ("vert", "violet")}
+
+DEFAULT_WEIGHTS = {
+    "style_pair": 1.0,     # deux articles du même style
+    "target_style": 1.0,   # article du style demandé
+    "season_pair": 1.0,    # saisons compatibles (identiques ou "Toutes saisons")
+    "color_pair": 1.5,     # harmonie des couleurs (matrice HARMONY)
+    "brand_pair": 0.3,     # même marque
+    "price_balance": 1.0,  # pénalité sur le coefficient de variation des prix
+}
+
+
+def color_family(color):
+    """Famille de la couleur principale ("Noir/Anthracite/Tour Yellow" -> noir)."""
+    main = str(color or "").split("/")[0].lower()
+    for family, words in COLOR_FAMILIES.items():
+        if any(w in main for w in words):
+            return family
+    return "autre"
+
+
+def _harmony_matrix():
+    n = len(FAMILIES)
+    m = np.full((n, n), 0.5, dtype=np.float32)
+    for i, a in enumerate(FAMILIES):
+        for j, b in enumerate(FAMILIES):
+            if a in NEUTRALS or b in NEUTRALS:
+                m[i, j] = 1.0
+            elif a == b:
+                m[i, j] = 0.8
+            elif (a, b) in CLASHES or (b, a) in CLASHES:
+                m[i, j] = 0.1
+    return m
+
+
+HARMONY = _harmony_matrix()
+
+
+class OutfitScorer:
+    """Classement des combinaisons d'articles entre emplacements (2 ou 3 emplacements, ou 1)."""
+
+    def __init__(self, weights=None):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.vocab = {"style": {}, "season": {}, "brand": {}}
+
+    def _code(self, field, value):
+        table = self.vocab[field]
+        return table.setdefault(str(value or "").lower(), len(table))
+
+    def encode(self, items):
+        """Tableaux de caractéristiques d'une liste d'articles (fiches SmartWear_DB)."""
+        prices = np.array([it.get("price_value") if isinstance(it.get("price_value"), (int, float)) else np.nan
+                           for it in items], dtype=np.float64)
+        if np.isnan(prices).any():
+            fill = np.nanmedian(prices) if not np.isnan(prices).all() else 0.0
+            prices = np.where(np.isnan(prices), fill, prices)
+        return {
+            "style": np.array([self._code("style", it.get("style")) for it in items], dtype=np.int32),
+            "season": np.array([self._code("season", it.get("season")) for it in items], dtype=np.int32),
+            "all_seasons": np.array(["toutes" in str(it.get("season", "")).lower() for it in items], dtype=bool),
+            "color": np.array([FAMILIES.index(color_family(it.get("color"))) for it in items], dtype=np.int32),
+            "brand": np.array([self._code("brand", it.get("brand_source")) for it in items], dtype=np.int32),
+            "price": prices,
+        }
+
+    def _unary(self, f, target_style):
+        score = np.zeros(len(f["style"]), dtype=np.float32)
+        if target_style is not None:
+            score += self.weights["target_style"] * (f["style"] == target_style)
+        return score
+
+    def _pair(self, a, b):
+        """Matrice (len(a), len(b)) des termes de compatibilité entre deux emplacements."""
+        w = self.weights
+        score = w["style_pair"] * (a["style"][:, None] == b["style"][None, :])
+        seasons = ((a["season"][:, None] == b["season"][None, :])
+                   | a["all_seasons"][:, None] | b["all_seasons"][None, :])
+        score = score + w["season_pair"] * seasons
+        score = score + w["color_pair"] * HARMONY[a["color"][:, None], b["color"][None, :]]
+        score = score + w["brand_pair"] * (a["brand"][:, None] == b["brand"][None, :])
+        return score.astype(np.float32)
+
+    def _block_scores(self, feats, unary, pairs):
+        """Tenseur des scores (n1, n2, ...) pour un bloc du premier emplacement."""
+        k = len(feats)
+        shape = [len(f["price"]) for f in feats]
+        total = np.zeros(shape, dtype=np.float32)
+        s1 = np.zeros(shape, dtype=np.float64)
+        s2 = np.zeros(shape, dtype=np.float64)
+        for axis, (f, u) in enumerate(zip(feats, unary)):
+            view = [1] * k
+            view[axis] = -1
+            total += u.reshape(view)
+            s1 += f["price"].reshape(view)
+            s2 += (f["price"] ** 2).reshape(view)
+        for (i, j), matrix in pairs.items():
+            view = [1] * k
+            view[i], view[j] = matrix.shape
+            total += matrix.reshape(view)
+        if k > 1:
+            mean = s1 / k
+            cv = np.sqrt(np.maximum(s2 / k - mean ** 2, 0)) / np.maximum(mean, 1e-9)
+            total -= (self.weights["price_balance"] * cv).astype(np.float32)
+        return total
+
+    def top_k(self, slots, k=5, target_style=None, budget_s=0.05, block_size=None):
+        """
+        `slots` = {emplacement: [articles]} (listes non vides). Renvoie au plus k tenues
+        [(score, {emplacement: article})], meilleures d'abord, et les statistiques du calcul.
+        """
+        names = [s for s, items in slots.items() if items]
+        if not names or k <= 0:
+            return [], {"combinations": 0, "evaluated": 0, "seconds": 0.0}
+        start = time.perf_counter()
+        items = [slots[s] for s in names]
+        feats = [self.encode(it) for it in items]
+        target = self.vocab["style"].get(str(target_style).lower()) if target_style else None
+        unary = [self._unary(f, target) for f in feats]
+
+        n_rest = int(np.prod([len(it) for it in items[1:]])) if len(items) > 1 else 1
+        block_size = block_size or max(1, 250_000 // n_rest)  # ~250k combinaisons par bloc
+        order = np.random.permutation(len(items[0]))
+
+        best_scores = np.empty(0, dtype=np.float32)
+        best_index = np.empty((0, len(items)), dtype=np.int64)
+        evaluated = 0
+        for lo in range(0, len(order), block_size):
+            rows = order[lo:lo + block_size]
+            block = [{key: val[rows] for key, val in feats[0].items()}] + feats[1:]
+            block_unary = [unary[0][rows]] + unary[1:]
+            pairs = {(i, j): self._pair(block[i], block[j]) for i, j in itertools.combinations(range(len(block)), 2)}
+            scores = self._block_scores(block, block_unary, pairs).ravel()
+            evaluated += scores.size
+
+            # Tri partiel : k meilleures du bloc, fusionnées avec les k meilleures courantes
+            take = min(k, scores.size)
+            top = np.argpartition(-scores, take - 1)[:take]
+            idx = np.stack(np.unravel_index(top, [len(rows)] + [len(it) for it in items[1:]]), axis=1)
+            idx[:, 0] = rows[idx[:, 0]]
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_index = np.concatenate([best_index, idx])
+            keep = np.argsort(-best_scores, kind="stable")[:k]
+            best_scores, best_index = best_scores[keep], best_index[keep]
+
+            if time.perf_counter() - start > budget_s:
+                break
+
+        outfits = [(float(score), {name: items[a][i] for a, (name, i) in enumerate(zip(names, combo))})
+                   for score, combo in zip(best_scores, best_index)]
+        stats = {"combinations": len(items[0]) * n_rest, "evaluated": evaluated,
+                 "seconds": time.perf_counter() - start}
+        return outfits, stats
@@ -0,0 +1,113 @@
+# Stream.py
+# Sortie en flux des scrapers : chaque produit est ajouté à un fichier JSONL dès
+# qu'il est parsé, et un checkpoint garde la liste des catégories terminées.
+# Après un crash ou un Ctrl-C, une relance en mode --resume repart d'où elle
+# s'était arrêtée. Le JSON final (indent=4) est reconstruit depuis le flux,
+# ligne par ligne, sans jamais charger tout le catalogue en mémoire.
+
+import json
+import os
+import threading
+
+
+def record_key(record):
+    """Clé d'un produit déjà traité : (genre, type, url)."""
+    return (record.get("genre"), record.get("type"), record.get("url"))
+
+
+class JsonlSink:
+    """Flux JSONL append-only + checkpoint des catégories terminées."""
+
+    def __init__(self, stream_path, resume=False):
+        self.stream_path = stream_path
+        self.checkpoint_path = os.path.splitext(stream_path)[0] + ".checkpoint.json"
+        self.lock = threading.Lock()
+        self.done_categories = set()
+        self.done_keys = set()
+
+        os.makedirs(os.path.dirname(stream_path) or ".", exist_ok=True)
+        if resume:
+            self._load()
+        else:
+            open(self.stream_path, "w", encoding="utf-8").close()
+            self._save_checkpoint()
+        self.file = open(self.stream_path, "a", encoding="utf-8")
+
+    def _load(self):
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                self.done_categories = set(json.load(f).get("categories", []))
+
+        if not os.path.exists(self.stream_path):
+            return
+        # Relit le flux ; une dernière ligne tronquée (crash en pleine écriture) est coupée
+        valid_end = 0
+        with open(self.stream_path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self.done_keys.add(record_key(record))
+                valid_end += len(line)
+        with open(self.stream_path, "r+b") as f:
+            f.truncate(valid_end)
+
+    def _save_checkpoint(self):
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"categories": sorted(self.done_categories)}, f, ensure_ascii=False)
+        os.replace(tmp, self.checkpoint_path)
+
+    def category_done(self, category):
+        return category in self.done_categories
+
+    def is_done(self, genre, p_type, url):
+        return (genre, p_type, url) in self.done_keys
+
+    def write(self, record):
+        """Ajoute un produit au flux (écriture immédiate sur disque)."""
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            self.done_keys.add(record_key(record))
+
+    def complete_category(self, category):
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.done_categories.add(category)
+            self._save_checkpoint()
+
+    def iter_records(self, keep=None):
+        """Relit le flux produit par produit (filtre optionnel `keep(record)`)."""
+        with open(self.stream_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if keep is None or keep(record):
+                    yield record
+
+    def materialize(self, output_path, keep=None):
+        """Écrit le JSON final (même format que json.dump(..., indent=4)) en flux. Renvoie le nombre de produits."""
+        self.file.flush()
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        count = 0
+        tmp = output_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            out.write("[")
+            for record in self.iter_records(keep):
+                block = json.dumps(record, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+                out.write(("," if count else "") + "\n    " + block)
+                count += 1
+            out.write("\n]" if count else "]")
+        os.replace(tmp, output_path)
+        return count
+
+    def close(self):
+        with self.lock:
+            self.file.close()